@@ -0,0 +1,260 @@
+# api_meteo.py - Prévisions sans interface : fonction Python et petit serveur HTTP
+#
+# Mêmes modèles (registre partagé du processus) et même grille précalculée
+# (precalcul_previsions.py) que app_meteo.py, sans Streamlit. Réponses en JSON, ou en Arrow
+# (flux IPC) si pyarrow est installé.
+#
+#   GET  /prevision?ville=rabat&debut=2026-07-01&jours=7&heures=8,14,20[&format=arrow]
+#   POST /previsions   {"requetes": [{"ville": "rabat", "jours": 7, "heures": [14]}, ...]}
+#   GET  /sante
+#   GET  /metriques[?format=prometheus]   temps par étape, compteurs, RSS (instrumentation.py)
+#
+# Usage : python api_meteo.py [--hote 127.0.0.1] [--port 8502]
+import argparse
+import io
+import json
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from instrumentation import format_prometheus, instantane, mesure
+from precalcul_previsions import calculer_grille, grille_prevision
+from prevision import HORIZON_MAX_JOURS
+from registre_modele import charger_modele, registre
+from villes import VILLE_DEFAUT, trouver_modele, ville as infos_ville
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+TYPE_ARROW = 'application/vnd.apache.arrow.stream'
+MAX_REQUETES_LOT = 1000
+# Premiers jours distincts hors de la grille précalculée par lot : chacun coûte une
+# grille récursive (24 x jours predicts successifs)
+MAX_DEBUTS_HORS_GRILLE = 8
+
+
+def _entier(valeur, nom):
+    """Entier JSON ou texte de chiffres (paramètre d'URL) ; ValueError pour 1.7, true, [..]"""
+    if isinstance(valeur, str) and valeur.strip().lstrip('-').isdigit():
+        return int(valeur)
+    if isinstance(valeur, (int, np.integer)) and not isinstance(valeur, bool):
+        return int(valeur)
+    raise ValueError(f"'{nom}' doit être un entier (reçu {valeur!r})")
+
+
+def _date(valeur):
+    """Date ISO 'AAAA-MM-JJ' (texte) ; demain si absente, ValueError pour 20260701, 5, [..]"""
+    if valeur is None or valeur == '':
+        return np.datetime64(date.today() + timedelta(days=1), 'D')
+    if not isinstance(valeur, str):
+        raise ValueError(f"'debut' doit être une date 'AAAA-MM-JJ' (reçu {valeur!r})")
+    try:
+        return np.datetime64(date.fromisoformat(valeur.strip()), 'D')
+    except ValueError:
+        raise ValueError(f"'debut' doit être une date 'AAAA-MM-JJ' (reçu {valeur!r})") from None
+
+
+def _normaliser(requete):
+    """Requête {ville, debut, jours, heures} validée et complétée (ValueError sinon)"""
+    if not isinstance(requete, dict):
+        raise ValueError(f"Chaque requête doit être un objet JSON (reçu {requete!r})")
+    code = requete.get('ville', VILLE_DEFAUT)
+    infos_ville(code)
+    debut = _date(requete.get('debut'))
+    nb_jours = _entier(requete.get('jours', 7), 'jours')
+    if not 1 <= nb_jours <= HORIZON_MAX_JOURS:
+        raise ValueError(f"'jours' doit être entre 1 et {HORIZON_MAX_JOURS}")
+    heures = requete.get('heures')
+    if isinstance(heures, str):
+        heures = [h for h in heures.split(',') if h]  # ?heures=8,14,20
+    elif heures is not None and not isinstance(heures, list):
+        heures = [heures]
+    heures = np.arange(24) if heures is None else np.array([_entier(h, 'heures') for h in heures], dtype=np.int64)
+    if len(heures) == 0 or heures.min() < 0 or heures.max() > 23:
+        raise ValueError("'heures' doit contenir des heures entre 0 et 23")
+    return {'ville': code, 'debut': debut, 'jours': nb_jours, 'heures': heures}
+
+
+def prevoir_lot(requetes):
+    """Prévisions pour plusieurs requêtes : tranches de la grille précalculée, sinon grille récursive par début"""
+    requetes = [_normaliser(r) for r in requetes]
+    resultats = [None] * len(requetes)
+
+    par_ville = {}
+    for i, requete in enumerate(requetes):
+        par_ville.setdefault(requete['ville'], []).append(i)
+
+    a_calculer = []
+    for code, indices in par_ville.items():
+        modele_charge = charger_modele(trouver_modele(code))
+        grille = grille_prevision(modele_charge)
+        hors_grille = []
+        for i in indices:
+            r = requetes[i]
+            decalage = int((r['debut'] - grille.jours[0]).astype(np.int64))
+            if 0 <= decalage and decalage + r['jours'] <= len(grille):
+                jours = slice(decalage, decalage + r['jours'])
+                resultats[i] = _resultat(r, modele_charge, grille.temperature[jours][:, r['heures']],
+                                         grille.humidity[jours][:, r['heures']])
+            else:
+                hors_grille.append(i)
+        if hors_grille:
+            a_calculer.append((modele_charge, hors_grille))
+
+    # Vérifié avant tout calcul : un lot ne doit pas occuper le serveur plusieurs minutes
+    debuts = {(requetes[i]['ville'], requetes[i]['debut']) for _, indices in a_calculer for i in indices}
+    if len(debuts) > MAX_DEBUTS_HORS_GRILLE:
+        raise ValueError(f"{len(debuts)} premiers jours hors de la grille précalculée dans le lot "
+                         f"(maximum {MAX_DEBUTS_HORS_GRILLE})")
+    for modele_charge, indices in a_calculer:
+        _calculer(requetes, indices, modele_charge, resultats)
+    return resultats
+
+
+def _resultat(requete, modele_charge, temperature, humidity):
+    return {
+        'ville': requete['ville'],
+        'modele': modele_charge.version,
+        'jours': (requete['debut'] + np.arange(requete['jours'])).astype(str).tolist(),
+        'heures': requete['heures'].tolist(),
+        'temperature': temperature,
+        'humidity': humidity,
+    }
+
+
+def _calculer(requetes, indices, modele_charge, resultats):
+    """Requêtes hors de la grille (passé, au-delà de l'horizon) : grille récursive depuis leur premier jour"""
+    par_debut = {}
+    for i in indices:
+        par_debut.setdefault(requetes[i]['debut'], []).append(i)
+
+    for debut, groupe in par_debut.items():
+        # Même calcul que la grille précalculée : fenêtres glissantes prises dans l'historique
+        # jusqu'à la veille de `debut`, puis nourries par les prédictions
+        grille = calculer_grille(modele_charge, debut, max(requetes[i]['jours'] for i in groupe))
+        for i in groupe:
+            r = requetes[i]
+            resultats[i] = _resultat(r, modele_charge, grille.temperature[:r['jours'], r['heures']],
+                                     grille.humidity[:r['jours'], r['heures']])
+
+
+def prevoir(ville=VILLE_DEFAUT, debut=None, jours=7, heures=None):
+    """Prévision d'une ville : {ville, modele, jours, heures, temperature (jours x heures), humidity}"""
+    return prevoir_lot([{'ville': ville, 'debut': debut, 'jours': jours, 'heures': heures}])[0]
+
+
+def en_json(resultat):
+    """Résultat -> dict sérialisable (valeurs arrondies)"""
+    return dict(
+        resultat,
+        temperature=np.round(resultat['temperature'], 2).tolist(),
+        humidity=np.round(resultat['humidity'], 1).tolist(),
+    )
+
+
+def en_arrow(resultats):
+    """Résultats -> flux IPC Arrow, une ligne par (ville, date-heure)"""
+    colonnes = {'ville': [], 'date': [], 'temperature': [], 'humidity': []}
+    for r in resultats:
+        dates = (np.array(r['jours'], dtype='datetime64[s]')[:, None]
+                 + np.array(r['heures']) * np.timedelta64(3600, 's')).ravel()
+        colonnes['ville'].append(np.full(len(dates), r['ville'], dtype=object))
+        colonnes['date'].append(dates)
+        colonnes['temperature'].append(r['temperature'].ravel().astype(np.float32))
+        colonnes['humidity'].append(r['humidity'].ravel().astype(np.float32))
+    table = pa.table({nom: np.concatenate(valeurs) for nom, valeurs in colonnes.items()})
+    tampon = io.BytesIO()
+    with pa.ipc.new_stream(tampon, table.schema) as flux:
+        flux.write_table(table)
+    return tampon.getvalue()
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    """Routes HTTP de l'API (un thread par connexion, connexions keep-alive)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MeteoIA/1.0'
+
+    def log_message(self, format, *args):
+        pass  # pas une ligne de log par requête
+
+    def _repondre(self, statut, corps, type_contenu='application/json'):
+        if not isinstance(corps, bytes):
+            corps = json.dumps(corps, ensure_ascii=False).encode()
+        self.send_response(statut)
+        self.send_header('Content-Type', type_contenu)
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _servir(self, requetes, arrow):
+        try:
+            with mesure('api_prevoir_lot'):
+                resultats = prevoir_lot(requetes)
+        except FileNotFoundError as e:
+            return self._repondre(404, {'erreur': f"Modèle introuvable : {e.filename}"})
+        except (ValueError, TypeError) as e:
+            return self._repondre(400, {'erreur': str(e)})
+        if arrow:
+            if pa is None:
+                return self._repondre(406, {'erreur': "Format Arrow indisponible (pyarrow non installé)"})
+            return self._repondre(200, en_arrow(resultats), TYPE_ARROW)
+        return self._repondre(200, {'previsions': [en_json(r) for r in resultats]})
+
+    def _veut_arrow(self, params):
+        return params.get('format') == 'arrow' or TYPE_ARROW in self.headers.get('Accept', '')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        if url.path == '/sante':
+            return self._repondre(200, {'statut': 'ok', 'modeles_en_cache': len(registre),
+                                        'memoire_modeles_mo': round(registre.occupation() / 1e6, 1)})
+        if url.path == '/metriques':
+            if params.get('format') == 'prometheus':
+                return self._repondre(200, format_prometheus().encode(), 'text/plain; version=0.0.4')
+            return self._repondre(200, instantane())
+        if url.path != '/prevision':
+            return self._repondre(404, {'erreur': f"Route inconnue : {url.path}"})
+        requete = {cle: params[cle] for cle in ('ville', 'debut', 'jours', 'heures') if cle in params}
+        self._servir([requete], self._veut_arrow(params))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/previsions':
+            return self._repondre(404, {'erreur': f"Route inconnue : {url.path}"})
+        try:
+            corps = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            requetes = corps['requetes']
+        except (ValueError, KeyError, TypeError):
+            return self._repondre(400, {'erreur': "Corps attendu : {\"requetes\": [...]}"})
+        if not isinstance(requetes, list) or not 1 <= len(requetes) <= MAX_REQUETES_LOT:
+            return self._repondre(400, {'erreur': f"Entre 1 et {MAX_REQUETES_LOT} requêtes par lot"})
+        params = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        self._servir(requetes, self._veut_arrow(params))
+
+
+def creer_serveur(hote='127.0.0.1', port=8502):
+    """Serveur HTTP multithread (port=0 : port libre choisi par le système)"""
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireAPI)
+    serveur.daemon_threads = True
+    return serveur
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="API de prévisions météo (JSON / Arrow)")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+    serveur = creer_serveur(args.hote, args.port)
+    print(f"🌐 API météo sur http://{args.hote}:{serveur.server_port} (Ctrl+C pour arrêter)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
@@ -1,255 +1,62 @@
 # app_meteo.py - Application Météo avec IA
+import altair as alt
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import requests
-import base64
-from PIL import Image
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import TimeoutError as DelaiDepasse
 
-# --- FONCTION POUR DÉTERMINER LA SAISON ---
-def get_season(month, day):
-    """Retourne la saison et sa couleur selon le mois et le jour"""
-    if (month == 12 and day >= 21) or month in [1, 2] or (month == 3 and day < 20):
-        return "Hiver", "🔵", "#ADD8E6"  # Bleu clair
-    elif (month == 3 and day >= 20) or month in [4, 5] or (month == 6 and day < 21):
-        return "Printemps", "🌸", "#FFB6C1"  # Rose
-    elif (month == 6 and day >= 21) or month in [7, 8] or (month == 9 and day < 23):
-        return "Été", "☀️", "#FFD700"  # Jaune doré
-    else:
-        return "Automne", "🍂", "#FF8C00"  # Orange
+from client_open_meteo import prevision_en_arriere_plan
+from instrumentation import SuiteEtapes, demarrer_ecriture, demarrer_trace, enregistrer, instantane, mesure
+from interface_statique import entete, logo
+from precalcul_previsions import grille_prevision
+from precision_previsions import params_officiels, precision_previsions
+from registre_modele import charger_modele, registre
+from saisons import colonnes_saisons
+from villes import VILLE_DEFAUT, VILLES, coordonnees_lisibles, trouver_modele
 
-# --- 1. CHARGEMENT DU LOGO ---
-try:
-    logo_img = Image.open("meteo.jpg")
-except FileNotFoundError:
-    logo_img = "🌤️"
+# --- 0. INSTRUMENTATION ---
+# Temps de chaque étape de ce rerun (panneau de debug) et métriques du processus,
+# écrites périodiquement dans metriques/metriques.jsonl (instrumentation.py)
+debut_rerun = time.perf_counter()
+trace_page = demarrer_trace()
+etapes_page = SuiteEtapes()
+demarrer_ecriture()
 
 # --- 2. CONFIGURATION DE LA PAGE ---
+# Logo, CSS et icônes lus une fois par processus (interface_statique.py, static/)
 st.set_page_config(
-    page_title="Météo IA Rabat",
-    page_icon=logo_img,
+    page_title="Météo IA Maroc",
+    page_icon=logo(),
     layout="wide"
 )
 
-# --- 3. CSS MODERNE 2026 ---
-st.markdown("""
-<style>
-    /* Style global moderne */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap');
-    
-    html, body, [class*="css"] {
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    /* Scrollbar personnalisée */
-    ::-webkit-scrollbar {
-        width: 8px;
-        height: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(255,255,255,0.05);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-    }
-    
-    /* Header avec gradient */
-    .main-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        margin-bottom: 2rem;
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-        text-align: center;
-        animation: slideDown 0.6s ease-out;
-    }
-    
-    @keyframes slideDown {
-        from { 
-            opacity: 0; 
-            transform: translateY(-30px); 
-        }
-        to { 
-            opacity: 1; 
-            transform: translateY(0); 
-        }
-    }
-    
-    .main-header h1 {
-        color: white;
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin: 0;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-    }
-    
-    .main-header p {
-        color: rgba(255,255,255,0.9);
-        font-size: 1.1rem;
-        margin-top: 0.5rem;
-    }
-    
-    /* Cards modernes */
-    .stDataFrame {
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-        transition: transform 0.3s ease;
-    }
-    
-    .stDataFrame:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 35px rgba(0,0,0,0.2);
-    }
-    
-    /* Boutons stylés */
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 0.75rem 2rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.6);
-    }
-    
-    /* Inputs modernes */
-    .stSlider, .stNumberInput {
-        background: rgba(255,255,255,0.05);
-        border-radius: 15px;
-        padding: 1rem;
-        backdrop-filter: blur(10px);
-    }
-    
-    /* Graphiques avec ombre */
-    .stPlotlyChart, .element-container iframe {
-        border-radius: 15px;
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-        overflow: hidden;
-    }
-    
-    /* Sidebar style */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, rgba(102,126,234,0.1) 0%, rgba(118,75,162,0.1) 100%);
-        backdrop-filter: blur(10px);
-    }
-    
-    [data-testid="stSidebar"] h2, [data-testid="stSidebar"] h3 {
-        color: #667eea;
-    }
-    
-    /* Responsive Mobile */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 1.8rem;
-        }
-        
-        .main-header {
-            padding: 1.5rem;
-        }
-        
-        [data-testid="column"] {
-            padding: 0.5rem !important;
-        }
-        
-        .metric-card {
-            padding: 1rem !important;
-        }
-        
-        .metric-card h2 {
-            font-size: 1.5rem !important;
-        }
-    }
-    
-    /* Responsive Tablet */
-    @media (max-width: 1024px) and (min-width: 769px) {
-        .main-header h1 {
-            font-size: 2.2rem;
-        }
-    }
-    
-    /* Animation fade-in */
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .element-container {
-        animation: fadeIn 0.5s ease-out;
-    }
-    
-    /* Indicateurs météo */
-    .metric-card {
-        background: linear-gradient(135deg, rgba(255,255,255,0.1) 0%, rgba(255,255,255,0.05) 100%);
-        border-radius: 15px;
-        padding: 1.5rem;
-        text-align: center;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255,255,255,0.1);
-        transition: all 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: scale(1.05);
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-        border: 1px solid rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Dark mode optimisé */
-    [data-theme="dark"] {
-        background-color: #0f0f23;
-    }
-    
-    /* Améliorations tableaux */
-    thead tr th {
-        background: linear-gradient(135deg, rgba(102,126,234,0.3), rgba(118,75,162,0.3)) !important;
-        color: white !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Sélection de ligne */
-    tbody tr:hover {
-        background: rgba(102,126,234,0.1) !important;
-        cursor: pointer;
-    }
-</style>
-""", unsafe_allow_html=True)
+# --- 3-4. CSS MODERNE 2026 ET ICÔNES PWA ---
+# Liens vers les fichiers hachés de static/ (construire_assets.py), mis en cache par le navigateur
+st.markdown(entete(st.get_option('server.enableStaticServing')), unsafe_allow_html=True)
 
-# --- 4. INJECTION DES ICÔNES PWA ---
-try:
-    with open("apple-touch-icon.png", "rb") as f:
-        apple_icon = base64.b64encode(f.read()).decode()
-    
-    st.markdown(f'''
-        <link rel="apple-touch-icon" href="data:image/png;base64,{apple_icon}">
-        <link rel="icon" type="image/png" sizes="192x192" href="data:image/png;base64,{apple_icon}">
-        <meta name="apple-mobile-web-app-capable" content="yes">
-        <meta name="apple-mobile-web-app-status-bar-style" content="default">
-        <meta name="apple-mobile-web-app-title" content="Météo Rabat">
-    ''', unsafe_allow_html=True)
-except:
-    pass
+# --- 5. CHOIX DE LA VILLE ---
+# Seul le modèle de la ville choisie est chargé (registre partagé, plafonné en mémoire)
+with st.sidebar:
+    code_ville = st.selectbox("📍 Ville", list(VILLES), index=list(VILLES).index(VILLE_DEFAUT),
+                              format_func=lambda code: VILLES[code]['nom'], key='ville')
+    afficher_temps = st.checkbox("⏱️ Temps de calcul (debug)", key='debug_temps')
+    # Rempli en fin de page, une fois toutes les étapes mesurées
+    zone_debug = st.container()
+ville = VILLES[code_ville]
 
-# --- 5. HEADER MODERNE ---
-st.markdown("""
+# --- 5 bis. MÉTÉO OFFICIELLE EN ARRIÈRE-PLAN ---
+# Demandée dès maintenant, en parallèle du calcul des prévisions, et attendue en fin de
+# page seulement : le tableau s'affiche sans dépendre du temps de réponse d'Open-Meteo
+DELAI_COMPARAISON_S = 3.0
+debut_page = time.monotonic()
+# Série horaire officielle sur 16 jours : même réponse (cache) quel que soit le nombre de jours
+comparaison_future = prevision_en_arriere_plan(params_officiels(code_ville))
+
+# --- 5 ter. HEADER MODERNE ---
+st.markdown(f"""
 <div class="main-header">
-    <h1>🌤️ Météo IA - Rabat</h1>
+    <h1>🌤️ Météo IA - {ville['nom']}</h1>
     <p>Prédictions météorologiques intelligentes avec Gradient Boosting</p>
 </div>
 """, unsafe_allow_html=True)
@@ -257,8 +64,8 @@ st.markdown("""
 # --- 6. SIDEBAR INFORMATIVE ---
 with st.sidebar:
     st.markdown("### ℹ️ À propos")
-    st.markdown("""
-    **Météo IA Rabat** utilise l'intelligence artificielle pour prédire la météo avec une précision exceptionnelle.
+    st.markdown(f"""
+    **Météo IA {ville['nom']}** utilise l'intelligence artificielle pour prédire la météo avec une précision exceptionnelle.
     
     #### 🤖 Technologie
     - **Modèle**: Gradient Boosting
@@ -267,8 +74,8 @@ with st.sidebar:
     - **Observations**: 43,848 points
     
     #### 📍 Localisation
-    - **Ville**: Rabat, Maroc
-    - **Coordonnées**: 34.02°N, 6.84°W
+    - **Ville**: {ville['nom']}, Maroc
+    - **Coordonnées**: {coordonnees_lisibles(code_ville)}
     - **Source**: Open-Meteo API
     
     #### 🎯 Caractéristiques
@@ -310,74 +117,38 @@ st.subheader(f"📅 Prévisions pour les {nb_jours} prochains jours à {heure_se
 
 # Chargement des modèles et données historiques
 try:
-    model_path = 'cerveau_meteo_long_terme.pkl'
-    model_data = joblib.load(model_path)
-    
-    # Extraction des modèles
-    if isinstance(model_data, dict):
-        model_temp = model_data.get('model_temp')
-        model_humidity = model_data.get('model_humidity')
-        features = model_data.get('features')
-        historical_data = model_data.get('historical_data')
-    else:
-        st.error("❌ Format de modèle non compatible. Veuillez réentraîner le modèle.")
-        st.stop()
+    model_path = trouver_modele(code_ville)
+    # Chargé une seule fois par processus, rechargé à chaud après réentraînement
+    # (le contenu de l'artefact n'est lu que s'il sert : grille à calculer, historique)
+    with mesure('acces_modele'):
+        modele_charge = charger_modele(model_path)
     
     # Génération des prévisions
     start_date = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
     dates_semaine = pd.date_range(start=start_date, periods=nb_jours, freq='D')
     
-    df_semaine = pd.DataFrame({'date': dates_semaine})
-    df_semaine['jour_annee'] = df_semaine['date'].dt.dayofyear
-    df_semaine['mois'] = df_semaine['date'].dt.month
-    df_semaine['jour'] = df_semaine['date'].dt.day
-    df_semaine['jour_mois'] = df_semaine['date'].dt.day
-    df_semaine['heure'] = heure_selectionnee
-    
-    # Encodage cyclique
-    df_semaine['day_cos'] = np.cos(2 * np.pi * df_semaine['jour_annee'] / 365.25)
-    df_semaine['day_sin'] = np.sin(2 * np.pi * df_semaine['jour_annee'] / 365.25)
-    df_semaine['hour_cos'] = np.cos(2 * np.pi * df_semaine['heure'] / 24)
-    df_semaine['hour_sin'] = np.sin(2 * np.pi * df_semaine['heure'] / 24)
-    df_semaine['month_cos'] = np.cos(2 * np.pi * df_semaine['mois'] / 12)
-    df_semaine['month_sin'] = np.sin(2 * np.pi * df_semaine['mois'] / 12)
+    # Grille horaire complète (30 jours x 24 h) précalculée par modèle et par jour
+    # (precalcul_previsions.py) : changer l'heure ou le nombre de jours n'est qu'une tranche
+    with mesure('grille'):
+        grille = grille_prevision(modele_charge, start_date.strftime('%Y-%m-%d'))
     
-    # Features météo (valeurs moyennes des données historiques)
-    if historical_data is not None:
-        df_semaine['cloud_cover_filled'] = historical_data['cloud_cover'].mean()
-        df_semaine['temp_rolling_24h'] = historical_data['temperature'].tail(24).mean()
-        df_semaine['temp_rolling_7d'] = historical_data['temperature'].tail(168).mean()
-        df_semaine['humidity_rolling_24h'] = historical_data['humidity'].tail(24).mean()
+    infos_modele = modele_charge.resume()
+    if infos_modele['temps_chargement_ms'] is None:
+        chargement = "grille précalculée, modèle non chargé"
     else:
-        df_semaine['cloud_cover_filled'] = 50
-        df_semaine['temp_rolling_24h'] = 20
-        df_semaine['temp_rolling_7d'] = 20
-        df_semaine['humidity_rolling_24h'] = 70
-    
-    # Interactions
-    df_semaine['hour_month'] = df_semaine['heure'] * df_semaine['mois']
-    df_semaine['day_hour'] = df_semaine['jour_annee'] * df_semaine['heure']
-    df_semaine['cloud_hour'] = df_semaine['cloud_cover_filled'] * df_semaine['heure']
-    
-    # Polynomiales
-    df_semaine['jour_annee_sq'] = df_semaine['jour_annee'] ** 2
-    df_semaine['heure_sq'] = df_semaine['heure'] ** 2
-    df_semaine['mois_sq'] = df_semaine['mois'] ** 2
-    
-    # Indicateurs
-    df_semaine['is_winter'] = ((df_semaine['mois'] == 12) | (df_semaine['mois'] <= 2)).astype(int)
-    df_semaine['is_summer'] = ((df_semaine['mois'] >= 6) & (df_semaine['mois'] <= 8)).astype(int)
-    df_semaine['is_night'] = ((df_semaine['heure'] >= 20) | (df_semaine['heure'] <= 6)).astype(int)
-    df_semaine['is_midday'] = ((df_semaine['heure'] >= 11) & (df_semaine['heure'] <= 15)).astype(int)
+        memoire_modele = "n/d" if infos_modele['memoire_mo'] is None else f"{infos_modele['memoire_mo']:.0f} Mo"
+        chargement = f"chargé en {infos_modele['temps_chargement_ms']:.0f} ms · {memoire_modele} en mémoire"
+    st.sidebar.caption(
+        f"⚙️ Modèle v{infos_modele['version']} · {infos_modele['taille_fichier_mo']:.1f} Mo sur disque · "
+        f"{chargement} · {len(registre)} ville(s) en cache ({registre.occupation() / 1e6:.0f} Mo)"
+    )
     
-    # Prédictions avec toutes les features
-    df_semaine['Prediction_Temp'] = model_temp.predict(df_semaine[features])
-    df_semaine['Prediction_Humidity'] = model_humidity.predict(df_semaine[features])
+    etapes_page.etape('rendu_tableau')
+    df_semaine = pd.DataFrame({'date': dates_semaine})
+    df_semaine['Prediction_Temp'], df_semaine['Prediction_Humidity'] = grille.a_l_heure(int(heure_selectionnee), nb_jours)
     
     # Ajout des saisons
-    df_semaine['Saison'], df_semaine['Icone_Saison'], df_semaine['Couleur_Saison'] = zip(*df_semaine.apply(
-        lambda row: get_season(row['mois'], row['jour']), axis=1
-    ))
+    df_semaine = df_semaine.assign(**colonnes_saisons(dates_semaine))
     
     # Noms des jours en français
     jours_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
@@ -386,7 +157,6 @@ try:
     df_affichage = df_semaine.copy()
     df_affichage['Jour'] = df_affichage['date'].dt.dayofweek.map(lambda x: jours_fr[x])
     df_affichage['Date'] = df_affichage['date'].dt.strftime('%d/%m')
-    df_affichage['Saison_Display'] = df_affichage['Icone_Saison'] + ' ' + df_affichage['Saison']
     df_affichage['Température'] = df_affichage['Prediction_Temp'].round(1).astype(str) + '°C'
     df_affichage['💧 Humidité'] = df_affichage['Prediction_Humidity'].round(0).astype(int).astype(str) + '%'
     
@@ -453,6 +223,7 @@ try:
     )
     
     # Affichage de l'historique si une ligne est sélectionnée
+    etapes_page.etape('rendu_historique')
     if event.selection and len(event.selection.rows) > 0:
         selected_row = event.selection.rows[0]
         selected_date = dates_semaine[selected_row]
@@ -468,18 +239,27 @@ try:
         </div>
         """, unsafe_allow_html=True)
         
+        # Historique horaire (stockage colonnaire mappé en mémoire, partagé entre processus),
+        # ouvert à la première ligne sélectionnée
+        try:
+            historical_data = modele_charge.historique
+        except (OSError, ValueError) as e:
+            st.warning(f"Historique indisponible : {e}")
+            historical_data = None
+        
         if historical_data is not None:
-            # Filtrer les données historiques pour cette date et heure
-            hist_filtered = historical_data[
-                (historical_data['date'].dt.month == selected_month) &
-                (historical_data['date'].dt.day == selected_day) &
-                (historical_data['date'].dt.hour == heure_selectionnee)
-            ].copy()
+            # Lignes de cette date et heure via l'index calendaire (une tranche, pas de scan)
+            index_hist = historical_data.index
+            lignes = index_hist.lignes(selected_month, selected_day, heure_selectionnee)
             
-            if len(hist_filtered) > 0:
-                # Afficher les 5 dernières années
-                hist_filtered['Année'] = hist_filtered['date'].dt.year
-                hist_filtered = hist_filtered.sort_values('Année', ascending=False).head(5)
+            if len(lignes) > 0:
+                # Afficher les 5 dernières années (l'index est trié par année croissante)
+                lignes = lignes[::-1][:5]
+                hist_filtered = pd.DataFrame({
+                    'Année': index_hist.annees[lignes],
+                    'temperature': historical_data['temperature'][lignes],
+                    'humidity': historical_data['humidity'][lignes]
+                })
                 
                 hist_display = hist_filtered[['Année', 'temperature', 'humidity']].copy()
                 hist_display.columns = ['Année', '🌡️ Température (°C)', '💧 Humidité (%)']
@@ -488,6 +268,11 @@ try:
                 
                 st.dataframe(hist_display, hide_index=True, width="stretch")
                 
+                # Normale de saison : même heure, ±3 jours, toutes les années
+                lignes_plage = index_hist.lignes_plage(selected_month, selected_day, rayon_jours=3, heure=heure_selectionnee)
+                normale = np.nanmean(historical_data['temperature'][lignes_plage])
+                st.caption(f"📐 Normale ±3 jours à {heure_selectionnee}h : {normale:.1f}°C ({len(lignes_plage)} relevés)")
+                
                 # Graphique de l'évolution avec colonnes
                 col_hist1, col_hist2 = st.columns(2)
                 
@@ -504,6 +289,7 @@ try:
             st.warning("Les données historiques ne sont pas disponibles. Réentraînez le modèle.")
     
     # Graphique de comparaison (colonne droite)
+    etapes_page.etape('rendu_graphiques')
     st.markdown("---")
     st.markdown("""
     <div style="background: linear-gradient(135deg, rgba(102,126,234,0.2) 0%, rgba(118,75,162,0.2) 100%); 
@@ -512,94 +298,8 @@ try:
     </div>
     """, unsafe_allow_html=True)
     
-    # Récupération de la météo réelle pour comparaison
-    try:
-        days_to_fetch = min(nb_jours, 16)  # API limite à 16 jours
-        url_forecast = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": 34.0209,
-            "longitude": -6.8416,
-            "daily": "temperature_2m_max",
-            "timezone": "GMT",
-            "forecast_days": days_to_fetch
-        }
-        res = requests.get(url_forecast, params=params).json()
-        
-        # DataFrame avec les données réelles
-        df_api = pd.DataFrame({
-            'date': pd.to_datetime(res['daily']['time']),
-            'Météo_Réelle': res['daily']['temperature_2m_max']
-        })
-        
-        # Fusion avec les prédictions
-        df_semaine_graph = df_semaine.copy()
-        df_semaine_graph['date'] = df_semaine_graph['date'].dt.normalize()
-        df_comparison = pd.merge(df_semaine_graph, df_api, on='date', how='inner')
-        
-        if len(df_comparison) > 0:
-            st.caption(f"📊 Comparaison sur {len(df_comparison)} jours : Votre IA (à {heure_selectionnee}h) vs Météo Officielle (Max du jour)")
-            
-            # Graphique comparatif
-            chart_comparison = df_comparison.set_index('date')[['Prediction_Temp', 'Météo_Réelle']]
-            chart_comparison.columns = [f'IA à {heure_selectionnee}h (°C)', 'Météo Réelle Max (°C)']
-            st.line_chart(chart_comparison)
-            
-            # Calcul de l'écart moyen
-            ecart = (df_comparison['Prediction_Temp'] - df_comparison['Météo_Réelle']).abs().mean()
-            
-            col_metric1, col_metric2, col_metric3 = st.columns(3)
-            
-            # Afficher le nombre total de jours sélectionnés au lieu de jours comparés
-            nb_jours_affiches = nb_jours
-            
-            with col_metric1:
-                if ecart < 2:
-                    badge_color = "#4ECDC4"
-                    badge_emoji = "✅"
-                    badge_text = "Excellent"
-                elif ecart < 4:
-                    badge_color = "#FFD93D"
-                    badge_emoji = "ℹ️"
-                    badge_text = "Bon"
-                else:
-                    badge_color = "#FF6B6B"
-                    badge_emoji = "⚠️"
-                    badge_text = "Acceptable"
-                
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, rgba(78,205,196,0.2), rgba(78,205,196,0.1)); 
-                            padding: 1rem; border-radius: 10px; text-align: center;">
-                    <h3 style="margin: 0; color: {badge_color};">{badge_emoji}</h3>
-                    <h2 style="margin: 0.5rem 0; color: {badge_color};">{ecart:.2f}°C</h2>
-                    <p style="margin: 0; opacity: 0.8;">Écart Moyen</p>
-                    <p style="margin: 0; color: {badge_color}; font-weight: 600;">{badge_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_metric2:
-                precision = 100 - (ecart / df_comparison['Météo_Réelle'].mean() * 100)
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, rgba(102,126,234,0.2), rgba(102,126,234,0.1)); 
-                            padding: 1rem; border-radius: 10px; text-align: center;">
-                    <h3 style="margin: 0; color: #667eea;">🎯</h3>
-                    <h2 style="margin: 0.5rem 0; color: #667eea;">{precision:.1f}%</h2>
-                    <p style="margin: 0; opacity: 0.8;">Précision</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_metric3:
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, rgba(255,107,107,0.2), rgba(255,107,107,0.1)); 
-                            padding: 1rem; border-radius: 10px; text-align: center;">
-                    <h3 style="margin: 0; color: #FF6B6B;">📅</h3>
-                    <h2 style="margin: 0.5rem 0; color: #FF6B6B;">{nb_jours_affiches}</h2>
-                    <p style="margin: 0; opacity: 0.8;">Jours Analysés</p>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("Pas de données de comparaison disponibles")
-    except Exception as e:
-        st.warning(f"Impossible de récupérer la météo réelle : {e}")
+    # Rempli en fin de page, quand la réponse arrive (ou à l'échéance)
+    zone_comparaison = st.container()
     
     # Graphique humidité
     st.markdown("---")
@@ -614,9 +314,154 @@ try:
     chart_humidity = df_semaine.set_index('date')[['Prediction_Humidity']]
     chart_humidity.columns = ['Humidité (%)']
     st.area_chart(chart_humidity, color='#4ECDC4')
+    
+    # Vue horaire : min/max journaliers et heatmap jour x heure (issus de la même grille)
+    st.markdown("---")
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, rgba(255,217,61,0.2) 0%, rgba(255,107,107,0.2) 100%); 
+                padding: 1.5rem; border-radius: 15px; margin: 1rem 0;">
+        <h3 style="margin: 0; color: #FFD93D;">🗓️ Vue horaire</h3>
+        <p style="margin-top: 0.5rem; opacity: 0.9;">Toutes les heures des {nb_jours} prochains jours</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col_minmax, col_heatmap = st.columns(2)
+    
+    with col_minmax:
+        st.markdown("**🌡️ Min / Max journaliers**")
+        st.line_chart(grille.min_max_journaliers(nb_jours).set_index('date'),
+                      color=['#00D9FF', '#FFD93D', '#FF6B6B'])
+    
+    with col_heatmap:
+        st.markdown("**🔥 Température par heure**")
+        df_heatmap = grille.format_long(nb_jours)
+        heatmap = alt.Chart(df_heatmap).mark_rect().encode(
+            x=alt.X('heure:O', title='Heure'),
+            y=alt.Y('yearmonthdate(date):O', title=None),
+            color=alt.Color('temperature:Q', title='°C', scale=alt.Scale(scheme='turbo')),
+            tooltip=[alt.Tooltip('yearmonthdate(date):T', title='Date'), 'heure:O',
+                     alt.Tooltip('temperature:Q', format='.1f'), alt.Tooltip('humidity:Q', format='.0f')]
+        )
+        st.altair_chart(heatmap, width="stretch")
+
+    etapes_page.fin()
+    with zone_comparaison:
+        # Météo réelle pour comparaison : attendue en dernier, jusqu'à l'échéance de la page
+        try:
+            # Réponse partagée par toutes les sessions pendant sa durée de validité (cache TTL)
+            with mesure('attente_open_meteo'):
+                res = comparaison_future.result(timeout=max(0.0, DELAI_COMPARAISON_S - (time.monotonic() - debut_page)))
+            
+            etapes_page.etape('rendu_comparaison')
+            # Prévision officielle horaire placée sur la grille du modèle (mémorisée par version)
+            precision = precision_previsions(modele_charge, res, start_date.strftime('%Y-%m-%d'))
+            officiel_temp, _ = precision.officielle.a_l_heure(int(heure_selectionnee), nb_jours)
+            df_comparison = pd.DataFrame({
+                'date': dates_semaine,
+                'Prediction_Temp': df_semaine['Prediction_Temp'],
+                'Météo_Réelle': officiel_temp,
+            }).dropna()
+            
+            if len(df_comparison) > 0:
+                st.caption(f"📊 Comparaison sur {len(df_comparison)} jours : Votre IA vs Météo Officielle, à {heure_selectionnee}h")
+                
+                # Graphique comparatif (même heure des deux côtés)
+                chart_comparison = df_comparison.set_index('date')[['Prediction_Temp', 'Météo_Réelle']]
+                chart_comparison.columns = [f'IA à {heure_selectionnee}h (°C)', f'Météo Officielle à {heure_selectionnee}h (°C)']
+                st.line_chart(chart_comparison)
+                
+                # Écart moyen sur toutes les heures des jours affichés
+                ecart = precision.globale('temperature', nb_jours)['MAE']
+                
+                col_metric1, col_metric2, col_metric3 = st.columns(3)
+                
+                # Afficher le nombre total de jours sélectionnés au lieu de jours comparés
+                nb_jours_affiches = nb_jours
+                
+                with col_metric1:
+                    if ecart < 2:
+                        badge_color = "#4ECDC4"
+                        badge_emoji = "✅"
+                        badge_text = "Excellent"
+                    elif ecart < 4:
+                        badge_color = "#FFD93D"
+                        badge_emoji = "ℹ️"
+                        badge_text = "Bon"
+                    else:
+                        badge_color = "#FF6B6B"
+                        badge_emoji = "⚠️"
+                        badge_text = "Acceptable"
+                    
+                    st.markdown(f"""
+                    <div style="background: linear-gradient(135deg, rgba(78,205,196,0.2), rgba(78,205,196,0.1)); 
+                                padding: 1rem; border-radius: 10px; text-align: center;">
+                        <h3 style="margin: 0; color: {badge_color};">{badge_emoji}</h3>
+                        <h2 style="margin: 0.5rem 0; color: {badge_color};">{ecart:.2f}°C</h2>
+                        <p style="margin: 0; opacity: 0.8;">Écart Moyen</p>
+                        <p style="margin: 0; color: {badge_color}; font-weight: 600;">{badge_text}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with col_metric2:
+                    precision_pct = 100 - (ecart / np.nanmean(precision.officielle.temperature[:nb_jours]) * 100)
+                    st.markdown(f"""
+                    <div style="background: linear-gradient(135deg, rgba(102,126,234,0.2), rgba(102,126,234,0.1)); 
+                                padding: 1rem; border-radius: 10px; text-align: center;">
+                        <h3 style="margin: 0; color: #667eea;">🎯</h3>
+                        <h2 style="margin: 0.5rem 0; color: #667eea;">{precision_pct:.1f}%</h2>
+                        <p style="margin: 0; opacity: 0.8;">Précision</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with col_metric3:
+                    st.markdown(f"""
+                    <div style="background: linear-gradient(135deg, rgba(255,107,107,0.2), rgba(255,107,107,0.1)); 
+                                padding: 1rem; border-radius: 10px; text-align: center;">
+                        <h3 style="margin: 0; color: #FF6B6B;">📅</h3>
+                        <h2 style="margin: 0.5rem 0; color: #FF6B6B;">{nb_jours_affiches}</h2>
+                        <p style="margin: 0; opacity: 0.8;">Jours Analysés</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                # Détail par échéance et par heure (toutes les heures communes aux deux prévisions)
+                with st.expander("📏 Précision horaire détaillée (MAE / RMSE / biais)"):
+                    col_echeance, col_heure_precision = st.columns(2)
+                    with col_echeance:
+                        st.markdown("**Par échéance (jours)**")
+                        st.dataframe(pd.concat({
+                            'Température (°C)': precision.par_echeance('temperature', nb_jours)[['MAE', 'RMSE', 'Biais']],
+                            'Humidité (%)': precision.par_echeance('humidity', nb_jours)[['MAE', 'RMSE', 'Biais']],
+                        }, axis=1).round(2), width="stretch")
+                    with col_heure_precision:
+                        st.markdown("**MAE température par heure (GMT)**")
+                        st.bar_chart(precision.par_heure('temperature', nb_jours)['MAE'], color='#667eea')
+            else:
+                st.warning("Pas de données de comparaison disponibles")
+        except DelaiDepasse:
+            st.info("⏳ La météo officielle tarde à répondre : la comparaison s'affichera au prochain rafraîchissement.")
+            st.button("🔄 Réessayer", key='reessayer_comparaison')
+        except Exception as e:
+            st.warning(f"Impossible de récupérer la météo réelle : {e}")
 
 except FileNotFoundError:
-    st.error(f"❌ Fichier modèle introuvable : '{model_path}'. Veuillez relancer le notebook d'entraînement.")
+    st.error(f"❌ Fichier modèle introuvable : '{model_path}'. "
+             f"Entraînez le modèle de {ville['nom']} : python entrainer_modele.py --ville {code_ville}")
 except Exception as e:
     st.error(f"Erreur lors de la prédiction : {e}")
     st.exception(e)
+finally:
+    etapes_page.fin()
+
+# --- 8. TEMPS DE CALCUL (DEBUG) ---
+enregistrer('page', (time.perf_counter() - debut_rerun) * 1000)
+if afficher_temps:
+    with zone_debug:
+        # Étapes imbriquées (features / predict dans grille...) : les totaux se recouvrent
+        df_trace = pd.DataFrame(trace_page, columns=['Étape', 'ms'])
+        df_trace = df_trace.groupby('Étape', sort=False)['ms'].agg(['count', 'sum'])
+        df_trace.columns = ['Appels', 'Total (ms)']
+        st.dataframe(df_trace.round(1), width="stretch")
+        metriques = instantane()
+        rss = "n/d" if metriques['rss_mo'] is None else f"{metriques['rss_mo']:.0f} Mo"
+        st.caption(f"🧠 RSS du processus : {rss}")
+        st.caption(" · ".join(f"{nom} {valeur}" for nom, valeur in metriques['compteurs'].items()))
@@ -8,17 +8,7 @@ import base64
 from PIL import Image
 from datetime import datetime, timedelta
 
-# --- FONCTION POUR DÉTERMINER LA SAISON ---
-def get_season(month, day):
-    """Retourne la saison et sa couleur selon le mois et le jour"""
-    if (month == 12 and day >= 21) or month in [1, 2] or (month == 3 and day < 20):
-        return "Hiver", "🔵", "#ADD8E6"  # Bleu clair
-    elif (month == 3 and day >= 20) or month in [4, 5] or (month == 6 and day < 21):
-        return "Printemps", "🌸", "#FFB6C1"  # Rose
-    elif (month == 6 and day >= 21) or month in [7, 8] or (month == 9 and day < 23):
-        return "Été", "☀️", "#FFD700"  # Jaune doré
-    else:
-        return "Automne", "🍂", "#FF8C00"  # Orange
+from saisons import colonnes_saisons
 
 # --- 1. CHARGEMENT DU LOGO ---
 try:
@@ -103,9 +93,7 @@ try:
     df_semaine['Prediction_Humidity'] = model_humidity.predict(df_semaine[features])
     
     # Ajout des saisons
-    df_semaine['Saison'], df_semaine['Icone_Saison'], df_semaine['Couleur_Saison'] = zip(*df_semaine.apply(
-        lambda row: get_season(row['mois'], row['jour']), axis=1
-    ))
+    df_semaine = df_semaine.assign(**colonnes_saisons(dates_semaine))
     
     # Noms des jours en français
     jours_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
@@ -114,7 +102,6 @@ try:
     df_affichage = df_semaine.copy()
     df_affichage['Jour'] = df_affichage['date'].dt.dayofweek.map(lambda x: jours_fr[x])
     df_affichage['Date'] = df_affichage['date'].dt.strftime('%d/%m')
-    df_affichage['Saison_Display'] = df_affichage['Icone_Saison'] + ' ' + df_affichage['Saison']
     df_affichage['Température'] = df_affichage['Prediction_Temp'].round(1).astype(str) + '°C'
     df_affichage['💧 Humidité'] = df_affichage['Prediction_Humidity'].round(0).astype(int).astype(str) + '%'
     
@@ -0,0 +1,217 @@
+# arbres_compiles.py - Inférence rapide des ensembles d'arbres (Gradient Boosting, classique ou histogrammes)
+#
+# Tous les arbres de tous les modèles sont aplatis dans des tableaux NumPy
+# contigus et évalués niveau par niveau sur toute la matrice d'entrée : une
+# itération par niveau de profondeur, chacune traitant toutes les lignes x tous
+# les arbres d'un coup. Chaque nœud est un enregistrement de 16 octets
+# (feature, seuil, gauche, droite) : un seul accès mémoire par nœud visité.
+# Les arbres sont parcourus du plus profond au moins profond : au niveau k, seuls
+# les arbres de profondeur > k (un préfixe) sont évalués. Les arbres HGB sont très
+# inégaux (médiane 12 niveaux, maximum 26) : moitié moins de paires (arbre, ligne).
+#
+# Réservé aux petits lots (SEUIL_LIGNES_COMPILE de prevision.py) : l'appel coûte
+# ~0,2 ms au lieu de ~1 ms pour scikit-learn, mais chaque niveau fait plusieurs
+# gathers NumPy sur les paires (arbre, ligne) actives. À 720 lignes, la boucle
+# Cython de scikit-learn reste plus rapide (~13 ms contre ~17 ms, ~40 ms sans le
+# tri par profondeur) ; les variantes essayées (tableaux séparés, arbres complets
+# à enfants implicites 2i+1 / 2i+2, retrait des paires arrivées à une feuille)
+# ne font pas mieux en NumPy pur.
+from functools import cached_property
+
+import numpy as np
+
+# Lignes évaluées à la fois : les tableaux de travail (arbres x lignes) restent
+# assez petits pour tenir dans le cache du processeur
+TAILLE_BLOC = 128
+
+
+def _seuil_float32(seuils):
+    """Seuils float64 -> float32 arrondis vers le bas.
+
+    Les entrées sont en float32 : pour un x float32, x <= s équivaut à
+    x <= plus grand float32 inférieur ou égal à s. Les décisions restent donc
+    identiques à celles de scikit-learn.
+    """
+    seuils32 = seuils.astype(np.float32)
+    trop_grands = seuils32.astype(np.float64) > seuils
+    seuils32[trop_grands] = np.nextafter(seuils32[trop_grands], np.float32(-np.inf))
+    return seuils32
+
+
+def _arbres_gbm(modele):
+    """(base, liste de (feature, seuil, gauche, droite, valeur, feuille, nan_gauche)) d'un GradientBoostingRegressor"""
+    if modele.init_ == 'zero':
+        base = 0.0
+    elif hasattr(modele.init_, 'constant_'):
+        base = float(np.ravel(modele.init_.constant_)[0])
+    else:
+        raise ValueError("Seuls les modèles initialisés par une constante peuvent être compilés")
+
+    arbres = []
+    for estimateur in modele.estimators_[:, 0]:
+        arbre = estimateur.tree_
+        feuille = arbre.children_left == -1
+        nan_gauche = getattr(arbre, 'missing_go_to_left', np.zeros(arbre.node_count, dtype=np.uint8))
+        arbres.append((
+            np.where(feuille, 0, arbre.feature),
+            arbre.threshold,
+            arbre.children_left,
+            arbre.children_right,
+            arbre.value[:, 0, 0] * modele.learning_rate,
+            feuille,
+            nan_gauche.astype(bool),
+        ))
+    return base, arbres
+
+
+def _arbres_hgb(modele):
+    """Même format pour un HistGradientBoostingRegressor (valeurs des feuilles déjà multipliées par le taux)"""
+    if getattr(modele, 'is_categorical_', None) is not None and modele.is_categorical_.any():
+        raise ValueError("Les modèles avec features catégorielles ne peuvent pas être compilés")
+
+    arbres = []
+    for (predicteur,) in modele._predictors:
+        noeuds = predicteur.nodes
+        feuille = noeuds['is_leaf'].astype(bool)
+        arbres.append((
+            np.where(feuille, 0, noeuds['feature_idx']),
+            noeuds['num_threshold'],
+            noeuds['left'].astype(np.int64),
+            noeuds['right'].astype(np.int64),
+            noeuds['value'],
+            feuille,
+            noeuds['missing_go_to_left'].astype(bool),
+        ))
+    return float(np.ravel(modele._baseline_prediction)[0]), arbres
+
+
+NOEUD = np.dtype([('feature', np.int32), ('seuil', np.float32), ('gauche', np.int32), ('droite', np.int32)])
+
+
+class EnsembleCompile:
+    """Plusieurs modèles (une cible chacun) aplatis en un seul ensemble d'arbres"""
+
+    def __init__(self, cibles, base, noeuds, valeur, nan_gauche, racines, debuts_cibles, profondeur):
+        self.cibles = list(cibles)
+        self.base = base  # (nb_cibles,)
+        self.noeuds = noeuds  # tableau structuré NOEUD, les feuilles bouclent sur elles-mêmes
+        self.valeur = valeur
+        self.nan_gauche = nan_gauche
+        self.racines = racines  # indice global de la racine de chaque arbre
+        self.debuts_cibles = debuts_cibles  # premier arbre de chaque cible
+        self.profondeur = profondeur
+
+    @property
+    def nb_arbres(self):
+        return len(self.racines)
+
+    def predire(self, X):
+        """Prédictions (n, nb_cibles) pour une matrice de features (n, nb_features)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        sortie = np.empty((len(X), len(self.cibles)))
+        for debut in range(0, len(X), TAILLE_BLOC):
+            bloc = X[debut:debut + TAILLE_BLOC]
+            feuilles = np.take(self.valeur, self._descendre(bloc))
+            sortie[debut:debut + len(bloc)] = np.add.reduceat(feuilles, self.debuts_cibles, axis=0).T
+        return sortie + self.base
+
+    @cached_property
+    def _ordre_profondeur(self):
+        """(racines du plus profond au moins profond, rang de chaque arbre dans cet ordre, arbres actifs par niveau)"""
+        profondeurs = _profondeurs_arbres(self.noeuds, self.racines)
+        ordre = np.argsort(-profondeurs, kind='stable')
+        rang = np.empty_like(ordre)
+        rang[ordre] = np.arange(len(ordre))
+        actifs = [int((profondeurs > k).sum()) for k in range(self.profondeur)]
+        return self.racines[ordre], rang, actifs
+
+    def _descendre(self, X):
+        """Indice de la feuille atteinte pour chaque (arbre, ligne)"""
+        racines, rang, actifs = self._ordre_profondeur
+        n, nb_features = X.shape
+        valeurs_x = X.ravel()
+        decalages_lignes = (np.arange(n, dtype=np.int32) * nb_features)[None, :]
+        noeuds = np.repeat(racines[:, None], n, axis=1)
+        avec_nan = np.isnan(valeurs_x).any()
+        for nb_actifs in actifs:
+            # Les arbres moins profonds que ce niveau sont déjà sur leur feuille
+            actuels = noeuds[:nb_actifs]
+            courants = np.take(self.noeuds, actuels)
+            x = np.take(valeurs_x, courants['feature'] + decalages_lignes)
+            droite = x > courants['seuil']
+            if avec_nan:
+                # x > seuil est faux pour NaN : on suit la branche apprise pour les valeurs manquantes
+                droite |= np.isnan(x) & ~np.take(self.nan_gauche, actuels)
+            noeuds[:nb_actifs] = np.where(droite, courants['droite'], courants['gauche'])
+        return noeuds[rang]
+
+    def predire_cible(self, X, cible):
+        """Prédiction d'une seule cible (ex. 'temperature')"""
+        return self.predire(X)[:, self.cibles.index(cible)]
+
+
+def compiler_ensemble(modeles):
+    """Compile {nom_cible: GradientBoostingRegressor ou HistGradientBoostingRegressor} en un EnsembleCompile"""
+    bases, tableaux, racines, debuts_cibles = [], [], [], []
+    decalage, profondeur = 0, 0
+    for modele in modeles.values():
+        base, arbres = _arbres_hgb(modele) if hasattr(modele, '_predictors') else _arbres_gbm(modele)
+        bases.append(base)
+        debuts_cibles.append(len(racines))
+        for feature, seuil, gauche, droite, valeur, feuille, nan_gauche in arbres:
+            n = len(feature)
+            indices = np.arange(n) + decalage
+            # Les feuilles bouclent sur elles-mêmes : descendre plus loin ne change rien
+            gauche = np.where(feuille, indices, gauche + decalage)
+            droite = np.where(feuille, indices, droite + decalage)
+            tableaux.append((feature, seuil, gauche, droite, valeur, nan_gauche))
+            racines.append(decalage)
+            profondeur = max(profondeur, _profondeur(gauche - decalage, droite - decalage, feuille))
+            decalage += n
+
+    colonnes = list(zip(*tableaux))
+    noeuds = np.empty(decalage, dtype=NOEUD)
+    noeuds['feature'] = np.concatenate(colonnes[0])
+    noeuds['seuil'] = _seuil_float32(np.concatenate(colonnes[1]))
+    noeuds['gauche'] = np.concatenate(colonnes[2])
+    noeuds['droite'] = np.concatenate(colonnes[3])
+    return EnsembleCompile(
+        cibles=modeles.keys(),
+        base=np.array(bases),
+        noeuds=noeuds,
+        valeur=np.concatenate(colonnes[4]),
+        nan_gauche=np.concatenate(colonnes[5]),
+        racines=np.array(racines, dtype=np.int32),
+        debuts_cibles=np.array(debuts_cibles, dtype=np.int64),
+        profondeur=profondeur,
+    )
+
+
+def _profondeurs_arbres(noeuds, racines):
+    """Profondeur de chaque arbre de l'ensemble (les feuilles bouclent sur elles-mêmes)"""
+    profondeurs = np.zeros(len(racines), dtype=np.int64)
+    niveau = racines.astype(np.int64)
+    arbres = np.arange(len(racines))
+    profondeur = 0
+    while len(niveau):
+        internes = noeuds['gauche'][niveau] != niveau
+        niveau, arbres = niveau[internes], arbres[internes]
+        if len(niveau) == 0:
+            break
+        profondeur += 1
+        profondeurs[arbres] = profondeur
+        niveau = np.concatenate((noeuds['gauche'][niveau], noeuds['droite'][niveau]))
+        arbres = np.concatenate((arbres, arbres))
+    return profondeurs
+
+
+def _profondeur(gauche, droite, feuille):
+    """Profondeur maximale d'un arbre (indices locaux, racine = 0)"""
+    niveau = np.array([0])
+    profondeur = 0
+    while True:
+        internes = niveau[~feuille[niveau]]
+        if len(internes) == 0:
+            return profondeur
+        niveau = np.concatenate((gauche[internes], droite[internes]))
+        profondeur += 1
@@ -0,0 +1,465 @@
+# artefact_compact.py - Format compact des modèles : entête JSON + arbres en tableaux binaires
+#
+# Un artefact joblib contient deux modèles scikit-learn complets (arbres float64,
+# des milliers d'objets à dépickler, import de scikit-learn). Le format compact
+# (<modèle>.arbres, à côté du .pkl) ne garde que ce que l'inférence utilise :
+#   MAGIQUE (8 octets) | longueur de l'entête (uint32) | entête JSON | sections
+# L'entête décrit le modèle (features, cibles, fenêtre d'entraînement, métriques,
+# lien d'historique, versions) et l'emplacement de la section de chaque cible :
+# une cible se charge seule sans lire les autres. Chaque section est compressée
+# (zlib) et contient, pour les nœuds internes, feature (uint8/16), indice du seuil
+# float32 dans une table de seuils distincts, décalage des enfants (uint16/32) et
+# branche des valeurs manquantes (bits) ; pour les feuilles, la valeur quantifiée
+# sur 16 bits (float32 si l'erreur bornée dépasse TOLERANCE_FEUILLES).
+# Le chargement produit directement un EnsembleCompile, sans scikit-learn.
+# L'ensemble compilé n'est rapide que sur les petits lots (arbres_compiles.py) :
+# quand le .pkl source est encore à côté, les gros lots (grille d'un modèle sans
+# moyennes mobiles, un seul predict) passent par ses modèles scikit-learn,
+# dépicklés au premier gros lot seulement (ModeleDiffere) ; sans lui, l'ensemble
+# compilé sert pour tous les lots.
+#
+# Usage (conversion d'un ancien artefact, avec comparaison taille / temps de chargement) :
+#   python artefact_compact.py [cerveau_meteo_long_terme.pkl] [--sortie modele.arbres]
+import argparse
+import hashlib
+import json
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from arbres_compiles import NOEUD, EnsembleCompile, _profondeur
+
+MAGIQUE = b'METEOARB'
+FORMAT_COMPACT = 1
+EXTENSION = '.arbres'
+NIVEAU_COMPRESSION = 9
+
+# Erreur maximale (unité de la cible : °C, %) tolérée sur une prédiction à cause
+# de la quantification des feuilles, bornée par nb_arbres x demi-pas
+TOLERANCE_FEUILLES = 0.01
+
+# Cibles dont la prévision a besoin (predire_temperature_humidite) : chargées ensemble pour servir
+CIBLES_SERVIES = ('temperature', 'humidity')
+
+# Gros lot du rapport de conversion : 30 jours x 24 heures (requête de l'API, grille)
+TAILLE_GROS_LOT = 720
+
+
+def chemin_compact(chemin_modele):
+    """Emplacement de l'artefact compact associé à un artefact joblib (même dossier, même nom)"""
+    return os.path.splitext(chemin_modele)[0] + EXTENSION
+
+
+def est_artefact_compact(chemin):
+    """True si le fichier commence par la signature du format compact"""
+    try:
+        with open(chemin, 'rb') as f:
+            return f.read(len(MAGIQUE)) == MAGIQUE
+    except OSError:
+        return False
+
+
+def _entier_minimal(maximum):
+    return np.uint8 if maximum < 1 << 8 else np.uint16 if maximum < 1 << 16 else np.uint32
+
+
+def _encoder_cible(ensemble, i):
+    """(description pour l'entête, octets non compressés) des arbres de la i-ème cible"""
+    debut = ensemble.debuts_cibles[i]
+    fin = ensemble.debuts_cibles[i + 1] if i + 1 < len(ensemble.debuts_cibles) else ensemble.nb_arbres
+    premier = int(ensemble.racines[debut])
+    dernier = int(ensemble.racines[fin]) if fin < ensemble.nb_arbres else len(ensemble.noeuds)
+    racines = ensemble.racines[debut:fin] - premier
+    tailles = np.diff(np.append(racines, dernier - premier)).astype(np.uint32)
+
+    noeuds = ensemble.noeuds[premier:dernier]
+    indices = np.arange(len(noeuds))
+    feuille = noeuds['gauche'] - premier == indices  # les feuilles bouclent sur elles-mêmes
+    internes = ~feuille
+    profondeur = 0
+    for racine, taille in zip(racines, tailles):
+        local = slice(racine, racine + taille)
+        profondeur = max(profondeur, _profondeur(noeuds['gauche'][local] - premier - racine,
+                                                 noeuds['droite'][local] - premier - racine, feuille[local]))
+
+    feature = noeuds['feature'][internes]
+    seuils, indices_seuils = np.unique(noeuds['seuil'][internes], return_inverse=True)
+    gauche = noeuds['gauche'][internes] - premier - indices[internes]
+    droite = noeuds['droite'][internes] - premier - indices[internes]
+    type_enfants = _entier_minimal(int(max(gauche.max(initial=0), droite.max(initial=0))))
+    type_feature = _entier_minimal(int(feature.max(initial=0)))
+
+    valeurs = ensemble.valeur[premier:dernier][feuille]
+    echelle = float(np.abs(valeurs).max(initial=0)) / np.iinfo(np.int16).max
+    if 0 < echelle and len(tailles) * echelle / 2 <= TOLERANCE_FEUILLES:
+        encodage_feuilles = {'type': 'int16', 'echelle': echelle, 'erreur_max': len(tailles) * echelle / 2}
+        valeurs = np.round(valeurs / echelle).astype(np.int16)
+    else:
+        encodage_feuilles = {'type': 'float32'}
+        valeurs = valeurs.astype(np.float32)
+
+    if len(seuils) < 1 << 16:
+        parties_seuils = [seuils.astype(np.float32), indices_seuils.astype(np.uint16)]
+    else:
+        seuils = np.array([], dtype=np.float32)
+        parties_seuils = [noeuds['seuil'][internes]]
+    parties = [
+        tailles,
+        np.packbits(feuille),
+        np.packbits(ensemble.nan_gauche[premier:dernier][internes]),
+        feature.astype(type_feature),
+        *parties_seuils,
+        gauche.astype(type_enfants),
+        droite.astype(type_enfants),
+        valeurs,
+    ]
+    description = {
+        'base': float(ensemble.base[i]),
+        'nb_arbres': len(tailles),
+        'nb_noeuds': len(noeuds),
+        'nb_internes': int(internes.sum()),
+        'nb_seuils': len(seuils),
+        'profondeur': profondeur,
+        'type_feature': np.dtype(type_feature).name,
+        'type_enfants': np.dtype(type_enfants).name,
+        'feuilles': encodage_feuilles,
+    }
+    return description, b''.join(np.ascontiguousarray(p).tobytes() for p in parties)
+
+
+def _fenetre_entrainement(donnees, chemin):
+    """{'debut', 'fin', 'nb_lignes'} d'après le manifeste de l'historique lié, None si inconnu"""
+    lien = donnees.get('historique')
+    if lien is None:
+        return None
+    dossier = os.path.join(os.path.dirname(os.path.abspath(chemin)), lien['chemin'])
+    try:
+        with open(os.path.join(dossier, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {cle: manifest.get(cle) for cle in ('debut', 'fin', 'nb_lignes')}
+
+
+def ecrire_compact(donnees, chemin, source=None):
+    """Écrit l'artefact compact d'un contenu d'artefact joblib (avec 'ensemble_compile'), de façon atomique"""
+    ensemble = donnees['ensemble_compile']
+    entete = {
+        'format': FORMAT_COMPACT,
+        'features': list(donnees['features']),
+        'ville': donnees.get('ville'),
+        'historique': donnees.get('historique'),
+        'fenetre_entrainement': _fenetre_entrainement(donnees, chemin),
+        'entrainement': donnees.get('entrainement'),
+        'metriques': donnees.get('metriques'),
+        'source': source,
+        'cree_le': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'cibles': {},
+    }
+    sections, position = [], 0
+    for i, cible in enumerate(ensemble.cibles):
+        description, brut = _encoder_cible(ensemble, i)
+        compresse = zlib.compress(brut, NIVEAU_COMPRESSION)
+        entete['cibles'][cible] = dict(description, debut=position, taille=len(compresse), taille_brute=len(brut))
+        sections.append(compresse)
+        position += len(compresse)
+
+    contenu_entete = json.dumps(entete, ensure_ascii=False).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    temporaire = f"{chemin}.tmp-{os.getpid()}"
+    with open(temporaire, 'wb') as f:
+        f.write(MAGIQUE + struct.pack('<I', len(contenu_entete)) + contenu_entete)
+        for section in sections:
+            f.write(section)
+    os.replace(temporaire, chemin)
+    return chemin
+
+
+def _lire_entete(f):
+    """(entête, position du début des sections) d'un fichier ouvert en binaire"""
+    if f.read(len(MAGIQUE)) != MAGIQUE:
+        raise ValueError("Ce fichier n'est pas un artefact compact")
+    (longueur,) = struct.unpack('<I', f.read(4))
+    entete = json.loads(f.read(longueur).decode())
+    if entete['format'] > FORMAT_COMPACT:
+        raise ValueError(f"Artefact compact au format {entete['format']} : mettez l'application à jour")
+    return entete, len(MAGIQUE) + 4 + longueur
+
+
+def lire_entete(chemin):
+    """Métadonnées de l'artefact compact (features, cibles, fenêtre, métriques...) sans lire les arbres"""
+    with open(chemin, 'rb') as f:
+        return _lire_entete(f)[0]
+
+
+def _decoder_cible(description, brut, decalage):
+    """(noeuds, valeur, nan_gauche, racines) d'une cible, indices globaux à partir de `decalage`"""
+    n, nb_internes = description['nb_noeuds'], description['nb_internes']
+    position = 0
+
+    def lire(dtype, nombre):
+        nonlocal position
+        tableau = np.frombuffer(brut, dtype=dtype, count=nombre, offset=position)
+        position += tableau.nbytes
+        return tableau
+
+    tailles = lire(np.uint32, description['nb_arbres'])
+    feuille = np.unpackbits(lire(np.uint8, (n + 7) // 8), count=n).astype(bool)
+    nan_internes = np.unpackbits(lire(np.uint8, (nb_internes + 7) // 8), count=nb_internes).astype(bool)
+    feature = lire(description['type_feature'], nb_internes)
+    if description['nb_seuils']:
+        table_seuils = lire(np.float32, description['nb_seuils'])
+        seuils = table_seuils[lire(np.uint16, nb_internes)]
+    else:
+        seuils = lire(np.float32, nb_internes)
+    gauche = lire(description['type_enfants'], nb_internes)
+    droite = lire(description['type_enfants'], nb_internes)
+    encodage = description['feuilles']
+    if encodage['type'] == 'int16':
+        valeurs_feuilles = lire(np.int16, n - nb_internes) * encodage['echelle']
+    else:
+        valeurs_feuilles = lire(np.float32, n - nb_internes)
+
+    internes = ~feuille
+    indices = np.arange(n, dtype=np.int32) + decalage
+    noeuds = np.zeros(n, dtype=NOEUD)
+    noeuds['feature'][internes] = feature
+    noeuds['seuil'][internes] = seuils
+    noeuds['gauche'] = indices
+    noeuds['droite'] = indices
+    noeuds['gauche'][internes] += gauche.astype(np.int32)
+    noeuds['droite'][internes] += droite.astype(np.int32)
+    valeur = np.zeros(n)
+    valeur[feuille] = valeurs_feuilles
+    nan_gauche = np.zeros(n, dtype=bool)
+    nan_gauche[internes] = nan_internes
+    racines = (np.concatenate(([0], np.cumsum(tailles[:-1], dtype=np.int64))) + decalage).astype(np.int32)
+    return noeuds, valeur, nan_gauche, racines
+
+
+def charger_ensemble(chemin, cibles=None):
+    """(EnsembleCompile des `cibles` demandées, toutes par défaut ; entête) : seules leurs sections sont lues"""
+    with open(chemin, 'rb') as f:
+        entete, debut_sections = _lire_entete(f)
+        cibles = list(entete['cibles']) if cibles is None else list(cibles)
+        inconnues = [c for c in cibles if c not in entete['cibles']]
+        if inconnues:
+            raise ValueError(f"Cibles absentes de l'artefact : {', '.join(inconnues)}")
+
+        parties, debuts_cibles, decalage = [], [], 0
+        for cible in cibles:
+            description = entete['cibles'][cible]
+            f.seek(debut_sections + description['debut'])
+            brut = zlib.decompress(f.read(description['taille']))
+            debuts_cibles.append(sum(len(p[3]) for p in parties))
+            parties.append(_decoder_cible(description, brut, decalage))
+            decalage += description['nb_noeuds']
+
+    noeuds, valeur, nan_gauche, racines = (np.concatenate(colonne) for colonne in zip(*parties))
+    ensemble = EnsembleCompile(
+        cibles=cibles,
+        base=np.array([entete['cibles'][c]['base'] for c in cibles]),
+        noeuds=noeuds,
+        valeur=valeur,
+        nan_gauche=nan_gauche,
+        racines=racines,
+        debuts_cibles=np.array(debuts_cibles, dtype=np.int64),
+        profondeur=max(entete['cibles'][c]['profondeur'] for c in cibles),
+    )
+    return ensemble, entete
+
+
+class SourceJoblib:
+    """Artefact joblib d'origine d'un compact, dépicklé une seule fois, au premier besoin"""
+
+    def __init__(self, chemin, empreinte):
+        self.chemin = chemin
+        self.empreinte = empreinte
+        self._verrou = threading.Lock()
+        self._donnees = None
+
+    def modele(self, cle):
+        """Modèle scikit-learn `cle` ('model_temp'...), None si le .pkl a disparu ou a changé depuis la conversion"""
+        with self._verrou:
+            if self._donnees is None:
+                self._donnees = {}
+                try:
+                    if _empreinte(self.chemin) == self.empreinte:
+                        import joblib
+
+                        self._donnees = joblib.load(self.chemin)
+                except OSError:
+                    pass
+            return self._donnees.get(cle)
+
+
+class ModeleDiffere:
+    """Modèle scikit-learn d'une cible, chargé depuis le .pkl source au premier predict"""
+
+    def __init__(self, source, cle, ensemble, cible):
+        self.source = source
+        self.cle = cle
+        self.ensemble = ensemble
+        self.cible = cible
+
+    def predict(self, X):
+        modele = self.source.modele(self.cle)
+        if modele is None:
+            return self.ensemble.predire_cible(X, self.cible)
+        return modele.predict(X)
+
+
+def _modeles_scikit_learn(chemin, entete, ensemble):
+    """{'model_temp', 'model_humidity'} : ModeleDiffere si le .pkl source est à côté, sinon None"""
+    source = entete.get('source')
+    chemin_source = source and os.path.join(os.path.dirname(os.path.abspath(chemin)), source['fichier'])
+    if not chemin_source or not os.path.exists(chemin_source):
+        return {'model_temp': None, 'model_humidity': None}
+    joblib_source = SourceJoblib(chemin_source, source['empreinte'])
+    return {
+        'model_temp': ModeleDiffere(joblib_source, 'model_temp', ensemble, 'temperature'),
+        'model_humidity': ModeleDiffere(joblib_source, 'model_humidity', ensemble, 'humidity'),
+    }
+
+
+def charger_donnees(chemin, cibles=CIBLES_SERVIES):
+    """Contenu équivalent à un artefact joblib ; les modèles scikit-learn sont différés (None sans le .pkl).
+
+    Sert la prévision, qui prédit toujours les deux cibles : une seule cible se charge avec charger_ensemble.
+    """
+    manquantes = [c for c in CIBLES_SERVIES if c not in cibles]
+    if manquantes:
+        raise ValueError(f"La prévision a besoin des cibles {', '.join(manquantes)} : "
+                         f"charger_ensemble(chemin, cibles) pour un chargement partiel")
+    ensemble, entete = charger_ensemble(chemin, cibles)
+    return {
+        **_modeles_scikit_learn(chemin, entete, ensemble),
+        'features': entete['features'],
+        'ensemble_compile': ensemble,
+        'historique': entete['historique'],
+        'ville': entete['ville'],
+        'entete': entete,
+    }
+
+
+def _empreinte(chemin):
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloc)
+    return h.hexdigest()[:12]
+
+
+def convertir(chemin_source, chemin_sortie=None):
+    """Artefact joblib -> artefact compact ; retourne le chemin écrit"""
+    import joblib
+
+    from arbres_compiles import compiler_ensemble
+
+    donnees = joblib.load(chemin_source)
+    if donnees.get('ensemble_compile') is None:
+        donnees['ensemble_compile'] = compiler_ensemble({
+            'temperature': donnees['model_temp'],
+            'humidity': donnees['model_humidity'],
+        })
+    source = {'fichier': os.path.basename(chemin_source), 'empreinte': _empreinte(chemin_source)}
+    return ecrire_compact(donnees, chemin_sortie or chemin_compact(chemin_source), source)
+
+
+def _temps_chargement_a_froid(code):
+    """Durée (s) de `code` dans un interpréteur neuf (imports compris)"""
+    mesure = f"import time\ndebut = time.perf_counter()\n{code}\nprint(time.perf_counter() - debut)"
+    sortie = subprocess.run([sys.executable, '-c', mesure], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(sortie.stdout.strip().splitlines()[-1])
+
+
+def _meilleur_temps(fonction, repetitions=5):
+    """Meilleure durée (s) de `fonction` sur quelques répétitions"""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees)
+
+
+def comparer(chemin_source, chemin_compact):
+    """Tailles, temps de chargement (à froid et à chaud) et écart des prédictions des deux formats"""
+    import joblib
+
+    from construction_features import construire_features, contexte_recent
+    from prevision import predire_temperature_humidite
+
+    debut = time.perf_counter()
+    donnees = joblib.load(chemin_source)
+    chaud_joblib = time.perf_counter() - debut
+    debut = time.perf_counter()
+    compact = charger_donnees(chemin_compact)
+    chaud_compact = time.perf_counter() - debut
+    debut = time.perf_counter()
+    charger_ensemble(chemin_compact, ['temperature'])
+    chaud_une_cible = time.perf_counter() - debut
+
+    dates = np.arange('2024-01-01T00', '2025-01-01T00', dtype='datetime64[h]')
+    X = construire_features(dates, compact['features'], contexte_recent(None))
+    reference = np.column_stack(predire_temperature_humidite(donnees['model_temp'], donnees['model_humidity'], X))
+    ecart = np.abs(compact['ensemble_compile'].predire(X) - reference).max(axis=0)
+
+    # Un gros lot servi depuis le compact : scikit-learn (.pkl à côté) ou ensemble compilé seul
+    gros_lot = X[:TAILLE_GROS_LOT]
+    predire_temperature_humidite(compact['model_temp'], compact['model_humidity'], gros_lot,
+                                 compact['ensemble_compile'])  # dépickle le .pkl source une fois
+    gros_lot_sklearn = _meilleur_temps(lambda: predire_temperature_humidite(
+        compact['model_temp'], compact['model_humidity'], gros_lot, compact['ensemble_compile']))
+    gros_lot_compile = _meilleur_temps(lambda: compact['ensemble_compile'].predire(gros_lot))
+
+    return {
+        'taille_joblib': os.path.getsize(chemin_source),
+        'taille_compact': os.path.getsize(chemin_compact),
+        'froid_joblib_s': _temps_chargement_a_froid(f"import joblib\njoblib.load({os.path.abspath(chemin_source)!r})"),
+        'froid_compact_s': _temps_chargement_a_froid(
+            f"from artefact_compact import charger_donnees\ncharger_donnees({os.path.abspath(chemin_compact)!r})"),
+        'chaud_joblib_s': chaud_joblib,
+        'chaud_compact_s': chaud_compact,
+        'chaud_une_cible_s': chaud_une_cible,
+        'gros_lot_sklearn_s': gros_lot_sklearn,
+        'gros_lot_compile_s': gros_lot_compile,
+        'ecart_max': dict(zip(compact['ensemble_compile'].cibles, ecart.tolist())),
+        'entete': compact['entete'],
+    }
+
+
+if __name__ == '__main__':
+    from registre_modele import CHEMIN_MODELE
+
+    parser = argparse.ArgumentParser(description="Convertit un artefact joblib au format compact")
+    parser.add_argument('modele', nargs='?', default=CHEMIN_MODELE)
+    parser.add_argument('--sortie', help="Fichier compact (par défaut <modèle>.arbres)")
+    args = parser.parse_args()
+
+    sortie = convertir(args.modele, args.sortie)
+    rapport = comparer(args.modele, sortie)
+    print(f"✅ Artefact compact écrit : {sortie}")
+    print(f"📦 Taille : {rapport['taille_joblib'] / 1e6:.2f} Mo -> {rapport['taille_compact'] / 1e3:.1f} Ko "
+          f"(÷{rapport['taille_joblib'] / rapport['taille_compact']:.0f})")
+    for cible, description in rapport['entete']['cibles'].items():
+        print(f"   {cible:12s} {description['nb_arbres']:5d} arbres {description['nb_noeuds']:7d} nœuds "
+              f"{description['taille'] / 1e3:8.1f} Ko, feuilles {description['feuilles']['type']}")
+    print("⏱️ Chargement :")
+    print(f"   à froid (interpréteur neuf) {rapport['froid_joblib_s'] * 1000:8.0f} ms -> "
+          f"{rapport['froid_compact_s'] * 1000:6.0f} ms")
+    print(f"   à chaud                     {rapport['chaud_joblib_s'] * 1000:8.1f} ms -> "
+          f"{rapport['chaud_compact_s'] * 1000:6.1f} ms (température seule : {rapport['chaud_une_cible_s'] * 1000:.1f} ms)")
+    print(f"🧮 Prédiction d'un lot de {TAILLE_GROS_LOT} lignes servi depuis le compact : "
+          f"{rapport['gros_lot_sklearn_s'] * 1000:.1f} ms avec scikit-learn (.pkl à côté), "
+          f"{rapport['gros_lot_compile_s'] * 1000:.1f} ms avec l'ensemble compilé seul")
+    print("🎯 Écart maximal avec scikit-learn sur un an de features horaires : "
+          + ', '.join(f"{cible} {ecart:.4f}" for cible, ecart in rapport['ecart_max'].items()))
@@ -0,0 +1,110 @@
+# benchmarks/bench_api.py - Débit et latence de l'API de prévisions (api_meteo.py)
+#
+# Démarre le serveur dans un thread sur un port libre, avec des modèles
+# synthétiques écrits dans un dossier temporaire (ou un artefact existant),
+# puis envoie des requêtes depuis plusieurs clients keep-alive concurrents.
+#
+# Usage :
+#   python benchmarks/bench_api.py --clients 8 --requetes 200
+#   python benchmarks/bench_api.py --modele cerveau_meteo_long_terme.pkl --lot 50
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_arbres import modeles_synthetiques  # noqa: E402
+
+from arbres_compiles import compiler_ensemble  # noqa: E402
+from registre_modele import sauvegarder_modele  # noqa: E402
+from villes import VILLE_DEFAUT, chemin_modele  # noqa: E402
+
+REQUETES_TYPES = [
+    ('GET', '/prevision?ville=rabat&jours=1&heures=14', None),
+    ('GET', '/prevision?ville=rabat&jours=7', None),
+    ('GET', '/prevision?ville=rabat&jours=30&heures=8,14,20', None),
+]
+
+
+def client(hote, port, nb_requetes, requetes, durees, graine):
+    """Un client keep-alive : `nb_requetes` requêtes tirées au hasard, durées (ms) ajoutées à `durees`"""
+    rng = np.random.default_rng(graine)
+    connexion = http.client.HTTPConnection(hote, port)
+    for _ in range(nb_requetes):
+        methode, chemin, corps = requetes[rng.integers(len(requetes))]
+        debut = time.perf_counter()
+        connexion.request(methode, chemin, body=corps, headers={'Content-Type': 'application/json'})
+        reponse = connexion.getresponse()
+        reponse.read()
+        durees.append((time.perf_counter() - debut) * 1000)
+        assert reponse.status == 200, reponse.status
+    connexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge l'API de prévisions avec des clients concurrents")
+    parser.add_argument('--modele', help="Artefact joblib à servir (par défaut : modèles synthétiques)")
+    parser.add_argument('--arbres', type=int, default=300)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requetes', type=int, default=200, help="Requêtes par client")
+    parser.add_argument('--lot', type=int, default=0, help="Ajoute des POST /previsions de N requêtes")
+    args = parser.parse_args()
+
+    modele = os.path.abspath(args.modele) if args.modele else None
+    dossier = tempfile.mkdtemp()
+    os.chdir(dossier)  # modeles/<ville>/ relatif au dossier courant
+    try:
+        os.makedirs(os.path.dirname(chemin_modele(VILLE_DEFAUT)))
+        if modele:
+            shutil.copy(modele, chemin_modele(VILLE_DEFAUT))
+        else:
+            print(f"🧠 Entraînement de 2 modèles synthétiques ({args.arbres} arbres)...")
+            modeles, features = modeles_synthetiques(8000, args.arbres, 6)
+            sauvegarder_modele({
+                'model_temp': modeles['temperature'],
+                'model_humidity': modeles['humidity'],
+                'features': features,
+                'ensemble_compile': compiler_ensemble(modeles),
+            }, chemin_modele(VILLE_DEFAUT))
+
+        from api_meteo import creer_serveur
+
+        serveur = creer_serveur('127.0.0.1', 0)
+        threading.Thread(target=serveur.serve_forever, daemon=True).start()
+        hote, port = serveur.server_address
+
+        requetes = list(REQUETES_TYPES)
+        if args.lot:
+            lot = [{'ville': 'rabat', 'jours': 1 + i % 7, 'heures': [i % 24]} for i in range(args.lot)]
+            requetes.append(('POST', '/previsions', json.dumps({'requetes': lot})))
+
+        client(hote, port, 3 * len(requetes), requetes, [], 0)  # chargement du modèle, compilation
+        durees = []
+        clients = [threading.Thread(target=client, args=(hote, port, args.requetes, requetes, durees, i))
+                   for i in range(args.clients)]
+        debut = time.perf_counter()
+        for c in clients:
+            c.start()
+        for c in clients:
+            c.join()
+        duree = time.perf_counter() - debut
+        serveur.shutdown()
+        serveur.server_close()
+
+        print(f"📊 {len(durees)} requêtes, {args.clients} clients : {len(durees) / duree:.0f} req/s | "
+              f"p50 {np.percentile(durees, 50):.1f} ms | p99 {np.percentile(durees, 99):.1f} ms")
+    finally:
+        os.chdir('/')
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
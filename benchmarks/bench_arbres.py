@@ -0,0 +1,106 @@
+# benchmarks/bench_arbres.py - Latence : scikit-learn vs arbres compilés
+#
+# La parité est vérifiée par tests/test_arbres_compiles.py ; l'écart est affiché ici
+# pour les modèles réels (--modele). Le moteur compilé n'est utilisé que jusqu'à
+# SEUIL_LIGNES_COMPILE lignes (prevision.py) : au-delà, scikit-learn est plus rapide.
+#
+# Usage :
+#   python benchmarks/bench_arbres.py                     # modèles synthétiques (300 arbres, profondeur 8)
+#   python benchmarks/bench_arbres.py --modele cerveau_meteo_long_terme.pkl
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbres_compiles import compiler_ensemble  # noqa: E402
+from construction_features import FEATURES_AVANCEES, construire_features  # noqa: E402
+from prevision import SEUIL_LIGNES_COMPILE, dates_grille, predire  # noqa: E402
+
+
+def modeles_synthetiques(nb_lignes, n_estimators, max_depth):
+    """Deux GradientBoostingRegressor entraînés sur une saisonnalité synthétique"""
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    rng = np.random.default_rng(0)
+    dates = np.datetime64('2020-01-01T00', 's') + np.arange(nb_lignes) * np.timedelta64(3600, 's')
+    contexte = {
+        'cloud_cover_filled': rng.uniform(0, 100, nb_lignes),
+        'temp_rolling_24h': rng.normal(19, 4, nb_lignes),
+        'temp_rolling_7d': rng.normal(19, 3, nb_lignes),
+        'humidity_rolling_24h': rng.normal(72, 8, nb_lignes),
+    }
+    X = construire_features(dates, FEATURES_AVANCEES, contexte)
+    jour = X[:, FEATURES_AVANCEES.index('jour_annee')]
+    heure = X[:, FEATURES_AVANCEES.index('heure')]
+    temperature = 18 + 6 * np.sin(2 * np.pi * (jour - 100) / 365.25) + 4 * np.sin(2 * np.pi * (heure - 9) / 24)
+    temperature += rng.normal(0, 1, nb_lignes)
+    humidity = 70 - 2 * (temperature - 18) + rng.normal(0, 3, nb_lignes)
+
+    params = dict(n_estimators=n_estimators, max_depth=max_depth, learning_rate=0.08, subsample=0.9, random_state=42)
+    return {
+        'temperature': GradientBoostingRegressor(**params).fit(X, temperature),
+        'humidity': GradientBoostingRegressor(**params).fit(X, humidity),
+    }, FEATURES_AVANCEES
+
+
+def chronometrer(fonction, repetitions):
+    """Médiane des durées (ms) de `repetitions` appels"""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return float(np.median(durees))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modele', help="Artefact joblib (model_temp / model_humidity / features)")
+    parser.add_argument('--lignes-entrainement', type=int, default=8000)
+    parser.add_argument('--arbres', type=int, default=300)
+    parser.add_argument('--profondeur', type=int, default=8)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.modele:
+        import joblib
+
+        donnees = joblib.load(args.modele)
+        modeles = {'temperature': donnees['model_temp'], 'humidity': donnees['model_humidity']}
+        features = donnees['features']
+    else:
+        print(f"🧠 Entraînement de 2 modèles synthétiques ({args.arbres} arbres, profondeur {args.profondeur})...")
+        modeles, features = modeles_synthetiques(args.lignes_entrainement, args.arbres, args.profondeur)
+
+    debut = time.perf_counter()
+    ensemble = compiler_ensemble(modeles)
+    print(f"⚙️ Compilation : {ensemble.nb_arbres} arbres, {len(ensemble.noeuds)} nœuds, "
+          f"profondeur {ensemble.profondeur} en {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+    contexte = {'cloud_cover_filled': 40.0, 'temp_rolling_24h': 21.0, 'temp_rolling_7d': 20.0,
+                'humidity_rolling_24h': 70.0}
+    _, dates_30_jours = dates_grille('2026-01-01', 30)
+    cas = (
+        ("1 ligne (une heure, ex. requête ponctuelle)", dates_30_jours[14:15]),
+        ("30 lignes (30 jours à une heure)", dates_30_jours[14::24]),
+        ("720 lignes (30 jours x 24 h)", dates_30_jours),
+    )
+    for description, dates in cas:
+        X = construire_features(dates, features, contexte)
+
+        reference = np.column_stack([predire(m, X) for m in modeles.values()])
+        ecart = np.abs(ensemble.predire(X) - reference).max()
+
+        t_sklearn = chronometrer(lambda: [predire(m, X) for m in modeles.values()], args.repetitions)
+        t_compile = chronometrer(lambda: ensemble.predire(X), args.repetitions)
+        moteur = 'compilé' if len(X) <= SEUIL_LIGNES_COMPILE else 'scikit-learn'
+        print(f"📊 {description} : scikit-learn {t_sklearn:.2f} ms | compilé {t_compile:.2f} ms "
+              f"| x{t_sklearn / t_compile:.1f} | écart max {ecart:.1e} | utilisé : {moteur}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_demarrage.py - Démarrage à froid de l'application : imports et premier rendu
+#
+# Prépare un dossier de travail (modèle synthétique, grille précalculée, réponse
+# Open-Meteo en cache depuis benchmarks/fixtures/), puis lance un interpréteur neuf
+# (python -X importtime) qui importe les modules de app_meteo.py et exécute la page
+# deux fois avec streamlit.testing : premier rendu après démarrage, puis rerun.
+#
+# Usage :
+#   python benchmarks/bench_demarrage.py
+#   python benchmarks/bench_demarrage.py --sans-grille   # grille calculée au premier rendu
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RACINE = os.path.dirname(DOSSIER_BENCHMARKS)
+sys.path.insert(0, RACINE)
+
+# Imports de app_meteo.py (hors streamlit, mesuré à part)
+MODULES_APP = ('pandas', 'numpy', 'client_open_meteo', 'instrumentation', 'interface_statique',
+               'precalcul_previsions', 'precision_previsions', 'registre_modele', 'saisons', 'villes')
+FICHIERS_STATIQUES = ('meteo.jpg', 'apple-touch-icon.png', 'static', 'assets')
+
+
+def preparer(dossier, arbres, grille):
+    """Modèle synthétique de la ville par défaut, grille du jour et prévision officielle en cache"""
+    from bench_arbres import modeles_synthetiques
+    from suite import FIXTURE_PREVISION, _recaler
+
+    from arbres_compiles import compiler_ensemble
+    from client_open_meteo import DOSSIER_CACHE, URL_PREVISION, ClientOpenMeteo, cle_requete
+    from precalcul_previsions import precalculer, premier_jour_par_defaut
+    from precision_previsions import params_officiels
+    from registre_modele import sauvegarder_modele
+    from villes import VILLE_DEFAUT, chemin_modele
+
+    chemin = os.path.join(dossier, chemin_modele(VILLE_DEFAUT))
+    modeles, features = modeles_synthetiques(8000, arbres, 6)
+    chemin = sauvegarder_modele({
+        'model_temp': modeles['temperature'],
+        'model_humidity': modeles['humidity'],
+        'features': features,
+        'ensemble_compile': compiler_ensemble(modeles),
+    }, chemin)
+    if grille:
+        precalculer(chemin)
+
+    with open(FIXTURE_PREVISION, encoding='utf-8') as f:
+        officielle = _recaler(json.load(f), premier_jour_par_defaut())
+    ClientOpenMeteo(dossier_cache=os.path.join(dossier, DOSSIER_CACHE))._ecrire_cache(
+        cle_requete(URL_PREVISION, params_officiels(VILLE_DEFAUT)), {'recu_le': time.time(), 'donnees': officielle})
+    for nom in FICHIERS_STATIQUES:
+        source = os.path.join(RACINE, nom)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(dossier, nom))
+        elif os.path.exists(source):
+            shutil.copy(source, dossier)
+
+
+def enfant():
+    """Mesures dans l'interpréteur neuf (dossier courant = dossier préparé)"""
+    import importlib
+
+    mesures = {}
+    debut = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    mesures['import_streamlit'] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    for module in MODULES_APP:
+        importlib.import_module(module)
+    mesures['import_modules_app'] = time.perf_counter() - debut
+
+    app = AppTest.from_file(os.path.join(RACINE, 'app_meteo.py'), default_timeout=300)
+    debut = time.perf_counter()
+    app.run()
+    mesures['premier_rendu'] = time.perf_counter() - debut
+    debut = time.perf_counter()
+    app.run()
+    mesures['rerun'] = time.perf_counter() - debut
+
+    print(json.dumps({
+        'mesures': mesures,
+        'erreurs': [e.value for e in app.exception] + [e.value for e in app.error],
+        'modules_charges': {m: m in sys.modules for m in ('sklearn', 'joblib', 'requests', 'PIL')},
+    }))
+
+
+def imports_principaux(sortie_importtime, nombre=10):
+    """[(module, ms cumulées)] des imports de premier niveau les plus lents (python -X importtime)"""
+    imports = []
+    for ligne in sortie_importtime.splitlines():
+        if not ligne.startswith('import time:') or 'cumulative' in ligne:
+            continue
+        _, cumul, nom = ligne[len('import time:'):].split('|')
+        if not nom.startswith('  '):  # indentation = import imbriqué
+            imports.append((nom.strip(), int(cumul) / 1000))
+    return sorted(imports, key=lambda x: -x[1])[:nombre]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid de l'application")
+    parser.add_argument('--arbres', type=int, default=300)
+    parser.add_argument('--sans-grille', action='store_true', help="Pas de grille précalculée sur disque")
+    parser.add_argument('--enfant', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.enfant:
+        return enfant()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        print(f"🧠 Préparation (modèle synthétique de {args.arbres} arbres, "
+              f"{'sans' if args.sans_grille else 'avec'} grille précalculée)...")
+        preparer(dossier, args.arbres, not args.sans_grille)
+        env = dict(os.environ, METEO_HORS_LIGNE='1', METEO_METRIQUES='',
+                   PYTHONPATH=os.pathsep.join(filter(None, [RACINE, DOSSIER_BENCHMARKS, os.environ.get('PYTHONPATH')])))
+        debut = time.perf_counter()
+        processus = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--enfant'],
+                                   cwd=dossier, env=env, capture_output=True, text=True)
+        total = time.perf_counter() - debut
+    if processus.returncode != 0:
+        print(processus.stderr[-3000:])
+        return 1
+    resultat = json.loads(processus.stdout.strip().splitlines()[-1])
+
+    print("⏱️ Démarrage à froid (interpréteur neuf, -X importtime ralentit un peu les imports) :")
+    for nom, duree in resultat['mesures'].items():
+        print(f"   {nom:20s} {duree * 1000:8.0f} ms")
+    print(f"   {'processus complet':20s} {total * 1000:8.0f} ms")
+    print("📦 Imports de premier niveau les plus lents :")
+    for nom, ms in imports_principaux(processus.stderr):
+        print(f"   {nom:35s} {ms:8.0f} ms")
+    charges = [m for m, present in resultat['modules_charges'].items() if present]
+    print(f"🔎 Modules lourds chargés après deux rendus : {', '.join(charges) or 'aucun'}")
+    for erreur in resultat['erreurs']:
+        print(f"❌ {erreur}")
+    return 1 if resultat['erreurs'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# benchmarks/bench_entrainement.py - Entraînement : GradientBoosting vs HistGradientBoosting
+#
+# Historique horaire synthétique (aucun accès réseau), mêmes étapes que
+# entrainer_modele.py : durée d'entraînement, taille de l'artefact et erreur
+# sur les dernières semaines (jamais vues à l'entraînement).
+#
+# Usage :
+#   python benchmarks/bench_entrainement.py --annees 2
+#   python benchmarks/bench_entrainement.py --annees 10 --moteurs hgb
+import argparse
+import io
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from construction_features import FEATURES_AVANCEES, construire_features  # noqa: E402
+from entrainer_modele import MOTEURS, entrainer, preparer_donnees  # noqa: E402
+from prevision import predire  # noqa: E402
+
+SEMAINES_TEST = 4
+
+
+def historique_synthetique(nb_annees, graine=0):
+    """DataFrame horaire (date, temperature, humidity, cloud_cover, precipitation) façon Rabat"""
+    rng = np.random.default_rng(graine)
+    n = int(nb_annees * 365.25 * 24)
+    dates = pd.date_range('2015-01-01', periods=n, freq='h')
+    jour = dates.dayofyear.to_numpy()
+    heure = dates.hour.to_numpy()
+    meteo = np.cumsum(rng.normal(0, 0.3, n))
+    meteo -= pd.Series(meteo).rolling(24 * 30, min_periods=1).mean().to_numpy()
+    temperature = (18 + 5 * np.sin(2 * np.pi * (jour - 110) / 365.25)
+                   + 4 * np.sin(2 * np.pi * (heure - 9) / 24) + meteo + rng.normal(0, 0.5, n))
+    humidity = np.clip(75 - 1.5 * (temperature - 18) + rng.normal(0, 5, n), 10, 100)
+    cloud_cover = np.clip(rng.normal(40, 30, n), 0, 100)
+    # Trous de mesure, comme dans l'archive
+    for colonne in (temperature, cloud_cover):
+        colonne[rng.random(n) < 0.01] = np.nan
+    return pd.DataFrame({
+        'date': dates,
+        'temperature': temperature,
+        'precipitation': np.where(rng.random(n) < 0.05, rng.exponential(1.0, n), 0.0),
+        'humidity': humidity,
+        'cloud_cover': cloud_cover,
+    })
+
+
+def taille_pickle(objet):
+    """Taille (octets) de l'objet sérialisé avec joblib"""
+    tampon = io.BytesIO()
+    joblib.dump(objet, tampon)
+    return tampon.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les moteurs d'entraînement")
+    parser.add_argument('--annees', type=float, default=2)
+    parser.add_argument('--moteurs', nargs='+', choices=MOTEURS, default=list(MOTEURS))
+    args = parser.parse_args()
+
+    brut = historique_synthetique(args.annees)
+    print(f"📥 Historique synthétique : {len(brut)} heures ({args.annees:g} ans), {os.cpu_count()} CPU")
+
+    for moteur in args.moteurs:
+        df = preparer_donnees(brut, moteur)
+        coupe = len(df) - SEMAINES_TEST * 7 * 24
+        entrainement, test = df.iloc[:coupe], df.iloc[coupe:]
+
+        print(f"\n🧠 Moteur {moteur}")
+        debut = time.perf_counter()
+        model_temp, model_humidity = entrainer(entrainement, FEATURES_AVANCEES, moteur)
+        duree = time.perf_counter() - debut
+
+        X_test = construire_features(test['date'], FEATURES_AVANCEES, test)
+        rmse_temp = np.sqrt(np.mean((predire(model_temp, X_test) - test['temperature'].to_numpy()) ** 2))
+        rmse_hum = np.sqrt(np.mean((predire(model_humidity, X_test) - test['humidity'].to_numpy()) ** 2))
+        taille = taille_pickle({'model_temp': model_temp, 'model_humidity': model_humidity})
+        print(f"📊 {moteur} : {duree:.1f} s | {taille / 1e6:.2f} Mo | "
+              f"RMSE {SEMAINES_TEST} dernières semaines : {rmse_temp:.2f} °C, {rmse_hum:.1f} %")
+
+
+if __name__ == '__main__':
+    main()
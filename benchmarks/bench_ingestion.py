@@ -0,0 +1,101 @@
+# benchmarks/bench_ingestion.py - Pic mémoire : json.load + DataFrame vs lecture en flux
+#
+# Génère sur disque une réponse d'archive Open-Meteo synthétique (format
+# timeformat=unixtime) puis mesure, avec tracemalloc, le pic mémoire et la
+# durée des deux façons de la transformer en colonnes.
+#
+# Usage :
+#   python benchmarks/bench_ingestion.py --annees 20
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion_json import TAILLE_MORCEAU, lire_flux_horaire  # noqa: E402
+from telechargement_archive import VARIABLES  # noqa: E402
+
+
+def ecrire_reponse_synthetique(chemin, nb_annees, graine=0):
+    """Écrit une réponse horaire façon Open-Meteo (valeurs à 1 décimale, quelques null)"""
+    rng = np.random.default_rng(graine)
+    n = int(nb_annees * 365.25 * 24)
+    debut = int(np.datetime64('2005-01-01T00', 's').astype(np.int64))
+    with open(chemin, 'w', encoding='ascii') as f:
+        f.write('{"latitude":34.02,"longitude":-6.84,"generationtime_ms":12.3,"utc_offset_seconds":0,'
+                '"timezone":"GMT","hourly_units":{"time":"unixtime"},"hourly":{"time":[')
+        f.write(','.join(map(str, range(debut, debut + 3600 * n, 3600))))
+        f.write(']')
+        for variable in VARIABLES:
+            valeurs = np.round(rng.normal(20, 8, n), 1).astype(str)
+            valeurs[rng.random(n) < 0.001] = 'null'
+            f.write(f',"{variable}":[' + ','.join(valeurs) + ']')
+        f.write('}}')
+    return n
+
+
+def ingestion_json(chemin):
+    """Méthode historique : json.load puis DataFrame depuis les listes Python"""
+    with open(chemin, encoding='ascii') as f:
+        data = json.load(f)
+    return pd.DataFrame({
+        'date': pd.to_datetime(data['hourly']['time'], unit='s'),
+        **{nom: data['hourly'][variable] for variable, nom in VARIABLES.items()},
+    })
+
+
+def ingestion_flux(chemin, nb_lignes):
+    """Lecture en flux vers des tableaux préalloués"""
+    with open(chemin, 'rb') as f:
+        colonnes = lire_flux_horaire(iter(lambda: f.read(TAILLE_MORCEAU), b''), VARIABLES, nb_lignes)
+    return pd.DataFrame({
+        'date': pd.to_datetime(colonnes['time'], unit='s'),
+        **{nom: colonnes[variable] for variable, nom in VARIABLES.items()},
+    })
+
+
+def mesurer(fonction, *args):
+    """(résultat, durée en s, pic mémoire en Mo) ; durée mesurée hors tracemalloc, qui ralentit Python"""
+    debut = time.perf_counter()
+    fonction(*args)
+    duree = time.perf_counter() - debut
+    tracemalloc.start()
+    resultat = fonction(*args)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les méthodes d'ingestion de l'archive")
+    parser.add_argument('--annees', type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'archive.json')
+        n = ecrire_reponse_synthetique(chemin, args.annees)
+        print(f"📄 Réponse synthétique : {n} heures x {len(VARIABLES)} variables, "
+              f"{os.path.getsize(chemin) / 1e6:.0f} Mo de JSON")
+
+        df_json, t_json, pic_json = mesurer(ingestion_json, chemin)
+        df_flux, t_flux, pic_flux = mesurer(ingestion_flux, chemin, n)
+
+        for nom in VARIABLES.values():
+            assert np.array_equal(df_json[nom].to_numpy(np.float32), df_flux[nom].to_numpy(), equal_nan=True), nom
+        assert (df_json['date'] == df_flux['date']).all()
+
+        taille_finale = df_flux.memory_usage(index=False).sum() / 1e6
+        print(f"📊 json.load + DataFrame : {t_json:.2f} s | pic {pic_json:.0f} Mo")
+        print(f"📊 lecture en flux       : {t_flux:.2f} s | pic {pic_flux:.0f} Mo "
+              f"(DataFrame final : {taille_finale:.0f} Mo)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_recursif.py - Contexte figé vs prévision récursive (moyennes mobiles réinjectées)
+#
+# Entraîne les deux modèles HGB sur un historique synthétique, puis prévoit les
+# 30 jours qui suivent plusieurs dates de coupure : erreur par semaine d'échéance
+# contre la série synthétique, et latence de la grille (un ou plusieurs chemins).
+#
+# Usage :
+#   python benchmarks/bench_recursif.py --annees 4 --coupures 6
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_entrainement import historique_synthetique  # noqa: E402
+
+from arbres_compiles import compiler_ensemble  # noqa: E402
+from construction_features import FEATURES_AVANCEES, contexte_recent  # noqa: E402
+from entrainer_modele import entrainer, preparer_donnees  # noqa: E402
+from historique import Historique  # noqa: E402
+from prevision import HORIZON_MAX_JOURS, prevoir_grille  # noqa: E402
+from prevision_recursive import FenetresGlissantes, prevoir_grille_recursive, prevoir_recursif  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare contexte figé et prévision récursive")
+    parser.add_argument('--annees', type=float, default=4)
+    parser.add_argument('--coupures', type=int, default=6, help="Nombre de dates de départ testées")
+    parser.add_argument('--chemins', type=int, default=16)
+    args = parser.parse_args()
+
+    df = historique_synthetique(args.annees + 1)
+    fin_entrainement = df['date'].iloc[0] + np.timedelta64(int(args.annees * 365), 'D')
+    entrainement = preparer_donnees(df[df['date'] < fin_entrainement], 'hgb')
+    print(f"🧠 Entraînement HGB sur {len(entrainement)} heures...")
+    model_temp, model_humidity = entrainer(entrainement, FEATURES_AVANCEES, 'hgb')
+    ensemble = compiler_ensemble({'temperature': model_temp, 'humidity': model_humidity})
+
+    historique = Historique.depuis_dataframe(df)
+    verite = df.set_index('date')['temperature']
+    semaines = HORIZON_MAX_JOURS * 24 // 168
+    erreurs = {'figé': [], 'récursif': []}
+    durees = {'figé': [], 'récursif': []}
+    for k in range(args.coupures):
+        premier_jour = np.datetime64(fin_entrainement, 'D') + 30 * k
+        passe = Historique.depuis_dataframe(df[df['date'] < np.datetime64(premier_jour, 's')])
+        contexte = contexte_recent(passe)
+        debut = time.perf_counter()
+        fige = prevoir_grille(model_temp, model_humidity, FEATURES_AVANCEES, contexte, premier_jour)
+        durees['figé'].append(time.perf_counter() - debut)
+        debut = time.perf_counter()
+        recursif = prevoir_grille_recursive(model_temp, model_humidity, FEATURES_AVANCEES, passe, contexte,
+                                            premier_jour, ensemble=ensemble)
+        durees['récursif'].append(time.perf_counter() - debut)
+
+        dates = np.repeat(fige.jours, 24).astype('datetime64[s]') + np.tile(np.arange(24), len(fige)) * np.timedelta64(3600, 's')
+        observe = verite.reindex(dates).to_numpy()
+        for nom, grille in (('figé', fige), ('récursif', recursif)):
+            erreur = np.abs(grille.temperature.ravel() - observe)[:semaines * 168].reshape(semaines, 168)
+            erreurs[nom].append(np.nanmean(erreur, axis=1))
+    del historique
+
+    print(f"📊 MAE température (°C) par semaine d'échéance, moyenne sur {args.coupures} départs :")
+    for nom in erreurs:
+        mae = np.mean(erreurs[nom], axis=0)
+        print(f"   {nom:9s} : " + " | ".join(f"S{s + 1} {m:.2f}" for s, m in enumerate(mae))
+              + f" | grille {np.median(durees[nom]) * 1000:.0f} ms")
+
+    # Plusieurs chemins dans le même pas de temps : coût par chemin
+    dates = np.datetime64(fin_entrainement, 'h') + np.arange(HORIZON_MAX_JOURS * 24)
+    for nb_chemins in (1, args.chemins):
+        fenetres = FenetresGlissantes.constantes(20.0, 70.0, nb_chemins)
+        debut = time.perf_counter()
+        prevoir_recursif(model_temp, model_humidity, FEATURES_AVANCEES, dates, fenetres, ensemble=ensemble)
+        duree = time.perf_counter() - debut
+        print(f"⏱️ {nb_chemins:3d} chemin(s) x {len(dates)} h : {duree * 1000:.0f} ms "
+              f"({duree / len(dates) * 1e6:.0f} µs par pas)")
+
+
+if __name__ == '__main__':
+    main()
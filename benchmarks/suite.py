@@ -0,0 +1,274 @@
+# benchmarks/suite.py - Suite de performance hors ligne : étapes de l'application et de l'entraînement
+#
+# Pour chaque taille d'historique (90 jours, 2 ans, 20 ans) : historique horaire
+# synthétique, modèle HGB entraîné dessus et sauvegardé comme par
+# entrainer_modele.py, puis chronométrage de chaque étape du chemin de
+# app_meteo.py. Les réponses Open-Meteo viennent des fixtures enregistrées
+# (benchmarks/fixtures/) : aucun accès réseau.
+#
+# Chaque exécution ajoute une ligne par (taille, étape) à benchmarks/resultats.jsonl.
+# Une étape est en régression si sa médiane dépasse `--seuil` fois la médiane des
+# dernières exécutions sur la même machine : le code de sortie vaut alors 1.
+#
+# Usage :
+#   python benchmarks/suite.py
+#   python benchmarks/suite.py --tailles 90j 2ans --seuil 1.3
+#   python benchmarks/suite.py --regenerer-fixtures
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+DOSSIER_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DOSSIER_BENCHMARKS))
+
+from bench_arbres import chronometrer  # noqa: E402
+from bench_entrainement import historique_synthetique  # noqa: E402
+from bench_ingestion import ecrire_reponse_synthetique  # noqa: E402
+
+from arbres_compiles import compiler_ensemble  # noqa: E402
+from artefact_compact import charger_donnees  # noqa: E402
+from client_open_meteo import URL_PREVISION, ClientOpenMeteo, cle_requete  # noqa: E402
+from construction_features import FEATURES_AVANCEES, construire_features, contexte_recent  # noqa: E402
+from entrainer_modele import entrainer, preparer_donnees  # noqa: E402
+from historique import Historique, IndexCalendrier, lien_absolu, lier_historique  # noqa: E402
+from ingestion_json import TAILLE_MORCEAU, lire_flux_horaire  # noqa: E402
+from precision_previsions import PrecisionPrevisions, grille_officielle, params_officiels  # noqa: E402
+from prevision import dates_grille, predire_temperature_humidite  # noqa: E402
+from prevision_recursive import prevoir_grille_recursive  # noqa: E402
+from registre_modele import sauvegarder_modele  # noqa: E402
+from telechargement_archive import VARIABLES  # noqa: E402
+
+DOSSIER_FIXTURES = os.path.join(DOSSIER_BENCHMARKS, 'fixtures')
+FIXTURE_PREVISION = os.path.join(DOSSIER_FIXTURES, 'prevision_horaire.json')
+FIXTURE_ARCHIVE = os.path.join(DOSSIER_FIXTURES, 'archive_90j.json')
+CHEMIN_RESULTATS = os.path.join(DOSSIER_BENCHMARKS, 'resultats.jsonl')
+
+TAILLES = {'90j': 90, '2ans': 730, '20ans': 7305}  # jours d'historique
+REPETITIONS = 5
+NB_REFERENCES = 5  # exécutions précédentes formant la référence
+MARGE_MS = 2.0  # écart absolu ignoré (bruit des étapes très courtes)
+
+
+def regenerer_fixtures():
+    """Réécrit les réponses Open-Meteo enregistrées (format exact de l'API, timeformat=unixtime)"""
+    os.makedirs(DOSSIER_FIXTURES, exist_ok=True)
+    ecrire_reponse_synthetique(FIXTURE_ARCHIVE, TAILLES['90j'] / 365.25, graine=1)
+
+    rng = np.random.default_rng(2)
+    n = 16 * 24
+    debut = int(np.datetime64('2026-07-01T00', 's').astype(np.int64))
+    heures = np.arange(n) % 24
+    reponse = {
+        'latitude': 34.0, 'longitude': -6.84, 'generationtime_ms': 0.5, 'utc_offset_seconds': 0,
+        'timezone': 'GMT', 'timezone_abbreviation': 'GMT', 'elevation': 75.0,
+        'hourly_units': {'time': 'unixtime', 'temperature_2m': '°C', 'relative_humidity_2m': '%'},
+        'hourly': {
+            'time': list(range(debut, debut + 3600 * n, 3600)),
+            'temperature_2m': np.round(22 + 5 * np.sin(2 * np.pi * (heures - 9) / 24) + rng.normal(0, 1, n), 1).tolist(),
+            'relative_humidity_2m': np.clip(np.round(70 - 10 * np.sin(2 * np.pi * (heures - 9) / 24)
+                                                     + rng.normal(0, 4, n)), 5, 100).astype(int).tolist(),
+        },
+    }
+    with open(FIXTURE_PREVISION, 'w', encoding='utf-8') as f:
+        json.dump(reponse, f, ensure_ascii=False)
+    print(f"📁 Fixtures écrites dans {DOSSIER_FIXTURES}")
+
+
+def _silencieux(fonction, *args):
+    """Appelle `fonction` sans ses messages de progression"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fonction(*args)
+
+
+def _recaler(reponse, premier_jour):
+    """Copie de la réponse enregistrée dont la série commence la veille de `premier_jour`"""
+    horaire = dict(reponse['hourly'])
+    decalage = int((np.datetime64(premier_jour, 'D') - 1).astype('datetime64[s]').astype(np.int64)) - horaire['time'][0]
+    horaire['time'] = [t + decalage for t in horaire['time']]
+    return dict(reponse, hourly=horaire)
+
+
+def mesurer_taille(taille, dossier, repetitions):
+    """{étape: médiane en ms} pour une taille d'historique"""
+    nb_jours = TAILLES[taille]
+    brut = historique_synthetique(nb_jours / 365.25)
+    mesures = {}
+
+    # Entraînement (une fois : c'est aussi le modèle des étapes suivantes)
+    debut = time.perf_counter()
+    df = preparer_donnees(brut, 'hgb')
+    model_temp, model_humidity = _silencieux(entrainer, df, FEATURES_AVANCEES, 'hgb')
+    mesures['entrainement'] = (time.perf_counter() - debut) * 1000
+
+    chemin = os.path.join(dossier, taille, 'cerveau_meteo_long_terme.pkl')
+    os.makedirs(os.path.dirname(chemin))
+    lien = lier_historique(brut, chemin)
+    ensemble = compiler_ensemble({'temperature': model_temp, 'humidity': model_humidity})
+    chemin_servi = sauvegarder_modele({
+        'model_temp': model_temp,
+        'model_humidity': model_humidity,
+        'features': FEATURES_AVANCEES,
+        'ensemble_compile': ensemble,
+        'historique': lien,
+    }, chemin)
+    dossier_historique = lien_absolu(lien, chemin)['chemin']
+
+    # Réponse d'archive de cette taille (fixture pour 90 jours, générée au-delà)
+    chemin_archive = FIXTURE_ARCHIVE
+    if nb_jours != TAILLES['90j']:
+        chemin_archive = os.path.join(dossier, f"archive_{taille}.json")
+        ecrire_reponse_synthetique(chemin_archive, nb_jours / 365.25)
+    nb_lignes = int(nb_jours * 24)
+
+    def ingestion():
+        with open(chemin_archive, 'rb') as f:
+            return lire_flux_horaire(iter(lambda: f.read(TAILLE_MORCEAU), b''), VARIABLES, nb_lignes)
+
+    # Cache du client Open-Meteo rempli avec la prévision enregistrée (mode hors ligne)
+    historique = Historique.ouvrir(dossier_historique)
+    contexte = contexte_recent(historique)
+    premier_jour = str(historique.dates[-1].astype('datetime64[D]') + 1)
+    with open(FIXTURE_PREVISION, encoding='utf-8') as f:
+        officielle = _recaler(json.load(f), premier_jour)
+    params = params_officiels('rabat')
+    dossier_cache = os.path.join(dossier, taille, 'cache')
+    ClientOpenMeteo(dossier_cache=dossier_cache, hors_ligne=True)._ecrire_cache(
+        cle_requete(URL_PREVISION, params), {'recu_le': time.time(), 'donnees': officielle})
+
+    _, dates = dates_grille(premier_jour, 30)
+    X = construire_features(dates, FEATURES_AVANCEES, contexte)
+    grille = prevoir_grille_recursive(model_temp, model_humidity, FEATURES_AVANCEES, historique, contexte,
+                                      premier_jour, ensemble=ensemble)
+    index = IndexCalendrier(historique.dates)
+    # Semaine couverte par l'historique, même pour 90 jours (les jours à venir n'y sont pas encore)
+    jours_affiches = np.datetime64(premier_jour) - np.arange(7, 0, -1)
+
+    def filtre_historique():
+        # Historique du jour choisi + normale ±3 jours, pour chaque jour affiché (app_meteo.py)
+        for jour in jours_affiches.astype(object):
+            lignes = index.lignes(jour.month, jour.day, 14)[::-1][:5]
+            historique['temperature'][lignes], historique['humidity'][lignes]
+            np.nanmean(historique['temperature'][index.lignes_plage(jour.month, jour.day, 3, 14)])
+
+    def fusion_comparaison():
+        precision = PrecisionPrevisions(grille, grille_officielle(officielle, grille.jours))
+        return precision.par_echeance(), precision.par_heure(), precision.globale()
+
+    etapes = {
+        'ingestion_archive': ingestion,
+        'chargement_modele': lambda: joblib.load(chemin),
+        'chargement_compact': lambda: charger_donnees(chemin_servi),
+        'ouverture_historique': lambda: contexte_recent(Historique.ouvrir(dossier_historique)),
+        'prevision_officielle_cache': lambda: ClientOpenMeteo(dossier_cache=dossier_cache, hors_ligne=True)
+        .prevision(params),
+        'features_grille': lambda: construire_features(dates, FEATURES_AVANCEES, contexte),
+        'predict_grille': lambda: predire_temperature_humidite(model_temp, model_humidity, X),
+        'grille_recursive': lambda: prevoir_grille_recursive(model_temp, model_humidity, FEATURES_AVANCEES,
+                                                             historique, contexte, premier_jour,
+                                                             ensemble=ensemble),
+        'index_calendrier': lambda: IndexCalendrier(historique.dates),
+        'filtre_historique': filtre_historique,
+        'fusion_comparaison': fusion_comparaison,
+    }
+    for nom, fonction in etapes.items():
+        fonction()  # échauffement (imports, caches du système de fichiers)
+        mesures[nom] = chronometrer(fonction, repetitions)
+    return mesures
+
+
+def _machine():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()} CPU|Python {platform.python_version()}"
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=DOSSIER_BENCHMARKS, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def lire_resultats(chemin=CHEMIN_RESULTATS):
+    """Lignes précédentes du fichier de résultats (vide s'il n'existe pas)"""
+    if not os.path.exists(chemin):
+        return []
+    with open(chemin, encoding='utf-8') as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def regressions(lignes, precedentes, seuil):
+    """Lignes dont la médiane dépasse `seuil` x la référence de la même machine"""
+    trouvees = []
+    for ligne in lignes:
+        references = [p['median_ms'] for p in precedentes
+                      if (p['machine'], p['taille'], p['etape']) == (ligne['machine'], ligne['taille'], ligne['etape'])]
+        if not references:
+            continue
+        reference = float(np.median(references[-NB_REFERENCES:]))
+        ligne['reference_ms'] = round(reference, 3)
+        if ligne['median_ms'] > seuil * reference and ligne['median_ms'] - reference > MARGE_MS:
+            trouvees.append(ligne)
+    return trouvees
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de performance hors ligne")
+    parser.add_argument('--tailles', nargs='+', choices=TAILLES, default=list(TAILLES))
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS)
+    parser.add_argument('--seuil', type=float, default=1.5, help="Ralentissement toléré (x la référence)")
+    parser.add_argument('--resultats', default=CHEMIN_RESULTATS)
+    parser.add_argument('--sans-enregistrement', action='store_true', help="Compare sans ajouter de lignes")
+    parser.add_argument('--regenerer-fixtures', action='store_true')
+    args = parser.parse_args()
+
+    if args.regenerer_fixtures:
+        regenerer_fixtures()
+        return 0
+
+    execution = {
+        'execution': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'machine': _machine(),
+    }
+    lignes = []
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            print(f"⏱️ {taille}...")
+            for etape, median_ms in mesurer_taille(taille, dossier, args.repetitions).items():
+                lignes.append(dict(execution, taille=taille, etape=etape, median_ms=round(median_ms, 3)))
+
+    trouvees = regressions(lignes, lire_resultats(args.resultats), args.seuil)
+    print(f"\n{'étape':28s}" + ''.join(f"{taille:>12s}" for taille in args.tailles))
+    for etape in dict.fromkeys(ligne['etape'] for ligne in lignes):
+        cellules = []
+        for taille in args.tailles:
+            ligne = next((l for l in lignes if (l['etape'], l['taille']) == (etape, taille)), None)
+            marque = '❗' if ligne in trouvees else ''
+            cellules.append(f"{marque}{ligne['median_ms']:.1f} ms" if ligne else '-')
+        print(f"{etape:28s}" + ''.join(f"{c:>12s}" for c in cellules))
+
+    if not args.sans_enregistrement:
+        with open(args.resultats, 'a', encoding='utf-8') as f:
+            for ligne in lignes:
+                f.write(json.dumps(ligne, ensure_ascii=False) + '\n')
+        print(f"\n📝 {len(lignes)} mesures ajoutées à {args.resultats}")
+
+    for ligne in trouvees:
+        print(f"❌ Régression {ligne['taille']} / {ligne['etape']} : {ligne['median_ms']:.1f} ms "
+              f"(référence {ligne['reference_ms']:.1f} ms, seuil x{args.seuil:g})")
+    return 1 if trouvees else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# calendrier.py - Outils de dates vectorisés (NumPy, sans accesseurs pandas .dt)
+import numpy as np
+
+# Premier jour de chaque mois dans une année bissextile (0 = 1er janvier)
+_DEBUT_MOIS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+# Nombre de "jours calendaires" (mois, jour) possibles, 29 février inclus
+NB_JOURS_CALENDRIER = 366
+
+
+def composantes_dates(dates):
+    """Décompose des dates datetime64 en tableaux (année, mois, jour, heure)"""
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    jours = dates.astype('datetime64[D]')
+    annees = jours.astype('datetime64[Y]')
+    mois = jours.astype('datetime64[M]')
+    return (
+        annees.astype(np.int64) + 1970,
+        (mois - annees).astype(np.int64) + 1,
+        (jours - mois).astype(np.int64) + 1,
+        (dates - jours).astype('timedelta64[h]').astype(np.int64),
+    )
+
+
+def jour_calendrier(mois, jour):
+    """Indice 0..365 du couple (mois, jour), identique d'une année à l'autre"""
+    return _DEBUT_MOIS[np.asarray(mois) - 1] + np.asarray(jour) - 1
+
+
+def jour_annee(dates):
+    """Jour de l'année 1..366 (équivalent vectorisé de .dt.dayofyear)"""
+    jours = np.asarray(dates, dtype='datetime64[s]').astype('datetime64[D]')
+    return (jours - jours.astype('datetime64[Y]')).astype(np.int64) + 1
+
+
+def jour_semaine(dates):
+    """Jour de la semaine 0 (lundi) .. 6 (dimanche), comme .dt.dayofweek"""
+    jours = np.asarray(dates, dtype='datetime64[s]').astype('datetime64[D]').astype(np.int64)
+    # Le 1er janvier 1970 était un jeudi (3)
+    return (jours + 3) % 7
@@ -0,0 +1,198 @@
+# client_open_meteo.py - Client HTTP Open-Meteo partagé (app, script et notebooks)
+#
+# - une requests.Session gardée ouverte (keep-alive, pool de connexions)
+# - délais de connexion / lecture et nouvelles tentatives avec backoff
+# - cache TTL en mémoire + sur disque, clé = URL + paramètres
+# - requêtes conditionnelles (ETag / Last-Modified) quand l'API les fournit
+# - mode hors ligne (METEO_HORS_LIGNE=1) : rejoue uniquement le cache disque
+# - appels en arrière-plan (Future) pour ne pas bloquer l'affichage
+# - requests n'est importé qu'au premier appel réseau (une page servie depuis le
+#   cache démarre sans lui)
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import compter, mesure
+
+URL_PREVISION = "https://api.open-meteo.com/v1/forecast"
+URL_ARCHIVE = "https://archive-api.open-meteo.com/v1/archive"
+
+DOSSIER_CACHE = '.cache_open_meteo'
+DELAIS = (3.05, 30)  # (connexion, lecture) en secondes
+TTL_PREVISION = 3600  # Open-Meteo met à jour ses prévisions environ toutes les heures
+TTL_ARCHIVE = 24 * 3600
+MAX_ENTREES_MEMOIRE = 128
+NB_VERROUS_CLES = 64  # verrous répartis par clé (taille fixe, quel que soit le nombre de clés vues)
+
+
+class DonneesIndisponibles(RuntimeError):
+    """Réponse absente du cache alors que le client est hors ligne"""
+
+
+def cle_requete(url, params):
+    """Clé de cache stable pour (URL, paramètres)"""
+    brut = json.dumps([url, sorted((str(k), str(v)) for k, v in params.items())])
+    return hashlib.sha256(brut.encode()).hexdigest()
+
+
+class ClientOpenMeteo:
+    """Client Open-Meteo avec session persistante et cache TTL mémoire + disque"""
+
+    def __init__(self, dossier_cache=DOSSIER_CACHE, hors_ligne=None, tentatives=3, delais=DELAIS):
+        self.dossier_cache = dossier_cache
+        if hors_ligne is None:
+            hors_ligne = os.environ.get('METEO_HORS_LIGNE') == '1'
+        self.hors_ligne = hors_ligne
+        self.tentatives = tentatives
+        self.delais = delais
+        self._session = None
+        self._memoire = OrderedDict()  # LRU : la plus récemment utilisée en dernier
+        self._verrou = threading.Lock()  # protège _memoire (téléchargeurs, exécuteur, sessions Streamlit)
+        self._verrous_cles = [threading.Lock() for _ in range(NB_VERROUS_CLES)]
+
+    @property
+    def session(self):
+        """Session HTTP créée au premier appel réseau"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=self.tentatives,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+                respect_retry_after_header=True,
+            )
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=16))
+            self._session = session
+        return self._session
+
+    # --- Cache ---
+    def _chemin_disque(self, cle):
+        return os.path.join(self.dossier_cache, f"{cle}.json")
+
+    def _lire_cache(self, cle):
+        with self._verrou:
+            entree = self._memoire.get(cle)
+            if entree is not None:
+                self._memoire.move_to_end(cle)
+                return entree
+        try:
+            with open(self._chemin_disque(cle), encoding='utf-8') as f:
+                entree = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memoriser(cle, entree)
+        return entree
+
+    def _memoriser(self, cle, entree):
+        with self._verrou:
+            self._memoire[cle] = entree
+            self._memoire.move_to_end(cle)
+            while len(self._memoire) > MAX_ENTREES_MEMOIRE:
+                self._memoire.popitem(last=False)
+
+    def _ecrire_cache(self, cle, entree):
+        self._memoriser(cle, entree)
+        os.makedirs(self.dossier_cache, exist_ok=True)
+        chemin = self._chemin_disque(cle)
+        temporaire = f"{chemin}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(entree, f)
+        os.replace(temporaire, chemin)
+
+    def _verrou_cle(self, cle):
+        # La clé est une empreinte SHA-256 hexadécimale : ses premiers chiffres sont uniformes
+        return self._verrous_cles[int(cle[:8], 16) % NB_VERROUS_CLES]
+
+    # --- Requêtes ---
+    def obtenir_json(self, url, params, ttl):
+        """Retourne la réponse JSON, depuis le cache si elle a moins de `ttl` secondes"""
+        cle = cle_requete(url, params)
+        entree = self._lire_cache(cle)
+        if entree is not None and (self.hors_ligne or time.time() - entree['recu_le'] < ttl):
+            compter('open_meteo_cache_hit')
+            return entree['donnees']
+        compter('open_meteo_cache_miss')
+        if self.hors_ligne:
+            raise DonneesIndisponibles(f"Hors ligne : aucune réponse en cache pour {url} {params}")
+
+        import requests
+
+        # Une seule requête par clé : les sessions concurrentes attendent le premier appel
+        with self._verrou_cle(cle):
+            entree = self._lire_cache(cle)
+            if entree is not None and time.time() - entree['recu_le'] < ttl:
+                return entree['donnees']
+
+            entetes = {}
+            if entree is not None:
+                if entree.get('etag'):
+                    entetes['If-None-Match'] = entree['etag']
+                if entree.get('last_modified'):
+                    entetes['If-Modified-Since'] = entree['last_modified']
+
+            try:
+                compter('open_meteo_appels')
+                with mesure('requete_open_meteo'):
+                    reponse = self.session.get(url, params=params, headers=entetes, timeout=self.delais)
+                if reponse.status_code == 304 and entree is not None:
+                    entree = dict(entree, recu_le=time.time())
+                    self._ecrire_cache(cle, entree)
+                    return entree['donnees']
+                reponse.raise_for_status()
+                donnees = reponse.json()
+            except requests.RequestException:
+                compter('open_meteo_erreurs')
+                # Réseau indisponible : une réponse périmée vaut mieux que rien
+                if entree is not None:
+                    return entree['donnees']
+                raise
+
+            self._ecrire_cache(cle, {
+                'url': url,
+                'params': params,
+                'recu_le': time.time(),
+                'etag': reponse.headers.get('ETag'),
+                'last_modified': reponse.headers.get('Last-Modified'),
+                'donnees': donnees,
+            })
+            return donnees
+
+    def prevision(self, params, ttl=TTL_PREVISION):
+        """Prévisions officielles (api.open-meteo.com/v1/forecast)"""
+        return self.obtenir_json(URL_PREVISION, params, ttl)
+
+    def archive(self, params, ttl=TTL_ARCHIVE):
+        """Historique horaire (archive-api.open-meteo.com/v1/archive)"""
+        return self.obtenir_json(URL_ARCHIVE, params, ttl)
+
+
+# Client unique du processus : une session et un cache partagés par toutes les sessions Streamlit
+client = ClientOpenMeteo()
+
+# Threads partagés par toutes les sessions pour les appels en arrière-plan ; un appel
+# abandonné (délai dépassé, session relancée) se termine quand même et remplit le cache
+_executeur = ThreadPoolExecutor(max_workers=4, thread_name_prefix='open-meteo')
+
+
+def recuperer_prevision(params, ttl=TTL_PREVISION):
+    """Raccourci vers client.prevision()"""
+    return client.prevision(params, ttl)
+
+
+def prevision_en_arriere_plan(params, ttl=TTL_PREVISION):
+    """Lance client.prevision() dans un thread et retourne immédiatement son Future"""
+    return _executeur.submit(client.prevision, params, ttl)
+
+
+def recuperer_archive(params, ttl=TTL_ARCHIVE):
+    """Raccourci vers client.archive()"""
+    return client.archive(params, ttl)
@@ -0,0 +1,153 @@
+# construction_features.py - Construction des features, partagée entraînement / application
+#
+# Une seule implémentation pour le script, les notebooks et app_meteo.py : la
+# matrice float32 est préallouée puis remplie colonne par colonne dans l'ordre
+# exact de la liste `features` sauvegardée avec le modèle.
+import numpy as np
+
+from calendrier import composantes_dates, jour_annee, jour_semaine
+from instrumentation import mesure
+
+# Features du notebook entrainer_modele_v2.ipynb
+FEATURES_BASE = [
+    'day_cos', 'day_sin', 'hour_cos', 'hour_sin', 'month_cos', 'month_sin',
+    'heure', 'mois', 'jour_annee'
+]
+
+# Features du modèle utilisé par app_meteo.py (entrainer_modele.ipynb / .py)
+FEATURES_AVANCEES = [
+    'day_cos', 'day_sin', 'hour_cos', 'hour_sin', 'month_cos', 'month_sin',
+    'heure', 'mois', 'jour_annee', 'jour_mois',
+    'cloud_cover_filled',
+    'temp_rolling_24h', 'temp_rolling_7d', 'humidity_rolling_24h',
+    'hour_month', 'day_hour', 'cloud_hour',
+    'jour_annee_sq', 'heure_sq', 'mois_sq',
+    'is_winter', 'is_summer', 'is_night', 'is_midday'
+]
+
+# Features météo qui ne se déduisent pas de la date
+FEATURES_CONTEXTE = ['cloud_cover_filled', 'temp_rolling_24h', 'temp_rolling_7d', 'humidity_rolling_24h']
+
+# Valeurs utilisées quand aucun historique n'est disponible
+CONTEXTE_DEFAUT = {
+    'cloud_cover_filled': 50,
+    'temp_rolling_24h': 20,
+    'temp_rolling_7d': 20,
+    'humidity_rolling_24h': 70,
+}
+
+
+class _Base:
+    """Composantes de date calculées une seule fois pour toutes les features"""
+
+    def __init__(self, dates, contexte):
+        _, mois, jour, heure = composantes_dates(dates)
+        self.mois = mois
+        self.jour_mois = jour
+        self.heure = heure
+        self.jour_annee = jour_annee(dates)
+        self.jour_semaine = jour_semaine(dates)
+        self.contexte = contexte
+
+    def ctx(self, nom):
+        return self.contexte[nom] if nom in self.contexte else CONTEXTE_DEFAUT[nom]
+
+
+_CALCULS = {
+    # Encodage cyclique
+    'day_cos': lambda b: np.cos(2 * np.pi * b.jour_annee / 365.25),
+    'day_sin': lambda b: np.sin(2 * np.pi * b.jour_annee / 365.25),
+    'hour_cos': lambda b: np.cos(2 * np.pi * b.heure / 24),
+    'hour_sin': lambda b: np.sin(2 * np.pi * b.heure / 24),
+    'month_cos': lambda b: np.cos(2 * np.pi * b.mois / 12),
+    'month_sin': lambda b: np.sin(2 * np.pi * b.mois / 12),
+    # Date brute
+    'heure': lambda b: b.heure,
+    'mois': lambda b: b.mois,
+    'jour_annee': lambda b: b.jour_annee,
+    'jour_mois': lambda b: b.jour_mois,
+    'jour_semaine': lambda b: b.jour_semaine,
+    # Contexte météo (scalaire ou tableau)
+    'cloud_cover_filled': lambda b: b.ctx('cloud_cover_filled'),
+    'temp_rolling_24h': lambda b: b.ctx('temp_rolling_24h'),
+    'temp_rolling_7d': lambda b: b.ctx('temp_rolling_7d'),
+    'humidity_rolling_24h': lambda b: b.ctx('humidity_rolling_24h'),
+    # Interactions
+    'hour_month': lambda b: b.heure * b.mois,
+    'day_hour': lambda b: b.jour_annee * b.heure,
+    'cloud_hour': lambda b: np.asarray(b.ctx('cloud_cover_filled'), dtype=np.float64) * b.heure,
+    # Polynomiales
+    'jour_annee_sq': lambda b: b.jour_annee ** 2,
+    'heure_sq': lambda b: b.heure ** 2,
+    'mois_sq': lambda b: b.mois ** 2,
+    # Indicateurs
+    'is_winter': lambda b: (b.mois == 12) | (b.mois <= 2),
+    'is_summer': lambda b: (b.mois >= 6) & (b.mois <= 8),
+    'is_night': lambda b: (b.heure >= 20) | (b.heure <= 6),
+    'is_midday': lambda b: (b.heure >= 11) & (b.heure <= 15),
+}
+
+
+def construire_features(dates, features, contexte=None):
+    """Matrice float32 (len(dates), len(features)) dans l'ordre de `features`.
+
+    `contexte` fournit les features météo (FEATURES_CONTEXTE) : un scalaire par
+    feature à l'inférence, un tableau aligné sur `dates` à l'entraînement. Tout
+    objet indexable par nom convient (dict, DataFrame).
+    """
+    inconnues = [nom for nom in features if nom not in _CALCULS]
+    if inconnues:
+        raise ValueError(f"Features inconnues : {inconnues}")
+
+    with mesure('features'):
+        dates = np.asarray(dates, dtype='datetime64[s]')
+        base = _Base(dates, contexte if contexte is not None else {})
+        X = np.empty((len(dates), len(features)), dtype=np.float32)
+        for i, nom in enumerate(features):
+            X[:, i] = np.asarray(_CALCULS[nom](base), dtype=np.float64)
+        return X
+
+
+def moyenne_mobile(valeurs, fenetre):
+    """Moyenne glissante sur `fenetre` points, NaN ignorés (comme rolling(min_periods=1))"""
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    valides = ~np.isnan(valeurs)
+    sommes = np.concatenate(([0.0], np.cumsum(np.where(valides, valeurs, 0.0))))
+    comptes = np.concatenate(([0], np.cumsum(valides)))
+    fin = np.arange(1, len(valeurs) + 1)
+    debut = np.maximum(fin - fenetre, 0)
+    n = comptes[fin] - comptes[debut]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, (sommes[fin] - sommes[debut]) / n, np.nan)
+
+
+def moyenne_mobile_passee(valeurs, fenetre):
+    """Moyenne des `fenetre` points précédents, sans le point courant (NaN pour le premier)"""
+    return np.concatenate(([np.nan], moyenne_mobile(valeurs, fenetre)[:-1]))
+
+
+def contexte_historique(temperature, humidity, cloud_cover):
+    """Contexte météo ligne à ligne pour l'entraînement (séries horaires triées par date).
+
+    Les moyennes mobiles ne portent que sur les heures précédentes : c'est ce
+    qui est connu au moment de prévoir une heure (prevision_recursive.py).
+    """
+    cloud_cover = np.asarray(cloud_cover, dtype=np.float64)
+    return {
+        'cloud_cover_filled': np.where(np.isnan(cloud_cover), np.nanmean(cloud_cover), cloud_cover),
+        'temp_rolling_24h': moyenne_mobile_passee(temperature, 24),
+        'temp_rolling_7d': moyenne_mobile_passee(temperature, 168),
+        'humidity_rolling_24h': moyenne_mobile_passee(humidity, 24),
+    }
+
+
+def contexte_recent(historique):
+    """Contexte météo scalaire pour l'inférence : fin de l'historique (ou valeurs par défaut)"""
+    if historique is None:
+        return dict(CONTEXTE_DEFAUT)
+    return {
+        'cloud_cover_filled': float(np.nanmean(historique['cloud_cover'])),
+        'temp_rolling_24h': float(np.nanmean(historique['temperature'][-24:])),
+        'temp_rolling_7d': float(np.nanmean(historique['temperature'][-168:])),
+        'humidity_rolling_24h': float(np.nanmean(historique['humidity'][-24:])),
+    }
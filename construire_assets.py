@@ -0,0 +1,200 @@
+# construire_assets.py - Icônes, logo, CSS et manifeste web dans static/ (noms hachés)
+#
+# Produit les fichiers servis par Streamlit (server.enableStaticServing, URL
+# app/static/<fichier>) au lieu de les injecter dans chaque page :
+#   - icônes PWA aux bonnes tailles (180, 192, 512) et favicon 32 px, à partir
+#     de icon-512.png, en PNG palette compressé ;
+#   - logo (meteo.jpg) réduit pour l'icône de l'onglet ;
+#   - assets/style.css minifié, avec la police Poppins auto-hébergée si ses fichiers
+#     sont dans assets/polices/ (Poppins-300.woff2, Poppins-400.woff2, ...,
+#     licence OFL : --telecharger-polices les y place, une fois, à versionner) ;
+#     l'@import Google Fonts du CSS n'est retiré qu'à cette condition ;
+#   - manifest.json de l'application web.
+# Chaque nom contient l'empreinte du contenu : les navigateurs peuvent garder les
+# fichiers en cache sans risque. static/assets.json relie les noms logiques aux
+# fichiers ; interface_statique.py le lit au démarrage. Les anciens fichiers sont supprimés.
+#
+# Usage : python construire_assets.py [--sortie static] [--polices assets/polices] [--telecharger-polices]
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+from PIL import Image
+
+DOSSIER_STATIQUE = 'static'
+DOSSIER_POLICES = os.path.join('assets', 'polices')
+CHEMIN_CSS = os.path.join('assets', 'style.css')
+SOURCE_ICONE = 'icon-512.png'
+SOURCE_LOGO = 'meteo.jpg'
+NOM_INDEX = 'assets.json'
+
+TAILLES_ICONES = {'apple_touch_icon': 180, 'icone_192': 192, 'icone_512': 512, 'favicon': 32}
+TAILLE_LOGO = 128
+COULEURS_PALETTE = 256
+NOM_APPLICATION = "Météo IA Maroc"
+NOM_COURT = "Météo Maroc"
+COULEUR_FOND = '#0F0F23'  # .streamlit/config.toml
+COULEUR_THEME = '#667eea'
+
+# Poppins (SIL Open Font License 1.1), sous-ensemble latin, depuis le paquet npm @fontsource/poppins
+GRAISSES_POLICE = (300, 400, 600, 700)
+URL_POLICES = 'https://cdn.jsdelivr.net/npm/@fontsource/poppins@5'
+FICHIER_LICENCE_POLICES = 'OFL.txt'
+
+
+def _empreinte(contenu):
+    return hashlib.sha256(contenu).hexdigest()[:10]
+
+
+def _ecrire(dossier, nom, extension, contenu):
+    """Écrit `contenu` sous <nom>-<empreinte>.<extension> (atomique) et retourne le nom du fichier"""
+    fichier = f"{nom}-{_empreinte(contenu)}.{extension}"
+    chemin = os.path.join(dossier, fichier)
+    temporaire = f"{chemin}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temporaire, 'wb') as f:
+        f.write(contenu)
+    os.replace(temporaire, chemin)
+    return fichier
+
+
+def icone_png(image, taille):
+    """Icône carrée `taille` px en PNG palette (256 couleurs), compression maximale"""
+    icone = image.convert('RGBA').resize((taille, taille), Image.Resampling.LANCZOS)
+    tampon = io.BytesIO()
+    icone.quantize(COULEURS_PALETTE, method=Image.Quantize.FASTOCTREE).save(tampon, 'PNG', optimize=True)
+    return tampon.getvalue()
+
+
+def logo_jpeg(image, taille=TAILLE_LOGO):
+    """Logo réduit (plus grand côté = `taille` px) en JPEG progressif"""
+    logo = image.convert('RGB')
+    logo.thumbnail((taille, taille), Image.Resampling.LANCZOS)
+    tampon = io.BytesIO()
+    logo.save(tampon, 'JPEG', quality=85, optimize=True, progressive=True)
+    return tampon.getvalue()
+
+
+def minifier_css(css):
+    """Supprime commentaires et espaces superflus (le CSS de l'application n'a pas de chaînes à préserver)"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)  # pas avant ':' (« .a :hover » n'est pas « .a:hover »)
+    return css.replace(';}', '}').strip()
+
+
+# @import Google Fonts de assets/style.css, remplacé par les @font-face des polices auto-hébergées
+IMPORT_GOOGLE_FONTS = re.compile(r"@import url\('https://fonts\.googleapis\.com/[^']*'\);?")
+
+
+def polices(dossier_sortie, dossier_polices=DOSSIER_POLICES):
+    """(règles @font-face, fichiers écrits) pour les fichiers Poppins-<graisse>.woff2 trouvés"""
+    regles, fichiers = [], []
+    for chemin in sorted(glob.glob(os.path.join(dossier_polices, 'Poppins-*.woff2'))):
+        graisse = os.path.basename(chemin)[len('Poppins-'):-len('.woff2')]
+        if not graisse.isdigit():
+            continue
+        with open(chemin, 'rb') as f:
+            fichier = _ecrire(dossier_sortie, f"poppins-{graisse}", 'woff2', f.read())
+        fichiers.append(fichier)
+        regles.append(f"@font-face{{font-family:'Poppins';font-style:normal;font-weight:{graisse};"
+                      f"font-display:swap;src:url({fichier}) format('woff2')}}")
+    return ''.join(regles), fichiers
+
+
+def telecharger_polices(dossier_polices=DOSSIER_POLICES, graisses=GRAISSES_POLICE):
+    """Télécharge les Poppins-<graisse>.woff2 absents et la licence OFL ; retourne les fichiers écrits"""
+    import requests
+
+    a_telecharger = {f"Poppins-{g}.woff2": f"{URL_POLICES}/files/poppins-latin-{g}-normal.woff2" for g in graisses}
+    a_telecharger[FICHIER_LICENCE_POLICES] = f"{URL_POLICES}/LICENSE"
+    os.makedirs(dossier_polices, exist_ok=True)
+    ecrits = []
+    with requests.Session() as session:
+        for nom, url in a_telecharger.items():
+            chemin = os.path.join(dossier_polices, nom)
+            if os.path.exists(chemin):
+                continue
+            reponse = session.get(url, timeout=30)
+            reponse.raise_for_status()
+            if nom.endswith('.woff2') and not reponse.content.startswith(b'wOF2'):
+                raise ValueError(f"{url} n'est pas un fichier WOFF2")
+            temporaire = f"{chemin}.tmp-{os.getpid()}"
+            with open(temporaire, 'wb') as f:
+                f.write(reponse.content)
+            os.replace(temporaire, chemin)
+            ecrits.append(nom)
+    return ecrits
+
+
+def manifeste(fichiers):
+    """Manifeste web ; les URL sont relatives à app/static/ (start_url remonte à la racine de l'application)"""
+    return {
+        'name': NOM_APPLICATION,
+        'short_name': NOM_COURT,
+        'start_url': '../../',
+        'scope': '../../',
+        'display': 'standalone',
+        'background_color': COULEUR_FOND,
+        'theme_color': COULEUR_THEME,
+        'icons': [
+            {'src': fichiers[nom], 'sizes': f"{TAILLES_ICONES[nom]}x{TAILLES_ICONES[nom]}", 'type': 'image/png',
+             'purpose': 'any'}
+            for nom in ('icone_192', 'icone_512')
+        ],
+    }
+
+
+def construire(dossier_sortie=DOSSIER_STATIQUE, dossier_polices=DOSSIER_POLICES):
+    """Écrit tous les fichiers statiques et l'index ; retourne l'index {nom logique: fichier}"""
+    os.makedirs(dossier_sortie, exist_ok=True)
+    index = {}
+    with Image.open(SOURCE_ICONE) as image:
+        for nom, taille in TAILLES_ICONES.items():
+            index[nom] = _ecrire(dossier_sortie, nom.replace('_', '-'), 'png', icone_png(image, taille))
+    with Image.open(SOURCE_LOGO) as image:
+        index['logo'] = _ecrire(dossier_sortie, 'logo', 'jpg', logo_jpeg(image))
+
+    regles_polices, index['polices'] = polices(dossier_sortie, dossier_polices)
+    with open(CHEMIN_CSS, encoding='utf-8') as f:
+        css = minifier_css(f.read())
+    if regles_polices:
+        css = regles_polices + IMPORT_GOOGLE_FONTS.sub('', css)
+    index['css'] = _ecrire(dossier_sortie, 'style', 'css', css.encode())
+    contenu_manifeste = json.dumps(manifeste(index), ensure_ascii=False, indent=1).encode()
+    index['manifeste'] = _ecrire(dossier_sortie, 'manifest', 'json', contenu_manifeste)
+
+    with open(os.path.join(dossier_sortie, NOM_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+
+    # Fichiers d'une construction précédente
+    gardes = {NOM_INDEX, *index['polices'], *(v for v in index.values() if isinstance(v, str))}
+    for chemin in glob.glob(os.path.join(dossier_sortie, '*')):
+        if os.path.basename(chemin) not in gardes:
+            os.remove(chemin)
+    return index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Construit les fichiers statiques de l'application")
+    parser.add_argument('--sortie', default=DOSSIER_STATIQUE)
+    parser.add_argument('--polices', default=DOSSIER_POLICES, help="Dossier des fichiers Poppins-<graisse>.woff2")
+    parser.add_argument('--telecharger-polices', action='store_true',
+                        help="Télécharge d'abord les graisses Poppins manquantes (OFL) dans le dossier des polices")
+    args = parser.parse_args()
+    if args.telecharger_polices:
+        for nom in telecharger_polices(args.polices):
+            print(f"⬇️ {os.path.join(args.polices, nom)}")
+    index = construire(args.sortie, args.polices)
+    for nom, fichier in index.items():
+        for f in ([fichier] if isinstance(fichier, str) else fichier):
+            print(f"   {nom:17s} {f:32s} {os.path.getsize(os.path.join(args.sortie, f)) / 1000:7.1f} Ko")
+    if not index['polices']:
+        print(f"ℹ️ Aucune police dans {args.polices} : Poppins reste chargée depuis Google Fonts ; "
+              f"--telecharger-polices pour l'auto-héberger")
+    print(f"✅ {len(index)} entrées dans {os.path.join(args.sortie, NOM_INDEX)}")
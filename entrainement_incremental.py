@@ -0,0 +1,180 @@
+# entrainement_incremental.py - Mise à jour quotidienne du modèle sans tout retélécharger
+#
+# L'historique colonnaire lié au modèle (historique_meteo/) sert de stock local :
+# seule la période qui suit la dernière heure complète est demandée à l'API
+# d'archive, puis ajoutée au stock (nouvelle version). Le modèle reçoit ensuite
+# quelques étapes de boosting supplémentaires (warm start) entraînées sur la fin
+# de l'historique : le coût dépend des nouvelles données, pas de tout l'historique.
+# Si des étapes d'essai dégradent l'erreur sur les derniers jours (contrôle),
+# la mise à jour devient un réentraînement complet.
+# Après MAX_ETAPES_AJOUTEES étapes ajoutées, un réentraînement complet sur la
+# fenêtre glissante de NB_JOURS_HISTORIQUE jours repart de zéro.
+#
+# Usage : python entrainement_incremental.py [--ville rabat] [--complet]
+import argparse
+import copy
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from arbres_compiles import compiler_ensemble
+from construction_features import construire_features
+from entrainer_modele import NB_JOURS_HISTORIQUE, entrainer, preparer_donnees, telecharger_historique
+from historique import lien_absolu, lier_historique, ouvrir_historique
+from precalcul_previsions import precalculer
+from prevision import predire
+from registre_modele import sauvegarder_modele
+from villes import VILLE_DEFAUT, VILLES, trouver_modele
+
+ETAPES_PAR_MISE_A_JOUR = 20
+FENETRE_MISE_A_JOUR_JOURS = 60  # les nouvelles étapes voient au moins ces derniers jours
+MARGE_CONTEXTE_JOURS = 7  # historique nécessaire aux moyennes mobiles (7 jours)
+MAX_ETAPES_AJOUTEES = 200
+# Contrôle avant chaque mise à jour : étapes d'essai entraînées sans les derniers
+# jours de la fenêtre, puis MAE sur ces jours comparée à celle du modèle actuel
+JOURS_CONTROLE = 7
+TOLERANCE_CONTROLE = 0.05  # hausse relative de la MAE acceptée (bruit)
+
+
+def moteur_du_modele(modele):
+    """'hgb' pour un HistGradientBoostingRegressor, 'gbm' sinon"""
+    return 'hgb' if hasattr(modele, '_predictors') else 'gbm'
+
+
+def ajouter_etapes(modele, X, y, nb_etapes=ETAPES_PAR_MISE_A_JOUR):
+    """Ajoute `nb_etapes` arbres entraînés sur (X, y) ; les arbres existants ne changent pas"""
+    if moteur_du_modele(modele) == 'hgb':
+        return _ajouter_etapes_hgb(modele, X, y, nb_etapes)
+    modele.set_params(warm_start=True, n_estimators=modele.n_estimators_ + nb_etapes)
+    modele.fit(X, y)
+    modele.set_params(warm_start=False)
+    return modele
+
+
+def _ajouter_etapes_hgb(modele, X, y, nb_etapes):
+    """Étapes HistGradientBoosting entraînées sur les résidus du modèle, puis ajoutées à ses arbres.
+
+    Le warm start de scikit-learn recalcule les histogrammes (bin mapper) sur les
+    nouvelles données mais évalue les anciens arbres avec leurs anciens seuils de
+    bins : les nouvelles étapes apprendraient de faux résidus.
+    """
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    residus = y - predire(modele, X)
+    params = dict(modele.get_params(), warm_start=False, early_stopping=False, max_iter=nb_etapes)
+    etapes = HistGradientBoostingRegressor(**params).fit(X, residus)
+    # La constante de départ des nouvelles étapes (moyenne des résidus) va dans les feuilles du premier arbre
+    noeuds = etapes._predictors[0][0].nodes
+    noeuds['value'][noeuds['is_leaf'].astype(bool)] += float(np.ravel(etapes._baseline_prediction)[0])
+    modele._predictors.extend(etapes._predictors)
+    modele.set_params(max_iter=modele.n_iter_)  # n_iter_ = len(_predictors)
+    return modele
+
+
+def _mae(modele, X, y):
+    return float(np.mean(np.abs(predire(modele, X) - y)))
+
+
+def verifier_etapes(modele, X, y, nb_etapes=ETAPES_PAR_MISE_A_JOUR, nb_controle=JOURS_CONTROLE * 24):
+    """(MAE avant, MAE après) sur les `nb_controle` dernières lignes, étapes d'essai ajoutées sur les précédentes"""
+    nb_controle = min(nb_controle, len(X) // 4)
+    essai = ajouter_etapes(copy.deepcopy(modele), X[:-nb_controle], y[:-nb_controle], nb_etapes)
+    controle = slice(len(X) - nb_controle, None)
+    return _mae(modele, X[controle], y[controle]), _mae(essai, X[controle], y[controle])
+
+
+def completer_stock(stock, fin, ville=VILLE_DEFAUT):
+    """Télécharge la période manquante et retourne (historique complet, nb de nouvelles heures)"""
+    derniere = stock.derniere_date_complete()
+    if derniere is None:
+        raise ValueError("Historique vide : lancez un entraînement complet (python entrainer_modele.py)")
+
+    # Le jour de la dernière heure complète est redemandé en entier : les heures
+    # encore manquantes dans l'archive (délai de publication) sont ainsi comblées
+    debut = str(derniere.astype('datetime64[D]'))
+    print(f"📥 Téléchargement du {debut} au {fin} (stock : {len(stock)} heures)...")
+    nouveau = telecharger_historique(debut=debut, fin=fin, ville=ville)
+
+    ancien = stock.vers_dataframe()
+    ancien = ancien[ancien['date'] < nouveau['date'].min()]
+    df = pd.concat([ancien, nouveau], ignore_index=True)
+    completes = nouveau.dropna(subset=['temperature', 'humidity'])
+    return df, int((completes['date'] > pd.Timestamp(derniere)).sum())
+
+
+def mettre_a_jour(ville=VILLE_DEFAUT, complet=False, chemin_modele=None):
+    """Complète l'historique du modèle d'une ville puis le met à jour (étapes ajoutées ou réentraînement)"""
+    chemin_modele = chemin_modele or trouver_modele(ville, compact=False)
+    model_data = joblib.load(chemin_modele)
+    ville = model_data.get('ville', ville)
+    lien = model_data.get('historique')
+    if lien is None:
+        raise ValueError("Modèle sans historique lié : convertissez-le d'abord (python historique.py)")
+
+    stock = ouvrir_historique(lien_absolu(lien, chemin_modele))
+    df, nb_nouvelles = completer_stock(stock, datetime.now().strftime("%Y-%m-%d"), ville)
+    if nb_nouvelles == 0 and not complet:
+        print("✅ Aucune nouvelle heure dans l'archive : modèle déjà à jour")
+        return model_data
+
+    features = model_data['features']
+    moteur = moteur_du_modele(model_data['model_temp'])
+    suivi = model_data.get('entrainement', {'etapes_ajoutees': 0})
+    fin = df['date'].max()
+    debut_chrono = time.perf_counter()
+
+    complet = complet or suivi['etapes_ajoutees'] + ETAPES_PAR_MISE_A_JOUR > MAX_ETAPES_AJOUTEES
+    if not complet:
+        # Nouvelles heures + au moins FENETRE_MISE_A_JOUR_JOURS jours récents
+        debut_fenetre = min(fin - pd.Timedelta(hours=nb_nouvelles), fin - pd.Timedelta(days=FENETRE_MISE_A_JOUR_JOURS))
+        recent = df[df['date'] >= debut_fenetre - pd.Timedelta(days=MARGE_CONTEXTE_JOURS)]
+        recent = preparer_donnees(recent, moteur)
+        recent = recent[recent['date'] >= debut_fenetre]
+        X = construire_features(recent['date'], features, recent)
+        cibles = {'temperature': model_data['model_temp'], 'humidity': model_data['model_humidity']}
+        degradees = []
+        for cible, modele in cibles.items():
+            avant, apres = verifier_etapes(modele, X, recent[cible].to_numpy(dtype=np.float64))
+            print(f"   🔎 {cible} : MAE des {JOURS_CONTROLE} derniers jours {avant:.2f} → {apres:.2f}")
+            if apres > avant * (1 + TOLERANCE_CONTROLE):
+                degradees.append(cible)
+        if degradees:
+            print(f"⚠️ Les étapes ajoutées dégradent {', '.join(degradees)} : réentraînement complet")
+            complet = True
+        else:
+            print(f"🧠 {ETAPES_PAR_MISE_A_JOUR} étapes ajoutées par modèle sur {len(recent)} heures récentes...")
+            model_temp, model_humidity = (ajouter_etapes(modele, X, recent[cible].to_numpy(dtype=np.float64))
+                                          for cible, modele in cibles.items())
+            suivi = dict(suivi, etapes_ajoutees=suivi['etapes_ajoutees'] + ETAPES_PAR_MISE_A_JOUR)
+
+    if complet:
+        print(f"🧠 Réentraînement complet sur {NB_JOURS_HISTORIQUE} jours (moteur {moteur})...")
+        fenetre = df[df['date'] > fin - pd.Timedelta(days=NB_JOURS_HISTORIQUE)]
+        model_temp, model_humidity = entrainer(preparer_donnees(fenetre, moteur), features, moteur)
+        suivi = {'etapes_ajoutees': 0, 'dernier_complet': fin.isoformat()}
+    print(f"   ⏱️ {time.perf_counter() - debut_chrono:.1f} s")
+
+    suivi['derniere_heure'] = fin.isoformat()
+    model_data.update({
+        'model_temp': model_temp,
+        'model_humidity': model_humidity,
+        'ensemble_compile': compiler_ensemble({'temperature': model_temp, 'humidity': model_humidity}),
+        'historique': lier_historique(df, chemin_modele),
+        'entrainement': suivi,
+    })
+    precalculer(sauvegarder_modele(model_data, chemin_modele))
+    print(f"✅ {nb_nouvelles} nouvelles heures, modèle sauvegardé : {chemin_modele} "
+          f"({suivi['etapes_ajoutees']} étapes ajoutées depuis le dernier entraînement complet)")
+    return model_data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mise à jour incrémentale du modèle météo")
+    parser.add_argument('--ville', choices=VILLES, default=VILLE_DEFAUT)
+    parser.add_argument('--modele', help="Chemin de l'artefact (par défaut celui de la ville)")
+    parser.add_argument('--complet', action='store_true', help="Force un réentraînement complet")
+    args = parser.parse_args()
+    mettre_a_jour(args.ville, args.complet, args.modele)
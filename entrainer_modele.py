@@ -1,93 +1,195 @@
-# Script pour entraîner le modèle météo Long Terme pour Rabat
-import pandas as pd
+# Script pour entraîner le modèle météo Long Terme d'une ville (Rabat par défaut)
+#
+# Usage : python entrainer_modele.py [--ville rabat] [--moteur hgb|gbm]
+import argparse
+import os
+import time
+
 import numpy as np
-import requests
-import joblib
-from sklearn.ensemble import RandomForestRegressor
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from datetime import datetime, timedelta
 
-print("🌤️ Entraînement du modèle météo Long Terme - Rabat")
-print("=" * 50)
-
-# 1. Récupération des données historiques (3 mois)
-print("\n📥 Téléchargement des données historiques (3 mois)...")
-
-# Dates pour les 3 derniers mois
-end_date = datetime.now().strftime("%Y-%m-%d")
-start_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-
-url = "https://archive-api.open-meteo.com/v1/archive"
-params = {
-    "latitude": 34.0209,
-    "longitude": -6.8416,
-    "start_date": start_date,
-    "end_date": end_date,
-    "hourly": "temperature_2m",
-    "timezone": "GMT"
+from arbres_compiles import compiler_ensemble
+from construction_features import FEATURES_AVANCEES, FEATURES_CONTEXTE, construire_features, contexte_historique
+from historique import lier_historique
+from precalcul_previsions import precalculer
+from prevision import predire_temperature_humidite
+from registre_modele import sauvegarder_modele
+from telechargement_archive import telecharger_archive
+from villes import VILLE_DEFAUT, VILLES, chemin_modele, ville as infos_ville
+
+NB_JOURS_HISTORIQUE = 1826  # 5 ans
+
+PARAMS_GBM = {
+    'n_estimators': 300,
+    'learning_rate': 0.05,
+    'max_depth': 7,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'subsample': 0.8,
+    'random_state': 42,
 }
 
-response = requests.get(url, params=params)
-data = response.json()
-
-print(f"✅ Données récupérées du {start_date} au {end_date}")
-
-# 2. Préparation des données
-print("\n🔧 Préparation des données...")
-
-df = pd.DataFrame({
-    'date': pd.to_datetime(data['hourly']['time']),
-    'temperature': data['hourly']['temperature_2m']
-})
-
-# Création des features
-df['jour_annee'] = df['date'].dt.dayofyear
-df['mois'] = df['date'].dt.month
-df['heure'] = df['date'].dt.hour
-
-# Encodage cyclique (Sin/Cos) pour capturer la saisonnalité
-df['day_cos'] = np.cos(2 * np.pi * df['jour_annee'] / 365.25)
-df['day_sin'] = np.sin(2 * np.pi * df['jour_annee'] / 365.25)
-
-# Suppression des valeurs nulles
-df = df.dropna()
-
-print(f"✅ {len(df)} observations préparées")
-
-# 3. Entraînement du modèle
-print("\n🧠 Entraînement du modèle Random Forest...")
-
-features = ['day_cos', 'day_sin', 'heure', 'mois']
-X = df[features]
-y = df['temperature']
-
-model = RandomForestRegressor(
-    n_estimators=100,
-    max_depth=10,
-    random_state=42,
-    n_jobs=-1
-)
-
-model.fit(X, y)
-
-print("✅ Modèle entraîné avec succès!")
-
-# 4. Sauvegarde du modèle
-print("\n💾 Sauvegarde du modèle...")
-joblib.dump(model, 'cerveau_meteo_long_terme.pkl')
-print("✅ Modèle sauvegardé: cerveau_meteo_long_terme.pkl")
-
-# 5. Test rapide
-print("\n🧪 Test du modèle...")
-test_data = pd.DataFrame({
-    'jour_annee': [datetime.now().timetuple().tm_yday],
-    'mois': [datetime.now().month],
-    'heure': [14]
-})
-test_data['day_cos'] = np.cos(2 * np.pi * test_data['jour_annee'] / 365.25)
-test_data['day_sin'] = np.sin(2 * np.pi * test_data['jour_annee'] / 365.25)
-
-prediction = model.predict(test_data[features])[0]
-print(f"🌡️ Prédiction pour aujourd'hui à 14h: {prediction:.1f}°C")
+# Gradient Boosting par histogrammes : multithreadé, valeurs manquantes gérées
+# nativement, nombre d'itérations choisi par arrêt anticipé
+PARAMS_HGB = {
+    'max_iter': 2000,
+    'learning_rate': 0.05,
+    'max_leaf_nodes': 63,
+    'min_samples_leaf': 20,
+    'l2_regularization': 1.0,
+    'early_stopping': True,
+    'n_iter_no_change': 30,
+    'random_state': 42,
+}
 
-print("\n" + "=" * 50)
-print("✅ TERMINÉ! Vous pouvez maintenant relancer app_meteo.py")
+# Validation = fin de la période (jamais mélangée avec l'entraînement) ; l'arrêt
+# anticipé utilise la tranche de même taille qui la précède
+FRACTION_VALIDATION = 0.1
+
+MOTEURS = ('hgb', 'gbm')
+NOMS_MOTEURS = {'hgb': 'Gradient Boosting par histogrammes', 'gbm': 'Gradient Boosting'}
+
+
+def telecharger_historique(nb_jours=NB_JOURS_HISTORIQUE, debut=None, fin=None, ville=VILLE_DEFAUT):
+    """Télécharge l'historique horaire Open-Meteo et retourne un DataFrame.
+
+    Par défaut les `nb_jours` derniers jours ; `debut` / `fin` ('AAAA-MM-JJ')
+    permettent de ne demander qu'une période précise. La période est
+    téléchargée par blocs annuels en parallèle (telechargement_archive.py).
+    """
+    end_date = fin or datetime.now().strftime("%Y-%m-%d")
+    start_date = debut or (datetime.now() - timedelta(days=nb_jours)).strftime("%Y-%m-%d")
+
+    coordonnees = infos_ville(ville)
+    colonnes = telecharger_archive(start_date, end_date, coordonnees['latitude'], coordonnees['longitude'])
+
+    print(f"✅ Données récupérées du {start_date} au {end_date}")
+    return pd.DataFrame({
+        'date': pd.to_datetime(colonnes['date'], unit='s'),
+        'temperature': colonnes['temperature'],
+        'precipitation': colonnes['precipitation'],
+        'humidity': colonnes['humidity'],
+        'cloud_cover': colonnes['cloud_cover']
+    })
+
+
+def preparer_donnees(df, moteur='hgb'):
+    """Ajoute le contexte météo (nuages, moyennes mobiles) et retire les lignes incomplètes.
+
+    Le moteur 'hgb' accepte des features manquantes : seules les lignes sans
+    cible sont retirées.
+    """
+    df = df.sort_values('date').reset_index(drop=True)
+    contexte = contexte_historique(df['temperature'], df['humidity'], df['cloud_cover'])
+    df = df.assign(**contexte)
+    colonnes = ['temperature', 'humidity'] if moteur == 'hgb' else ['temperature', 'humidity', *contexte]
+    return df.dropna(subset=colonnes).reset_index(drop=True)
+
+
+def _rmse(modele, X, y):
+    return float(np.sqrt(np.mean((modele.predict(X) - y) ** 2)))
+
+
+def entrainer_cible(X, y, moteur='hgb', params=None, evaluer=False):
+    """Entraîne le modèle d'une cible ; retourne (modèle, RMSE de validation ou None).
+
+    La validation est toujours la fin de la période (FRACTION_VALIDATION), jamais
+    vue avant la mesure du RMSE. Moteur 'hgb' : arrêt anticipé sur la tranche
+    de même taille qui la précède, RMSE du modèle arrêté sur la validation, puis
+    réentraînement sur tout l'historique avec le nombre d'itérations retenu.
+    Moteur 'gbm' : la validation n'est calculée que si `evaluer` (un entraînement
+    de plus, sur la même période que 'hgb' pour que les RMSE soient comparables).
+    """
+    coupe = int(len(X) * (1 - FRACTION_VALIDATION))
+    coupe_arret = int(len(X) * (1 - 2 * FRACTION_VALIDATION))
+    if moteur == 'hgb':
+        params = params or PARAMS_HGB
+        modele = HistGradientBoostingRegressor(**params).fit(X[:coupe_arret], y[:coupe_arret],
+                                                             X_val=X[coupe_arret:coupe], y_val=y[coupe_arret:coupe])
+        rmse = _rmse(modele, X[coupe:], y[coupe:])
+        print(f"     {modele.n_iter_} itérations retenues (arrêt anticipé : {coupe - coupe_arret} heures, "
+              f"validation : {len(X) - coupe} dernières heures)")
+        final = dict(params, max_iter=modele.n_iter_, early_stopping=False)
+        return HistGradientBoostingRegressor(**final).fit(X, y), rmse
+
+    params = params or PARAMS_GBM
+    rmse = None
+    if evaluer:
+        rmse = _rmse(GradientBoostingRegressor(**params).fit(X[:coupe_arret], y[:coupe_arret]), X[coupe:], y[coupe:])
+    return GradientBoostingRegressor(**params).fit(X, y), rmse
+
+
+def entrainer(df, features=FEATURES_AVANCEES, moteur='hgb', params=None):
+    """Entraîne un modèle température et un modèle humidité sur les mêmes features"""
+    X = construire_features(df['date'], features, df)
+    modeles = []
+    for cible, nom in (('temperature', 'température'), ('humidity', 'humidité')):
+        y = df[cible].to_numpy(dtype=np.float64)
+        debut = time.perf_counter()
+        print(f"   → Modèle {nom} ({NOMS_MOTEURS[moteur]})...")
+        modele, _ = entrainer_cible(X, y, moteur, params)
+        print(f"     ⏱️ {time.perf_counter() - debut:.1f} s")
+        modeles.append(modele)
+    return tuple(modeles)
+
+
+def main(moteur='hgb', ville=VILLE_DEFAUT):
+    chemin = chemin_modele(ville)
+    print(f"🌤️ Entraînement du modèle météo Long Terme - {infos_ville(ville)['nom']}")
+    print("=" * 50)
+
+    # 1. Récupération des données historiques
+    print(f"\n📥 Téléchargement des données historiques ({NB_JOURS_HISTORIQUE} jours)...")
+    df = telecharger_historique(ville=ville)
+
+    # 2. Préparation des données
+    print("\n🔧 Préparation des données...")
+    df = preparer_donnees(df, moteur)
+    print(f"✅ {len(df)} observations préparées")
+
+    # 3. Entraînement des modèles
+    print(f"\n🧠 Entraînement des modèles (moteur {moteur})...")
+    features = FEATURES_AVANCEES
+    model_temp, model_humidity = entrainer(df, features, moteur)
+    print(f"✅ Modèles entraînés avec succès! ({len(features)} features)")
+
+    # 4. Sauvegarde du modèle (l'historique est stocké à part, en colonnes)
+    print("\n💾 Sauvegarde du modèle...")
+    model_data = {
+        'model_temp': model_temp,
+        'model_humidity': model_humidity,
+        'features': features,
+        # Arbres aplatis en tableaux NumPy : inférence rapide des petits lots
+        'ensemble_compile': compiler_ensemble({'temperature': model_temp, 'humidity': model_humidity}),
+        'historique': lier_historique(df, chemin),
+        'ville': ville,
+    }
+    chemin_servi = sauvegarder_modele(model_data, chemin)
+    print(f"✅ Modèle sauvegardé: {chemin} ({os.path.getsize(chemin) / 1e6:.1f} Mo)")
+    print(f"📦 Artefact compact servi: {chemin_servi} ({os.path.getsize(chemin_servi) / 1e3:.0f} Ko)")
+    precalculer(chemin_servi)  # grille de prévisions servie par l'application et l'API
+
+    # 5. Test rapide
+    print("\n🧪 Test du modèle...")
+    aujourdhui_14h = pd.Timestamp.now().normalize() + pd.Timedelta(hours=14)
+    contexte = {nom: df[nom].iloc[-1] for nom in FEATURES_CONTEXTE}
+    test_data = construire_features([aujourdhui_14h], features, contexte)
+
+    pred_temp, pred_humidity = predire_temperature_humidite(
+        model_temp, model_humidity, test_data, model_data['ensemble_compile'])
+    pred_temp, pred_humidity = pred_temp[0], pred_humidity[0]
+    print(f"🌡️ Prédiction pour aujourd'hui à 14h: {pred_temp:.1f}°C, 💧 {pred_humidity:.0f}%")
+
+    print("\n" + "=" * 50)
+    print("✅ TERMINÉ! Vous pouvez maintenant relancer app_meteo.py")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Entraînement du modèle météo Long Terme")
+    parser.add_argument('--ville', choices=VILLES, default=VILLE_DEFAUT)
+    parser.add_argument('--moteur', choices=MOTEURS, default='hgb',
+                        help="hgb : HistGradientBoosting (rapide, défaut) | gbm : GradientBoosting classique")
+    args = parser.parse_args()
+    main(args.moteur, args.ville)
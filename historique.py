@@ -0,0 +1,262 @@
+# historique.py - Stockage colonnaire de l'historique météo (séparé du modèle)
+#
+# Chaque version de l'historique est un dossier historique_meteo/<version>/
+# contenant un fichier .npy par colonne et un manifest.json. Les fichiers sont
+# ouverts en lecture seule et mappés en mémoire (mmap) : plusieurs processus
+# Streamlit partagent ainsi les mêmes pages au lieu d'en avoir chacun une copie.
+import hashlib
+import json
+import os
+import shutil
+import threading
+import weakref
+from datetime import datetime, timezone
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from calendrier import NB_JOURS_CALENDRIER, composantes_dates, jour_calendrier
+
+RACINE_HISTORIQUE = 'historique_meteo'
+FORMAT_HISTORIQUE = 1
+
+# Variables horaires conservées si elles sont présentes dans le DataFrame
+COLONNES = ('temperature', 'humidity', 'cloud_cover', 'precipitation', 'wind_speed', 'pressure')
+
+
+def _epoch_secondes(dates):
+    """Convertit des dates (Series, Index ou tableau) en int64 secondes depuis 1970"""
+    return np.asarray(dates, dtype='datetime64[s]').astype(np.int64)
+
+
+def sauvegarder_historique(df, racine=RACINE_HISTORIQUE, garder=2):
+    """Écrit l'historique horaire de df en colonnes .npy et retourne le lien {chemin, version}.
+
+    La version est dérivée du contenu : réécrire les mêmes données ne crée pas
+    de nouveau dossier. Seules les `garder` versions les plus récentes sont
+    conservées (les processus qui mappent une ancienne version gardent leurs pages).
+    """
+    df = df.sort_values('date')
+    colonnes = {'date': _epoch_secondes(df['date'])}
+    for nom in COLONNES:
+        if nom in df.columns:
+            colonnes[nom] = df[nom].to_numpy(dtype=np.float32)
+
+    h = hashlib.sha256()
+    for nom, valeurs in colonnes.items():
+        h.update(nom.encode())
+        h.update(np.ascontiguousarray(valeurs).tobytes())
+    version = h.hexdigest()[:12]
+
+    dossier = os.path.join(racine, version)
+    if not os.path.isdir(dossier):
+        temporaire = f"{dossier}.tmp-{os.getpid()}"
+        os.makedirs(temporaire, exist_ok=True)
+        for nom, valeurs in colonnes.items():
+            np.save(os.path.join(temporaire, f"{nom}.npy"), valeurs)
+        manifest = {
+            'format': FORMAT_HISTORIQUE,
+            'version': version,
+            'colonnes': list(colonnes),
+            'nb_lignes': int(len(df)),
+            'debut': str(np.datetime64(int(colonnes['date'][0]), 's')) if len(df) else None,
+            'fin': str(np.datetime64(int(colonnes['date'][-1]), 's')) if len(df) else None,
+            'cree_le': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(temporaire, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporaire, dossier)
+
+    _nettoyer_versions(racine, garder, version)
+    return {'chemin': dossier, 'version': version}
+
+
+def lier_historique(df, chemin_modele):
+    """Sauvegarde l'historique à côté du modèle et retourne le lien à mettre dans l'artefact"""
+    dossier_modele = os.path.dirname(os.path.abspath(chemin_modele))
+    lien = sauvegarder_historique(df, racine=os.path.join(dossier_modele, RACINE_HISTORIQUE))
+    return {'chemin': os.path.relpath(lien['chemin'], dossier_modele), 'version': lien['version']}
+
+
+def _nettoyer_versions(racine, garder, version_courante):
+    """Supprime les versions les plus anciennes au-delà de `garder`"""
+    versions = [
+        os.path.join(racine, nom) for nom in os.listdir(racine)
+        if os.path.isfile(os.path.join(racine, nom, 'manifest.json'))
+    ]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for dossier in versions[garder:]:
+        if os.path.basename(dossier) != version_courante:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+
+class IndexCalendrier:
+    """Index (jour calendaire, heure) -> lignes de l'historique, triées par année.
+
+    Les lignes sont regroupées par case (jour calendaire * 24 + heure) puis par
+    année ; `debuts` donne l'offset de chaque case (366 x 24 cases). Une requête
+    est donc une simple tranche de tableau, quelle que soit la taille de l'historique.
+    """
+
+    def __init__(self, dates):
+        annees, mois, jours, heures = composantes_dates(dates)
+        cases = jour_calendrier(mois, jours) * 24 + heures
+        self.annees = annees.astype(np.int16)
+        self.ordre = np.lexsort((annees, cases))
+        comptes = np.bincount(cases, minlength=NB_JOURS_CALENDRIER * 24)
+        self.debuts = np.concatenate(([0], np.cumsum(comptes)))
+
+    def lignes(self, mois, jour, heure):
+        """Lignes du (mois, jour) à l'heure donnée, une par année (ordre croissant)"""
+        case = jour_calendrier(mois, jour) * 24 + heure
+        return self.ordre[self.debuts[case]:self.debuts[case + 1]]
+
+    def lignes_plage(self, mois, jour, rayon_jours=3, heure=None):
+        """Lignes des jours [jour - rayon, jour + rayon] (toutes heures si heure=None)"""
+        centre = jour_calendrier(mois, jour)
+        morceaux = []
+        for decalage in range(-rayon_jours, rayon_jours + 1):
+            j = (centre + decalage) % NB_JOURS_CALENDRIER
+            if heure is None:
+                debut, fin = self.debuts[j * 24], self.debuts[j * 24 + 24]
+            else:
+                debut, fin = self.debuts[j * 24 + heure], self.debuts[j * 24 + heure + 1]
+            morceaux.append(self.ordre[debut:fin])
+        return np.concatenate(morceaux)
+
+
+class Historique:
+    """Historique horaire en colonnes NumPy (mappées en mémoire ou en RAM)"""
+
+    def __init__(self, colonnes, version=None, manifest=None):
+        self._colonnes = colonnes
+        self.version = version
+        self.manifest = manifest or {}
+        self.dates = colonnes['date'].view('datetime64[s]')
+
+    @classmethod
+    def ouvrir(cls, dossier):
+        """Ouvre un dossier d'historique en lecture seule (mmap)"""
+        with open(os.path.join(dossier, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        colonnes = {
+            nom: np.load(os.path.join(dossier, f"{nom}.npy"), mmap_mode='r')
+            for nom in manifest['colonnes']
+        }
+        return cls(colonnes, manifest['version'], manifest)
+
+    @classmethod
+    def depuis_dataframe(cls, df):
+        """Compatibilité avec les anciens modèles qui embarquent 'historical_data'"""
+        df = df.sort_values('date')
+        colonnes = {'date': _epoch_secondes(df['date'])}
+        for nom in COLONNES:
+            if nom in df.columns:
+                colonnes[nom] = df[nom].to_numpy(dtype=np.float32)
+        return cls(colonnes)
+
+    def derniere_date_complete(self, colonnes=('temperature', 'humidity')):
+        """Dernière heure où toutes les `colonnes` sont renseignées (None si aucune)"""
+        valides = np.ones(len(self), dtype=bool)
+        for nom in colonnes:
+            valides &= ~np.isnan(self._colonnes[nom])
+        positions = np.flatnonzero(valides)
+        return self.dates[positions[-1]] if len(positions) else None
+
+    def vers_dataframe(self, depuis=None):
+        """DataFrame (date + colonnes), éventuellement limité aux dates >= `depuis`"""
+        debut = 0 if depuis is None else int(np.searchsorted(self.dates, np.datetime64(depuis, 's')))
+        donnees = {'date': pd.to_datetime(self.dates[debut:])}
+        for nom, valeurs in self._colonnes.items():
+            if nom != 'date':
+                donnees[nom] = np.asarray(valeurs[debut:], dtype=np.float64)
+        return pd.DataFrame(donnees)
+
+    def octets_ram(self):
+        """Octets hors mmap : colonnes chargées en RAM et index calendaire s'il est construit"""
+        octets = sum(c.nbytes for c in self._colonnes.values() if not isinstance(c, np.memmap))
+        index = self.__dict__.get('index')
+        if index is not None:
+            octets += index.ordre.nbytes + index.annees.nbytes + index.debuts.nbytes
+        return octets
+
+    @cached_property
+    def index(self):
+        """Index calendaire construit au premier accès, puis réutilisé"""
+        return IndexCalendrier(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __contains__(self, nom):
+        return nom in self._colonnes
+
+    def __getitem__(self, nom):
+        return self._colonnes[nom]
+
+
+# Cache faible : un historique reste partagé tant qu'un modèle chargé le référence
+# (ModeleCharge.historique), puis disparaît quand le registre oublie ce modèle
+_verrou = threading.Lock()
+_ouverts = weakref.WeakValueDictionary()
+
+
+def ouvrir_historique(lien):
+    """Retourne l'Historique d'un lien {chemin, version}, ouvert une fois par processus"""
+    cle = (os.path.abspath(lien['chemin']), lien['version'])
+    with _verrou:
+        historique = _ouverts.get(cle)
+        if historique is None:
+            historique = Historique.ouvrir(lien['chemin'])
+            if historique.version != lien['version']:
+                raise ValueError(
+                    f"Historique '{lien['chemin']}' en version {historique.version}, "
+                    f"le modèle attend {lien['version']}. Réentraînez le modèle."
+                )
+            _ouverts[cle] = historique
+        return historique
+
+
+def lien_absolu(lien, chemin_modele):
+    """Lien {chemin, version} de l'artefact, avec le chemin résolu depuis le dossier du modèle"""
+    dossier_modele = os.path.dirname(os.path.abspath(chemin_modele))
+    return dict(lien, chemin=os.path.join(dossier_modele, lien['chemin']))
+
+
+def historique_du_modele(modele_charge):
+    """Historique associé à un ModeleCharge (lien versionné ou ancien DataFrame embarqué)"""
+    model_data = modele_charge.donnees
+    lien = model_data.get('historique')
+    if lien is not None:
+        return ouvrir_historique(lien_absolu(lien, modele_charge.chemin))
+    if model_data.get('historical_data') is None:
+        return None
+    cle = ('embarque', modele_charge.empreinte)
+    with _verrou:
+        historique = _ouverts.get(cle)
+        if historique is None:
+            historique = _ouverts[cle] = Historique.depuis_dataframe(model_data['historical_data'])
+        return historique
+
+
+if __name__ == '__main__':
+    # Conversion d'un ancien modèle : extrait 'historical_data' vers le stockage colonnaire
+    import sys
+
+    import joblib
+
+    from registre_modele import CHEMIN_MODELE, sauvegarder_modele
+
+    chemin_modele = sys.argv[1] if len(sys.argv) > 1 else CHEMIN_MODELE
+    model_data = joblib.load(chemin_modele)
+    df = model_data.pop('historical_data', None)
+    if df is None:
+        print("ℹ️ Ce modèle ne contient pas de 'historical_data' : rien à convertir.")
+        sys.exit(0)
+
+    model_data['historique'] = lier_historique(df, chemin_modele)
+    taille_avant = os.path.getsize(chemin_modele)
+    sauvegarder_modele(model_data, chemin_modele)
+    print(f"✅ Historique ({len(df)} lignes) écrit dans {model_data['historique']['chemin']}")
+    print(f"💾 Modèle : {taille_avant / 1e6:.1f} Mo → {os.path.getsize(chemin_modele) / 1e6:.1f} Mo")
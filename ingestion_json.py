@@ -0,0 +1,105 @@
+# ingestion_json.py - Lecture en flux des réponses horaires Open-Meteo vers des colonnes NumPy
+#
+# json.loads() construit d'abord un dict de listes de floats Python (environ
+# 32 octets par valeur), copiées ensuite dans pandas : le pic mémoire vaut
+# plusieurs fois le résultat final. Ici la réponse est lue morceau par morceau
+# et les nombres de chaque tableau de l'objet "hourly" sont écrits directement
+# dans des tableaux préalloués (int64 pour les dates, float32 pour les variables).
+import re
+
+import numpy as np
+
+TAILLE_MORCEAU = 1 << 16
+
+_DEBUT_HORAIRE = re.compile(rb'"hourly"\s*:\s*\{')
+_DEBUT_TABLEAU = re.compile(rb'\s*,?\s*"([^"]+)"\s*:\s*\[')
+_FIN_OBJET = re.compile(rb'\s*\}')
+
+
+class LecteurHoraire:
+    """Analyseur incrémental de l'objet "hourly" : lire(morceau) puis colonnes()"""
+
+    def __init__(self, variables, nb_lignes=0):
+        self._dtypes = {'time': np.int64, **{variable: np.float32 for variable in variables}}
+        self._colonnes = {nom: np.empty(nb_lignes, dtype=dtype) for nom, dtype in self._dtypes.items()}
+        self._remplies = dict.fromkeys(self._dtypes, 0)
+        self._tampon = b''
+        self._etat = 'avant'  # avant -> cles <-> tableau -> fin
+        self._courante = None
+
+    def lire(self, morceau):
+        """Consomme un morceau (bytes) de la réponse"""
+        if self._etat == 'fin':
+            return
+        self._tampon += morceau
+        while self._avancer():
+            pass
+
+    def _avancer(self):
+        """Une transition de l'automate ; False quand il faut attendre la suite du flux"""
+        if self._etat == 'avant':
+            trouve = _DEBUT_HORAIRE.search(self._tampon)
+            if trouve is None:
+                # On garde la fin : '"hourly":{' peut être coupé entre deux morceaux
+                self._tampon = self._tampon[-32:]
+                return False
+            self._tampon = self._tampon[trouve.end():]
+            self._etat = 'cles'
+            return True
+
+        if self._etat == 'cles':
+            fin = _FIN_OBJET.match(self._tampon)
+            if fin is not None:
+                self._tampon = b''
+                self._etat = 'fin'
+                return False
+            trouve = _DEBUT_TABLEAU.match(self._tampon)
+            if trouve is None:
+                return False
+            self._courante = trouve.group(1).decode()
+            self._tampon = self._tampon[trouve.end():]
+            self._etat = 'tableau'
+            return True
+
+        # Tableau : on ne lit que jusqu'à la dernière virgule (un nombre peut être coupé)
+        fin = self._tampon.find(b']')
+        if fin >= 0:
+            texte, self._tampon = self._tampon[:fin], self._tampon[fin + 1:]
+            self._etat = 'cles'
+        else:
+            coupe = self._tampon.rfind(b',')
+            if coupe < 0:
+                return False
+            texte, self._tampon = self._tampon[:coupe], self._tampon[coupe + 1:]
+        self._ajouter(texte)
+        return fin >= 0
+
+    def _ajouter(self, texte):
+        nom = self._courante
+        if nom not in self._dtypes:
+            return  # variable non demandée
+        valeurs = np.fromstring(texte.replace(b'null', b'nan').decode('ascii'), dtype=self._dtypes[nom], sep=',')
+        debut = self._remplies[nom]
+        colonne = self._colonnes[nom]
+        if debut + len(valeurs) > len(colonne):
+            # Taille annoncée trop petite : on agrandit (rare)
+            colonne = self._colonnes[nom] = np.resize(colonne, max(2 * len(colonne), debut + len(valeurs)))
+        colonne[debut:debut + len(valeurs)] = valeurs
+        self._remplies[nom] = debut + len(valeurs)
+
+    def colonnes(self):
+        """{'time': int64, variable: float32}, toutes de même longueur"""
+        if self._etat != 'fin':
+            raise ValueError("Réponse incomplète : objet 'hourly' non terminé")
+        longueurs = set(self._remplies.values())
+        if len(longueurs) != 1:
+            raise ValueError(f"Colonnes de longueurs différentes : {self._remplies}")
+        return {nom: colonne[:self._remplies[nom]] for nom, colonne in self._colonnes.items()}
+
+
+def lire_flux_horaire(morceaux, variables, nb_lignes=0):
+    """Colonnes horaires d'une réponse JSON fournie par morceaux (ex. reponse.iter_content())"""
+    lecteur = LecteurHoraire(variables, nb_lignes)
+    for morceau in morceaux:
+        lecteur.lire(morceau)
+    return lecteur.colonnes()
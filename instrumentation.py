@@ -0,0 +1,198 @@
+# instrumentation.py - Temps par étape, compteurs et mémoire du processus
+#
+# Les modules mesurent leurs étapes (chargement du modèle, features, predict,
+# requête Open-Meteo, rendu...) avec `mesure(nom)` et comptent les accès aux caches
+# avec `compter(nom)`. Tout est agrégé pour le processus (nombre, total, dernières
+# durées pour les percentiles) :
+#   - instantane() : dict sérialisable (utilisé par GET /metriques de api_meteo.py) ;
+#   - demarrer_ecriture() : un instantané par minute dans un fichier JSONL à rotation
+#     (metriques/metriques.jsonl par défaut, variable METEO_METRIQUES ; vide = désactivé) ;
+#   - demarrer_trace() / trace_courante() : étapes du rerun Streamlit en cours, pour le
+#     panneau « temps de calcul » de la barre latérale.
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    import resource  # Absent sous Windows
+except ImportError:
+    resource = None
+
+CHEMIN_METRIQUES = os.environ.get('METEO_METRIQUES', os.path.join('metriques', 'metriques.jsonl'))
+INTERVALLE_ECRITURE_S = float(os.environ.get('METEO_METRIQUES_INTERVALLE', '60'))
+TAILLE_MAX_FICHIER = 1_000_000  # octets avant rotation
+FICHIERS_GARDES = 3  # metriques.jsonl.1 ... .3
+DUREES_GARDEES = 1024  # dernières durées par étape, pour p50 / p95
+
+_verrou = threading.Lock()
+_etapes = {}  # nom -> {'n', 'total_ms', 'max_ms', 'recentes'}
+_compteurs = {}
+_debut_processus = time.time()
+_trace = contextvars.ContextVar('trace', default=None)
+_ecriture = None
+
+
+def memoire_processus():
+    """Retourne la mémoire résidente (RSS) du processus en octets, ou None"""
+    try:
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                if ligne.startswith('VmRSS:'):
+                    return int(ligne.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        # ru_maxrss est le pic (Ko, octets sous macOS) : approximation acceptable
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pic if sys.platform == 'darwin' else pic * 1024
+    return None
+
+
+def enregistrer(nom, duree_ms):
+    """Ajoute une durée (ms) à l'étape `nom` et à la trace en cours"""
+    with _verrou:
+        etape = _etapes.get(nom)
+        if etape is None:
+            etape = _etapes[nom] = {'n': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'recentes': deque(maxlen=DUREES_GARDEES)}
+        etape['n'] += 1
+        etape['total_ms'] += duree_ms
+        etape['max_ms'] = max(etape['max_ms'], duree_ms)
+        etape['recentes'].append(duree_ms)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((nom, duree_ms))
+
+
+@contextlib.contextmanager
+def mesure(nom):
+    """Chronomètre le bloc sous le nom d'étape `nom` (durée enregistrée même en cas d'exception)"""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        enregistrer(nom, (time.perf_counter() - debut) * 1000)
+
+
+def compter(nom, n=1):
+    """Incrémente le compteur `nom` (accès cache, appels API...)"""
+    with _verrou:
+        _compteurs[nom] = _compteurs.get(nom, 0) + n
+
+
+class SuiteEtapes:
+    """Étapes successives d'un script (page Streamlit) : chaque `etape()` clôt la précédente"""
+
+    def __init__(self):
+        self.nom = None
+        self.debut = None
+
+    def etape(self, nom):
+        """Termine l'étape en cours et commence `nom`"""
+        self.fin()
+        self.nom = nom
+        self.debut = time.perf_counter()
+
+    def fin(self):
+        """Termine l'étape en cours (sans effet s'il n'y en a pas)"""
+        if self.nom is not None:
+            enregistrer(self.nom, (time.perf_counter() - self.debut) * 1000)
+            self.nom = None
+
+
+def demarrer_trace():
+    """Commence la trace des étapes du thread courant (un rerun Streamlit) et la retourne"""
+    trace = []
+    _trace.set(trace)
+    return trace
+
+
+def trace_courante():
+    """[(étape, ms), ...] enregistrées depuis demarrer_trace() dans ce thread, ou None"""
+    return _trace.get()
+
+
+def instantane():
+    """État des métriques du processus : étapes (n, moyenne, p50, p95, max), compteurs, RSS"""
+    with _verrou:
+        etapes = {nom: dict(e, recentes=np.array(e['recentes'])) for nom, e in _etapes.items()}
+        compteurs = dict(_compteurs)
+    rss = memoire_processus()
+    return {
+        'horodatage': time.time(),
+        'pid': os.getpid(),
+        'duree_processus_s': round(time.time() - _debut_processus, 1),
+        'rss_mo': None if rss is None else round(rss / 1e6, 1),
+        'etapes': {
+            nom: {
+                'n': e['n'],
+                'moyenne_ms': round(e['total_ms'] / e['n'], 3),
+                'p50_ms': round(float(np.percentile(e['recentes'], 50)), 3),
+                'p95_ms': round(float(np.percentile(e['recentes'], 95)), 3),
+                'max_ms': round(e['max_ms'], 3),
+            }
+            for nom, e in sorted(etapes.items())
+        },
+        'compteurs': dict(sorted(compteurs.items())),
+    }
+
+
+def format_prometheus(metriques=None):
+    """Instantané au format texte Prometheus (scrapé par l'outil de supervision)"""
+    metriques = metriques or instantane()
+    lignes = []
+    if metriques['rss_mo'] is not None:
+        lignes.append(f"meteo_rss_octets {metriques['rss_mo'] * 1e6:.0f}")
+    for nom, e in metriques['etapes'].items():
+        lignes.append(f'meteo_etape_total{{etape="{nom}"}} {e["n"]}')
+        for cle in ('p50_ms', 'p95_ms', 'max_ms'):
+            lignes.append(f'meteo_etape_{cle}{{etape="{nom}"}} {e[cle]}')
+    for nom, valeur in metriques['compteurs'].items():
+        lignes.append(f'meteo_compteur{{nom="{nom}"}} {valeur}')
+    return '\n'.join(lignes) + '\n'
+
+
+def _tourner(chemin):
+    """metriques.jsonl -> .1 -> .2 ... (le plus ancien est supprimé)"""
+    for i in range(FICHIERS_GARDES - 1, 0, -1):
+        if os.path.exists(f"{chemin}.{i}"):
+            os.replace(f"{chemin}.{i}", f"{chemin}.{i + 1}")
+    os.replace(chemin, f"{chemin}.1")
+
+
+def ecrire_instantane(chemin=CHEMIN_METRIQUES):
+    """Ajoute un instantané au fichier JSONL, après rotation s'il dépasse TAILLE_MAX_FICHIER"""
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    if os.path.exists(chemin) and os.path.getsize(chemin) > TAILLE_MAX_FICHIER:
+        _tourner(chemin)
+    with open(chemin, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(instantane(), ensure_ascii=False) + '\n')
+
+
+def demarrer_ecriture(chemin=CHEMIN_METRIQUES, intervalle=INTERVALLE_ECRITURE_S):
+    """Écrit un instantané toutes les `intervalle` secondes (un seul thread par processus)"""
+    global _ecriture
+    if not chemin:
+        return None
+    with _verrou:
+        if _ecriture is not None:
+            return _ecriture
+
+        def boucle():
+            while True:
+                time.sleep(intervalle)
+                try:
+                    ecrire_instantane(chemin)
+                except OSError:
+                    pass  # disque plein ou dossier en lecture seule : les métriques restent en mémoire
+
+        _ecriture = threading.Thread(target=boucle, name='metriques', daemon=True)
+        _ecriture.start()
+        return _ecriture
+
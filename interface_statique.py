@@ -0,0 +1,84 @@
+# interface_statique.py - Ressources fixes de la page (CSS, logo, icônes PWA, manifeste)
+#
+# Streamlit réexécute app_meteo.py à chaque interaction, mais ce module n'est
+# importé qu'une fois par processus : tout est lu au premier appel puis réutilisé.
+#
+# Si construire_assets.py a produit static/assets.json (et que Streamlit sert static/,
+# server.enableStaticServing), la page ne contient que des liens vers ces fichiers
+# aux noms hachés, gardés en cache par le navigateur. Sinon, repli sur l'ancien
+# fonctionnement : CSS et icône injectés dans la page.
+import base64
+import json
+import os
+from functools import lru_cache
+
+DOSSIER_STATIQUE = 'static'
+URL_STATIQUE = 'app/static'  # relative à la page, comme le recommande Streamlit
+CHEMIN_INDEX = os.path.join(DOSSIER_STATIQUE, 'assets.json')
+CHEMIN_CSS = os.path.join('assets', 'style.css')
+CHEMIN_LOGO = 'meteo.jpg'
+CHEMIN_ICONE = 'apple-touch-icon.png'
+LOGO_DEFAUT = "🌤️"
+
+BALISES_APPLE = '''
+        <meta name="apple-mobile-web-app-capable" content="yes">
+        <meta name="apple-mobile-web-app-status-bar-style" content="default">
+        <meta name="apple-mobile-web-app-title" content="Météo Maroc">
+'''
+
+
+@lru_cache(maxsize=None)
+def assets():
+    """{nom logique: fichier} de static/assets.json, {} si les fichiers statiques ne sont pas construits"""
+    try:
+        with open(CHEMIN_INDEX, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Index d'une autre construction que les fichiers présents : on ne s'en sert pas
+    fichiers = [v for v in index.values() if isinstance(v, str)]
+    if not all(os.path.exists(os.path.join(DOSSIER_STATIQUE, f)) for f in fichiers):
+        return {}
+    return index
+
+
+def _lire(chemin):
+    try:
+        with open(chemin, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def logo():
+    """Icône de la page : logo réduit (ou meteo.jpg) lu une fois, emoji si absent"""
+    index = assets()
+    octets = _lire(os.path.join(DOSSIER_STATIQUE, index['logo'])) if 'logo' in index else None
+    return octets or _lire(CHEMIN_LOGO) or LOGO_DEFAUT
+
+
+@lru_cache(maxsize=None)
+def entete(statique_servi=True):
+    """HTML de tête de page : liens vers les fichiers statiques, sinon CSS et icône en ligne"""
+    index = assets() if statique_servi else {}
+    if index:
+        url = {nom: f"{URL_STATIQUE}/{fichier}" for nom, fichier in index.items() if isinstance(fichier, str)}
+        return f'''
+        <link rel="stylesheet" href="{url['css']}">
+        <link rel="manifest" href="{url['manifeste']}">
+        <link rel="apple-touch-icon" sizes="180x180" href="{url['apple_touch_icon']}">
+        <link rel="icon" type="image/png" sizes="192x192" href="{url['icone_192']}">
+        <link rel="icon" type="image/png" sizes="32x32" href="{url['favicon']}">
+''' + BALISES_APPLE
+
+    css = _lire(CHEMIN_CSS)
+    html = f"<style>\n{css.decode('utf-8')}</style>\n" if css else ''
+    icone = _lire(CHEMIN_ICONE)
+    if icone:
+        icone = base64.b64encode(icone).decode()
+        html += f'''
+        <link rel="apple-touch-icon" href="data:image/png;base64,{icone}">
+        <link rel="icon" type="image/png" sizes="192x192" href="data:image/png;base64,{icone}">
+''' + BALISES_APPLE
+    return html
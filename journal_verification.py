@@ -0,0 +1,248 @@
+# journal_verification.py - Journal des prévisions émises et vérification contre les observations
+#
+# Chaque grille de prévision calculée (precalcul_previsions.py) est ajoutée au
+# journal de sa ville : une ligne binaire de taille fixe par heure prévue
+# (émission, cible, version du modèle, température, humidité), dans une
+# partition par mois d'émission (modeles/<ville>/journal/previsions/AAAA-MM.bin).
+# Les fichiers ne sont jamais réécrits, seulement complétés.
+#
+# La vérification (à lancer chaque nuit) lit les partitions utiles bloc par bloc
+# (np.memmap, mémoire bornée), compare les cibles aux observations de l'archive,
+# ajoute les erreurs à journal/verifications/ (partition par mois de la cible) et
+# recalcule la compétence glissante par échéance dans journal/competence.json.
+# L'application, l'API et le précalcul peuvent journaliser la même grille : une
+# seule prévision est vérifiée par (jour d'émission, version, cible), la première.
+#
+# Usage : python journal_verification.py [--villes rabat casablanca]
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from villes import VILLES, trouver_modele, ville as infos_ville
+
+DOSSIER_JOURNAL = 'journal'
+
+# Une ligne par heure prévue (36 octets)
+LIGNE_PREVISION = np.dtype([
+    ('emission', '<i8'),  # secondes Unix
+    ('cible', '<i8'),
+    ('version', 'S12'),
+    ('temperature', '<f4'),
+    ('humidity', '<f4'),
+])
+# Une ligne par heure vérifiée : erreur = prévu - observé
+LIGNE_VERIFICATION = np.dtype([
+    ('emission', '<i8'),
+    ('cible', '<i8'),
+    ('version', 'S12'),
+    ('erreur_temperature', '<f4'),
+    ('erreur_humidity', '<f4'),
+])
+
+LIGNES_PAR_BLOC = 1 << 18  # ~9 Mo lus à la fois, quelle que soit la taille du journal
+ECHEANCE_MAX_JOURS = 31  # une cible est au plus à HORIZON_MAX_JOURS (+1) jours de son émission
+FENETRE_COMPETENCE_JOURS = 30
+ECHEANCES_SURVEILLEES = (1, 2, 3)
+SEUIL_MAE_TEMPERATURE = 3.0  # °C sur les échéances surveillées : au-delà, réentraînement conseillé
+
+_verrou = threading.Lock()
+
+
+def dossier_journal(chemin_modele):
+    """Dossier du journal d'un modèle (à côté de l'artefact)"""
+    return os.path.join(os.path.dirname(chemin_modele), DOSSIER_JOURNAL)
+
+
+def _mois(secondes):
+    return np.asarray(secondes, dtype=np.int64).astype('datetime64[s]').astype('datetime64[M]')
+
+
+def _ajouter(dossier, mois, lignes):
+    """Ajoute les lignes à la fin de leurs partitions mensuelles (une écriture par partition)"""
+    os.makedirs(dossier, exist_ok=True)
+    with _verrou:
+        for m in np.unique(mois):
+            with open(os.path.join(dossier, f"{m}.bin"), 'ab') as f:
+                f.write(lignes[mois == m].tobytes())
+
+
+def lire_partitions(dossier, type_ligne, debut, fin):
+    """Blocs de lignes (vues mappées en mémoire) des partitions des mois de `debut` à `fin` (secondes)"""
+    for mois in np.arange(_mois(debut), _mois(fin) + 1):
+        chemin = os.path.join(dossier, f"{mois}.bin")
+        if not os.path.exists(chemin):
+            continue
+        nb_lignes = os.path.getsize(chemin) // type_ligne.itemsize  # ligne finale incomplète ignorée
+        if nb_lignes == 0:
+            continue
+        lignes = np.memmap(chemin, dtype=type_ligne, mode='r', shape=(nb_lignes,))
+        for i in range(0, nb_lignes, LIGNES_PAR_BLOC):
+            yield lignes[i:i + LIGNES_PAR_BLOC]
+
+
+def journaliser(modele_charge, grille, emission=None):
+    """Ajoute au journal les prévisions horaires d'une grille qui vient d'être calculée"""
+    emission = int(time.time()) if emission is None else int(emission)
+    cibles = grille.jours.astype('datetime64[s]')[:, None] + np.arange(24) * np.timedelta64(3600, 's')
+    lignes = np.empty(cibles.size, LIGNE_PREVISION)
+    lignes['emission'] = emission
+    lignes['cible'] = cibles.ravel().astype(np.int64)
+    lignes['version'] = modele_charge.version
+    lignes['temperature'] = grille.temperature.ravel()
+    lignes['humidity'] = grille.humidity.ravel()
+    dossier = os.path.join(dossier_journal(modele_charge.chemin), 'previsions')
+    _ajouter(dossier, _mois(np.full(len(lignes), emission)), lignes)
+    return len(lignes)
+
+
+def _lire_etat(dossier):
+    try:
+        with open(os.path.join(dossier, 'competence.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _premiere_emission(dossier):
+    """Début du premier mois journalisé (secondes), ou None"""
+    partitions = sorted(nom for nom in os.listdir(dossier) if nom.endswith('.bin')) if os.path.isdir(dossier) else []
+    if not partitions:
+        return None
+    return int(np.datetime64(partitions[0][:-4], 'M').astype('datetime64[s]').astype(np.int64))
+
+
+def _observations(code_ville, debut, fin):
+    """(première heure en secondes, {température, humidité} horaires) de l'archive, NaN si manquant"""
+    from telechargement_archive import telecharger_archive
+
+    v = infos_ville(code_ville)
+    colonnes = telecharger_archive(str(np.datetime64(debut, 's').astype('datetime64[D]')),
+                                   str(np.datetime64(fin, 's').astype('datetime64[D]')),
+                                   v['latitude'], v['longitude'])
+    t0 = int(np.datetime64(debut, 's').astype('datetime64[D]').astype('datetime64[s]').astype(np.int64))
+    nb_heures = (int(np.datetime64(fin, 's').astype(np.int64)) - t0) // 3600 + 24
+    rang = (colonnes['date'].astype(np.int64) - t0) // 3600
+    dedans = (rang >= 0) & (rang < nb_heures)
+    observees = {}
+    for nom in ('temperature', 'humidity'):
+        serie = np.full(nb_heures, np.nan, dtype=np.float32)
+        serie[rang[dedans]] = colonnes[nom][dedans]
+        observees[nom] = serie
+    return t0, observees
+
+
+def competence(dossier, fin, fenetre_jours=FENETRE_COMPETENCE_JOURS):
+    """n / MAE / RMSE / biais par échéance (jours) des cibles vérifiées sur les `fenetre_jours` derniers jours"""
+    debut = fin - fenetre_jours * 86400
+    taille = ECHEANCE_MAX_JOURS + 1
+    sommes = {nom: np.zeros((3, taille)) for nom in ('temperature', 'humidity')}
+    n = np.zeros(taille)
+    for bloc in lire_partitions(os.path.join(dossier, 'verifications'), LIGNE_VERIFICATION, debut, fin):
+        bloc = bloc[(bloc['cible'] > debut) & (bloc['cible'] <= fin)]
+        echeance = np.clip(bloc['cible'] // 86400 - bloc['emission'] // 86400, 0, ECHEANCE_MAX_JOURS)
+        n += np.bincount(echeance, minlength=taille)
+        for nom, s in sommes.items():
+            erreur = bloc[f'erreur_{nom}'].astype(np.float64)
+            s[0] += np.bincount(echeance, np.abs(erreur), minlength=taille)
+            s[1] += np.bincount(echeance, erreur ** 2, minlength=taille)
+            s[2] += np.bincount(echeance, erreur, minlength=taille)
+
+    echeances = []
+    for j in np.flatnonzero(n):
+        ligne = {'echeance_jours': int(j), 'n': int(n[j])}
+        for nom, s in sommes.items():
+            ligne[nom] = {'MAE': float(s[0, j] / n[j]), 'RMSE': float(np.sqrt(s[1, j] / n[j])),
+                          'Biais': float(s[2, j] / n[j])}
+        echeances.append(ligne)
+    return echeances
+
+
+def _premieres_emissions(lignes):
+    """Une ligne par (jour d'émission, version, cible) : la plus ancienne (grilles journalisées plusieurs fois)"""
+    lignes = lignes[np.argsort(lignes['emission'], kind='stable')]
+    cles = np.empty(len(lignes), [('jour', '<i8'), ('version', 'S12'), ('cible', '<i8')])
+    cles['jour'] = lignes['emission'] // 86400
+    cles['version'] = lignes['version']
+    cles['cible'] = lignes['cible']
+    _, premieres = np.unique(cles, return_index=True)
+    return lignes[np.sort(premieres)]
+
+
+def verifier(code_ville, chemin_modele=None, fin=None):
+    """Vérifie les prévisions dont la cible est maintenant observée et met à jour la compétence glissante"""
+    chemin_modele = chemin_modele or trouver_modele(code_ville)
+    dossier = dossier_journal(chemin_modele)
+    etat = _lire_etat(dossier)
+    debut = etat.get('verifie_jusqu_a') or _premiere_emission(os.path.join(dossier, 'previsions'))
+    if debut is None:
+        print(f"ℹ️ {VILLES[code_ville]['nom']} : journal vide, rien à vérifier")
+        return etat
+    fin = fin or int(np.datetime64(date.today() - timedelta(days=1), 's').astype(np.int64)) + 23 * 3600
+    if fin <= debut:
+        return etat
+
+    # Observations de la période ; seules les heures jusqu'à la dernière observée sont vérifiées
+    t0, observees = _observations(code_ville, debut, fin)
+    completes = np.flatnonzero(~np.isnan(observees['temperature']) & ~np.isnan(observees['humidity']))
+    if len(completes) == 0 or t0 + 3600 * int(completes[-1]) <= debut:
+        print(f"ℹ️ {VILLES[code_ville]['nom']} : pas encore d'observation après la dernière vérification")
+        return etat
+    fin = t0 + 3600 * int(completes[-1])
+
+    verifiees = []
+    for bloc in lire_partitions(os.path.join(dossier, 'previsions'), LIGNE_PREVISION,
+                                debut - ECHEANCE_MAX_JOURS * 86400, fin):
+        bloc = bloc[(bloc['cible'] > debut) & (bloc['cible'] <= fin)]
+        rang = (bloc['cible'] - t0) // 3600
+        lignes = np.empty(len(bloc), LIGNE_VERIFICATION)
+        for champ in ('emission', 'cible', 'version'):
+            lignes[champ] = bloc[champ]
+        for nom in ('temperature', 'humidity'):
+            lignes[f'erreur_{nom}'] = bloc[nom] - observees[nom][rang]
+        verifiees.append(lignes[~np.isnan(lignes['erreur_temperature']) & ~np.isnan(lignes['erreur_humidity'])])
+    # Les doublons d'une même grille peuvent être dans des blocs différents : dédoublonnés sur toute la période
+    lignes = _premieres_emissions(np.concatenate(verifiees)) if verifiees else np.empty(0, LIGNE_VERIFICATION)
+    _ajouter(os.path.join(dossier, 'verifications'), _mois(lignes['cible']), lignes)
+    nb_verifiees = len(lignes)
+
+    echeances = competence(dossier, fin)
+    surveillees = [e for e in echeances if e['echeance_jours'] in ECHEANCES_SURVEILLEES]
+    nb = sum(e['n'] for e in surveillees)
+    mae = sum(e['temperature']['MAE'] * e['n'] for e in surveillees) / nb if nb else None
+    etat = {
+        'mis_a_jour_le': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'verifie_jusqu_a': fin,
+        'fenetre_jours': FENETRE_COMPETENCE_JOURS,
+        'mae_temperature_surveillee': mae,
+        'reentrainement_conseille': mae is not None and mae > SEUIL_MAE_TEMPERATURE,
+        'echeances': echeances,
+    }
+    temporaire = os.path.join(dossier, f"competence.json.tmp-{os.getpid()}")
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(etat, f, indent=2, ensure_ascii=False)
+    os.replace(temporaire, os.path.join(dossier, 'competence.json'))
+
+    print(f"✅ {VILLES[code_ville]['nom']} : {nb_verifiees} heures vérifiées jusqu'au "
+          f"{np.datetime64(fin, 's')}")
+    return etat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Vérification nocturne des prévisions journalisées")
+    parser.add_argument('--villes', nargs='+', choices=VILLES, default=list(VILLES))
+    args = parser.parse_args()
+    for code in args.villes:
+        if not os.path.isdir(dossier_journal(trouver_modele(code))):
+            continue
+        etat = verifier(code)
+        for e in etat.get('echeances', [])[:7]:
+            print(f"   J+{e['echeance_jours']} : MAE {e['temperature']['MAE']:.2f} °C | "
+                  f"biais {e['temperature']['Biais']:+.2f} °C | {e['n']} heures")
+        if etat.get('reentrainement_conseille'):
+            print(f"⚠️ MAE {etat['mae_temperature_surveillee']:.2f} °C à J+1..J+3 : "
+                  f"python entrainement_incremental.py --ville {code} --complet")
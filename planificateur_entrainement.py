@@ -0,0 +1,202 @@
+# planificateur_entrainement.py - Entraînement parallèle de plusieurs villes / cibles / configurations
+#
+# 1. L'historique de chaque ville est téléchargé une seule fois (blocs en cache
+#    disque, telechargement_archive.py) et écrit dans son stockage colonnaire.
+# 2. Chaque tâche (ville x cible x configuration) tourne dans un processus du
+#    pool : elle mappe l'historique en mémoire (pages partagées entre processus),
+#    entraîne un modèle et l'écrit comme candidat.
+# 3. Pour chaque ville, le meilleur candidat de chaque cible (RMSE sur la fin de
+#    la période) forme l'artefact final ; un manifeste JSON résume tout le lot.
+#
+# Usage :
+#   python planificateur_entrainement.py --villes rabat casablanca --configs hgb hgb_profond
+#   python planificateur_entrainement.py --toutes-villes --threads-par-tache 2 --memoire-max-mo 2048
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+from arbres_compiles import compiler_ensemble
+from construction_features import FEATURES_AVANCEES, construire_features
+from entrainer_modele import PARAMS_GBM, PARAMS_HGB, entrainer_cible, preparer_donnees, telecharger_historique
+from historique import lien_absolu, lier_historique, ouvrir_historique
+from precalcul_previsions import precalculer
+from registre_modele import sauvegarder_modele
+from villes import DOSSIER_MODELES, VILLE_DEFAUT, VILLES, chemin_modele
+
+try:
+    import resource  # Absent sous Windows
+except ImportError:
+    resource = None
+
+CIBLES = ('temperature', 'humidity')
+
+# Configurations d'hyperparamètres comparées par le planificateur
+CONFIGS = {
+    'hgb': {'moteur': 'hgb', 'params': PARAMS_HGB},
+    'hgb_profond': {'moteur': 'hgb', 'params': dict(PARAMS_HGB, max_leaf_nodes=127, learning_rate=0.03)},
+    'gbm': {'moteur': 'gbm', 'params': PARAMS_GBM},
+}
+
+CHEMIN_MANIFESTE = os.path.join(DOSSIER_MODELES, 'manifeste_entrainement.json')
+
+
+def _initialiser_processus(threads_par_tache, memoire_max_mo):
+    """Limites de ressources de chaque processus du pool"""
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=threads_par_tache)  # OpenMP (HistGradientBoosting) et BLAS
+    if memoire_max_mo and resource is not None:
+        octets = memoire_max_mo * 1_000_000
+        resource.setrlimit(resource.RLIMIT_AS, (octets, octets))
+
+
+def executer_tache(tache):
+    """Une tâche (exécutée dans un processus du pool) ; retourne sa ligne de manifeste"""
+    debut = time.perf_counter()
+    config = CONFIGS[tache['config']]
+    historique = ouvrir_historique(tache['historique'])
+    df = preparer_donnees(historique.vers_dataframe(), config['moteur'])
+    X = construire_features(df['date'], tache['features'], df)
+    y = df[tache['cible']].to_numpy(dtype=np.float64)
+
+    modele, rmse = entrainer_cible(X, y, config['moteur'], config['params'], evaluer=tache['evaluer'])
+    os.makedirs(os.path.dirname(tache['candidat']), exist_ok=True)
+    joblib.dump(modele, tache['candidat'])
+    return {
+        'ville': tache['ville'],
+        'cible': tache['cible'],
+        'config': tache['config'],
+        'statut': 'ok',
+        'rmse_validation': rmse,
+        'nb_lignes': len(df),
+        'duree_s': round(time.perf_counter() - debut, 2),
+        'candidat': tache['candidat'],
+        'pid': os.getpid(),
+    }
+
+
+def _assembler(ville, resultats, historique_lien, features):
+    """Artefact d'une ville à partir du meilleur candidat de chaque cible"""
+    meilleurs = {}
+    for cible in CIBLES:
+        candidats = [r for r in resultats if r['cible'] == cible and r['statut'] == 'ok']
+        if not candidats:
+            return None
+        meilleurs[cible] = min(candidats, key=lambda r: np.inf if r['rmse_validation'] is None else r['rmse_validation'])
+
+    modeles = {cible: joblib.load(r['candidat']) for cible, r in meilleurs.items()}
+    chemin = chemin_modele(ville)
+    rmse_validation = {cible: r['rmse_validation'] for cible, r in meilleurs.items()}
+    chemin_servi = sauvegarder_modele({
+        'model_temp': modeles['temperature'],
+        'model_humidity': modeles['humidity'],
+        'features': features,
+        'ensemble_compile': compiler_ensemble(modeles),
+        'historique': historique_lien,
+        'ville': ville,
+        'metriques': {'rmse_validation': rmse_validation},
+    }, chemin)
+    shutil.rmtree(os.path.join(os.path.dirname(chemin), 'candidats'), ignore_errors=True)
+    precalculer(chemin_servi)
+    return {
+        'ville': ville,
+        'chemin': chemin,
+        'taille_mo': round(os.path.getsize(chemin) / 1e6, 2),
+        'taille_compact_ko': round(os.path.getsize(chemin_servi) / 1e3, 1),
+        'configs': {cible: r['config'] for cible, r in meilleurs.items()},
+        'rmse_validation': rmse_validation,
+    }
+
+
+def planifier(villes, configs=('hgb',), nb_processus=None, threads_par_tache=1, memoire_max_mo=None,
+              features=FEATURES_AVANCEES, chemin_manifeste=CHEMIN_MANIFESTE):
+    """Entraîne toutes les villes demandées et retourne le manifeste"""
+    debut = time.perf_counter()
+    nb_processus = nb_processus or max(1, (os.cpu_count() or 1) // threads_par_tache)
+
+    # 1. Historique brut : un téléchargement par ville, partagé par toutes ses tâches
+    liens = {}
+    for ville in villes:
+        print(f"📥 {VILLES[ville]['nom']} : historique...")
+        chemin = chemin_modele(ville)
+        liens[ville] = lier_historique(telecharger_historique(ville=ville), chemin)
+    duree_telechargement = time.perf_counter() - debut
+
+    # 2. Tâches ville x cible x configuration
+    taches = [
+        {
+            'ville': ville,
+            'cible': cible,
+            'config': config,
+            'features': list(features),
+            'evaluer': len(configs) > 1,
+            'historique': lien_absolu(liens[ville], chemin_modele(ville)),
+            'candidat': os.path.join(os.path.dirname(chemin_modele(ville)), 'candidats', f"{cible}-{config}.pkl"),
+        }
+        for ville in villes for cible in CIBLES for config in configs
+    ]
+    print(f"🧠 {len(taches)} tâches sur {nb_processus} processus ({threads_par_tache} thread(s) chacun)...")
+    resultats = []
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus,
+                             initargs=(threads_par_tache, memoire_max_mo)) as pool:
+        futures = {pool.submit(executer_tache, tache): tache for tache in taches}
+        for future in as_completed(futures):
+            tache = futures[future]
+            try:
+                resultat = future.result()
+                print(f"   ✅ {tache['ville']} / {tache['cible']} / {tache['config']} : {resultat['duree_s']:.1f} s")
+            except Exception as e:  # MemoryError, processus tué, données invalides...
+                resultat = {k: tache[k] for k in ('ville', 'cible', 'config')}
+                resultat.update(statut='echec', erreur=f"{type(e).__name__}: {e}")
+                print(f"   ❌ {tache['ville']} / {tache['cible']} / {tache['config']} : {resultat['erreur']}")
+            resultats.append(resultat)
+
+    # 3. Un artefact par ville
+    artefacts = []
+    for ville in villes:
+        artefact = _assembler(ville, [r for r in resultats if r['ville'] == ville], liens[ville], list(features))
+        if artefact is None:
+            print(f"⚠️ {VILLES[ville]['nom']} : aucun modèle complet, artefact non modifié")
+        else:
+            artefacts.append(artefact)
+            print(f"💾 {VILLES[ville]['nom']} : {artefact['chemin']} ({artefact['taille_mo']} Mo, "
+                  f"compact {artefact['taille_compact_ko']} Ko)")
+
+    manifeste = {
+        'cree_le': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'duree_totale_s': round(time.perf_counter() - debut, 2),
+        'duree_telechargement_s': round(duree_telechargement, 2),
+        'nb_processus': nb_processus,
+        'threads_par_tache': threads_par_tache,
+        'memoire_max_mo': memoire_max_mo,
+        'configs': list(configs),
+        'taches': sorted(resultats, key=lambda r: (r['ville'], r['cible'], r['config'])),
+        'artefacts': artefacts,
+    }
+    os.makedirs(os.path.dirname(chemin_manifeste), exist_ok=True)
+    temporaire = f"{chemin_manifeste}.tmp-{os.getpid()}"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=2, ensure_ascii=False)
+    os.replace(temporaire, chemin_manifeste)
+    print(f"📋 Manifeste : {chemin_manifeste} ({manifeste['duree_totale_s']:.0f} s au total)")
+    return manifeste
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Entraînement parallèle des modèles de plusieurs villes")
+    parser.add_argument('--villes', nargs='+', choices=VILLES, default=[VILLE_DEFAUT])
+    parser.add_argument('--toutes-villes', action='store_true')
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=['hgb'])
+    parser.add_argument('--processus', type=int, help="Taille du pool (défaut : CPU / threads par tâche)")
+    parser.add_argument('--threads-par-tache', type=int, default=1)
+    parser.add_argument('--memoire-max-mo', type=int, help="Plafond mémoire de chaque processus (Unix)")
+    args = parser.parse_args()
+    planifier(list(VILLES) if args.toutes_villes else args.villes, args.configs, args.processus,
+              args.threads_par_tache, args.memoire_max_mo)
@@ -0,0 +1,163 @@
+# precalcul_previsions.py - Grille de prévisions précalculée, partagée par l'application et l'API
+#
+# La grille horaire complète (HORIZON_MAX_JOURS jours x 24 h, prévue heure par
+# heure par prevision_recursive.py) ne dépend que du modèle (son historique lié
+# compris) et du premier jour prévu : elle est calculée une fois, écrite dans
+# modeles/<ville>/previsions/ et gardée en mémoire avec le modèle. Servir une
+# prévision revient à lire une tranche.
+#
+# La clé est (version du modèle, premier jour) : un nouvel entraînement, une mise
+# à jour incrémentale (nouvel artefact, donc nouvelle version) ou le passage à
+# minuit produisent une nouvelle grille ; les anciennes sont supprimées. Chaque
+# grille calculée est aussi ajoutée au journal de vérification (journal_verification.py).
+#
+# Usage :
+#   python precalcul_previsions.py                       # toutes les villes ayant un modèle
+#   python precalcul_previsions.py --boucle --intervalle 300
+import argparse
+import glob
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from instrumentation import compter, mesure
+from journal_verification import journaliser
+from prevision import HORIZON_MAX_JOURS, GrilleHoraire
+from prevision_recursive import prevoir_grille_recursive
+from registre_modele import charger_modele
+from villes import VILLES, trouver_modele
+
+DOSSIER_PREVISIONS = 'previsions'
+
+
+def premier_jour_par_defaut():
+    """Premier jour prévu par l'application : demain"""
+    return (date.today() + timedelta(days=1)).isoformat()
+
+
+def chemin_grille(modele_charge, premier_jour):
+    """Fichier de la grille d'un modèle pour un premier jour donné"""
+    dossier = os.path.join(os.path.dirname(modele_charge.chemin), DOSSIER_PREVISIONS)
+    return os.path.join(dossier, f"grille-{modele_charge.version}-{np.datetime64(premier_jour, 'D')}.npz")
+
+
+def ecrire_grille(grille, chemin):
+    """Écrit la grille (.npz non compressé, quelques dizaines de Ko) de façon atomique"""
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    temporaire = f"{chemin}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temporaire, 'wb') as f:
+        np.savez(f, jours=grille.jours, temperature=grille.temperature, humidity=grille.humidity)
+    os.replace(temporaire, chemin)
+
+
+def lire_grille(chemin):
+    """GrilleHoraire depuis son fichier .npz"""
+    with np.load(chemin) as f:
+        return GrilleHoraire(f['jours'], f['temperature'], f['humidity'])
+
+
+def calculer_grille(modele_charge, premier_jour, nb_jours=HORIZON_MAX_JOURS):
+    """Prévisions horaires de `nb_jours` jours à partir de `premier_jour` (heure par heure)"""
+    model_data = modele_charge.donnees
+    try:
+        historique = modele_charge.historique
+    except (OSError, ValueError):
+        historique = None
+    return prevoir_grille_recursive(model_data['model_temp'], model_data['model_humidity'], model_data['features'],
+                                    historique, modele_charge.contexte, premier_jour, nb_jours,
+                                    modele_charge.ensemble)
+
+
+def produire_grille(modele_charge, premier_jour, chemin):
+    """Calcule la grille, l'écrit et l'ajoute au journal de vérification"""
+    with mesure('calcul_grille'):
+        grille = calculer_grille(modele_charge, premier_jour)
+    compter('grille_calculee')
+    try:
+        ecrire_grille(grille, chemin)
+        journaliser(modele_charge, grille)
+    except OSError:
+        pass  # dossier en lecture seule : la grille reste en mémoire
+    return grille
+
+
+def grille_prevision(modele_charge, premier_jour=None):
+    """Grille du modèle : mémoire, sinon fichier précalculé, sinon calculée (et écrite) ici"""
+    premier_jour = str(np.datetime64(premier_jour or premier_jour_par_defaut(), 'D'))
+    grille = modele_charge.grilles.get(premier_jour)
+    if grille is not None:
+        compter('grille_memoire')
+        return grille
+
+    chemin = chemin_grille(modele_charge, premier_jour)
+    try:
+        with mesure('lecture_grille'):
+            grille = lire_grille(chemin)
+        compter('grille_disque')
+    except (OSError, ValueError, KeyError):
+        # Calcul : verrou du seul modèle concerné, les grilles des autres villes restent servies
+        with modele_charge.verrou_grilles:
+            grille = modele_charge.grilles.get(premier_jour)
+            if grille is None:
+                grille = _garder(modele_charge, premier_jour, produire_grille(modele_charge, premier_jour, chemin))
+            return grille
+    return _garder(modele_charge, premier_jour, grille)
+
+
+def _garder(modele_charge, premier_jour, grille):
+    """Seul le jour courant est servi : les grilles des jours passés sont oubliées"""
+    modele_charge.grilles = {premier_jour: grille}
+    return grille
+
+
+def nettoyer(modele_charge, premier_jour):
+    """Supprime les grilles des autres versions du modèle ou des jours passés"""
+    garder = chemin_grille(modele_charge, premier_jour)
+    supprimees = 0
+    for chemin in glob.glob(os.path.join(os.path.dirname(garder), 'grille-*.npz')):
+        if chemin != garder:
+            os.remove(chemin)
+            supprimees += 1
+    return supprimees
+
+
+def precalculer(chemin_modele, premier_jour=None):
+    """Calcule (si besoin) la grille du modèle et supprime les anciennes ; retourne son chemin"""
+    premier_jour = premier_jour or premier_jour_par_defaut()
+    modele_charge = charger_modele(chemin_modele)
+    chemin = chemin_grille(modele_charge, premier_jour)
+    if not os.path.exists(chemin):
+        debut = time.perf_counter()
+        with modele_charge.verrou_grilles:
+            if not os.path.exists(chemin):
+                produire_grille(modele_charge, premier_jour, chemin)
+        print(f"🗓️ {chemin} ({(time.perf_counter() - debut) * 1000:.0f} ms)")
+    nettoyer(modele_charge, premier_jour)
+    return chemin
+
+
+def rafraichir(villes=VILLES):
+    """Grilles du jour de toutes les villes qui ont un modèle"""
+    chemins = {}
+    for code in villes:
+        chemin_modele = trouver_modele(code)
+        if os.path.exists(chemin_modele):
+            chemins[code] = precalculer(chemin_modele)
+    return chemins
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Précalcul des grilles de prévision")
+    parser.add_argument('--villes', nargs='+', choices=VILLES, default=list(VILLES))
+    parser.add_argument('--boucle', action='store_true', help="Vérifie périodiquement modèles et date")
+    parser.add_argument('--intervalle', type=int, default=300, help="Secondes entre deux vérifications")
+    args = parser.parse_args()
+    while True:
+        chemins = rafraichir(args.villes)
+        if not args.boucle:
+            print(f"✅ {len(chemins)} grille(s) à jour")
+            break
+        time.sleep(args.intervalle)
@@ -0,0 +1,143 @@
+# precision_previsions.py - Précision horaire : prévisions IA vs prévision officielle Open-Meteo
+#
+# La série horaire officielle (16 jours, température et humidité) est placée sur
+# la même grille jours x 24 h que les prévisions du modèle (precalcul_previsions.py)
+# par simple calcul d'indice : les erreurs se calculent ensuite d'un bloc, puis se
+# résument par échéance (jour de prévision) et par heure de la journée.
+#
+# Usage : python precision_previsions.py [--ville rabat]
+import argparse
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from client_open_meteo import TTL_PREVISION, recuperer_prevision
+from instrumentation import compter, mesure
+from precalcul_previsions import grille_prevision, premier_jour_par_defaut
+from prevision import GrilleHoraire
+from registre_modele import charger_modele
+from villes import VILLE_DEFAUT, VILLES, trouver_modele, ville as infos_ville
+
+# Variable Open-Meteo -> attribut de GrilleHoraire
+VARIABLES_OFFICIELLES = {
+    'temperature_2m': 'temperature',
+    'relative_humidity_2m': 'humidity',
+}
+JOURS_OFFICIELS = 16  # maximum de l'API de prévision
+MAX_ENTREES_CACHE = 64
+
+
+def params_officiels(code_ville):
+    """Paramètres de la prévision officielle horaire d'une ville"""
+    v = infos_ville(code_ville)
+    return {
+        'latitude': v['latitude'],
+        'longitude': v['longitude'],
+        'hourly': ','.join(VARIABLES_OFFICIELLES),
+        'timezone': 'GMT',
+        'timeformat': 'unixtime',
+        'forecast_days': JOURS_OFFICIELS,
+    }
+
+
+def grille_officielle(reponse, jours):
+    """Prévision officielle placée sur la grille `jours` x 24 h (NaN hors de sa période)"""
+    horaire = reponse['hourly']
+    secondes = np.asarray(horaire['time'], dtype=np.int64)
+    rang, reste = np.divmod(secondes - jours[0].astype('datetime64[s]').astype(np.int64), 3600)
+    dedans = (reste == 0) & (rang >= 0) & (rang < len(jours) * 24)
+
+    valeurs = {}
+    for variable, nom in VARIABLES_OFFICIELLES.items():
+        grille = np.full(len(jours) * 24, np.nan)
+        grille[rang[dedans]] = np.asarray(horaire[variable], dtype=np.float64)[dedans]  # null -> NaN
+        valeurs[nom] = grille.reshape(len(jours), 24)
+    return GrilleHoraire(jours, valeurs['temperature'], valeurs['humidity'])
+
+
+def _resume(erreurs, axe):
+    """n, MAE, RMSE et biais des erreurs le long d'un axe (NaN ignorés)"""
+    n = np.sum(~np.isnan(erreurs), axis=axe)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'n': n,
+            'MAE': np.nansum(np.abs(erreurs), axis=axe) / n,
+            'RMSE': np.sqrt(np.nansum(erreurs ** 2, axis=axe) / n),
+            'Biais': np.nansum(erreurs, axis=axe) / n,
+        })
+
+
+class PrecisionPrevisions:
+    """Erreurs horaires du modèle (IA - officiel) sur la période commune aux deux prévisions"""
+
+    def __init__(self, grille, officielle):
+        self.grille = grille
+        self.officielle = officielle
+
+    def erreurs(self, nom='temperature', nb_jours=None):
+        """Matrice (jours, 24) des écarts IA - officiel"""
+        return getattr(self.grille, nom)[:nb_jours] - getattr(self.officielle, nom)[:nb_jours]
+
+    def par_echeance(self, nom='temperature', nb_jours=None):
+        """Une ligne par jour de prévision (1 = demain)"""
+        resume = _resume(self.erreurs(nom, nb_jours), axe=1)
+        resume.index = pd.Index(np.arange(1, len(resume) + 1), name='echeance_jours')
+        return resume[resume['n'] > 0]
+
+    def par_heure(self, nom='temperature', nb_jours=None):
+        """Une ligne par heure de la journée (GMT)"""
+        resume = _resume(self.erreurs(nom, nb_jours), axe=0)
+        resume.index = pd.Index(np.arange(24), name='heure')
+        return resume
+
+    def globale(self, nom='temperature', nb_jours=None):
+        """{'n', 'MAE', 'RMSE', 'Biais'} sur toutes les heures communes"""
+        return _resume(self.erreurs(nom, nb_jours).reshape(1, -1), axe=1).iloc[0].to_dict()
+
+
+_cache = OrderedDict()
+_verrou = threading.Lock()
+
+
+def precision_previsions(modele_charge, reponse, premier_jour=None):
+    """PrecisionPrevisions du modèle, mémorisée par (modèle, version, premier jour, heure de la réponse)"""
+    premier_jour = premier_jour or premier_jour_par_defaut()
+    # La réponse officielle change au plus une fois par TTL : même clé entre deux mises à jour
+    cle = (modele_charge.chemin, modele_charge.version, str(premier_jour), int(time.time() // TTL_PREVISION))
+    with _verrou:
+        precision = _cache.get(cle)
+        if precision is not None:
+            _cache.move_to_end(cle)
+            compter('precision_hit')
+            return precision
+
+    compter('precision_miss')
+    grille = grille_prevision(modele_charge, premier_jour)
+    with mesure('fusion_officielle'):
+        precision = PrecisionPrevisions(grille, grille_officielle(reponse, grille.jours))
+    with _verrou:
+        _cache[cle] = precision
+        while len(_cache) > MAX_ENTREES_CACHE:
+            _cache.popitem(last=False)
+    return precision
+
+
+def precision_ville(code_ville=VILLE_DEFAUT):
+    """Précision du modèle d'une ville contre la prévision officielle du moment (appel réseau bloquant)"""
+    modele_charge = charger_modele(trouver_modele(code_ville))
+    return precision_previsions(modele_charge, recuperer_prevision(params_officiels(code_ville)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Précision horaire du modèle contre la prévision officielle")
+    parser.add_argument('--ville', choices=VILLES, default=VILLE_DEFAUT)
+    args = parser.parse_args()
+    precision = precision_ville(args.ville)
+    for nom, unite in (('temperature', '°C'), ('humidity', '%')):
+        globale = precision.globale(nom)
+        print(f"\n📏 {nom} ({unite}) : MAE {globale['MAE']:.2f} | RMSE {globale['RMSE']:.2f} | "
+              f"biais {globale['Biais']:+.2f} sur {globale['n']:.0f} heures")
+        print(precision.par_echeance(nom).round(2).to_string())
@@ -0,0 +1,91 @@
+# prevision.py - Prédictions des modèles à partir de la matrice de features
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from construction_features import construire_features
+from instrumentation import mesure
+
+# Horizon maximal proposé par l'application (jours)
+HORIZON_MAX_JOURS = 30
+
+# Jusqu'à ce nombre de lignes, l'ensemble compilé (arbres_compiles.py) est plus
+# rapide que scikit-learn ; au-delà, la boucle Cython de scikit-learn reprend l'avantage
+SEUIL_LIGNES_COMPILE = 32
+
+
+def predire(modele, X):
+    """Prédiction d'un modèle scikit-learn sur une matrice de features float32"""
+    # Les modèles entraînés sur des DataFrames reçoivent ici la matrice NumPy de
+    # construction_features (même ordre de colonnes, garanti par la liste `features`
+    # du modèle) : l'avertissement de scikit-learn est sans objet, pour cet appel seulement.
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+        return modele.predict(X)
+
+
+def predire_temperature_humidite(model_temp, model_humidity, X, ensemble=None):
+    """(température, humidité) : ensemble compilé pour les petits lots, scikit-learn au-delà.
+
+    Un artefact compact charge ceux du .pkl source au premier gros lot (ModeleDiffere) ;
+    sans .pkl à côté, ils valent None et l'ensemble sert pour tous les lots.
+    """
+    if ensemble is not None and (len(X) <= SEUIL_LIGNES_COMPILE or model_temp is None):
+        with mesure('predict_compile'):
+            Y = ensemble.predire(X)
+        return Y[:, ensemble.cibles.index('temperature')], Y[:, ensemble.cibles.index('humidity')]
+    with mesure('predict_sklearn'):
+        return predire(model_temp, X), predire(model_humidity, X)
+
+
+class GrilleHoraire:
+    """Prévisions température / humidité sur une grille jours x 24 heures"""
+
+    def __init__(self, jours, temperature, humidity):
+        self.jours = jours  # datetime64[D], un élément par ligne
+        self.temperature = temperature  # (nb_jours, 24)
+        self.humidity = humidity  # (nb_jours, 24)
+
+    def __len__(self):
+        return len(self.jours)
+
+    def a_l_heure(self, heure, nb_jours=None):
+        """Prévisions des `nb_jours` premiers jours à une heure donnée (simple tranche)"""
+        return self.temperature[:nb_jours, heure], self.humidity[:nb_jours, heure]
+
+    def min_max_journaliers(self, nb_jours=None):
+        """Température min / moyenne / max de chaque jour"""
+        temperature = self.temperature[:nb_jours]
+        return pd.DataFrame({
+            'date': pd.to_datetime(self.jours[:nb_jours]),
+            'Temp. Min (°C)': temperature.min(axis=1),
+            'Temp. Moyenne (°C)': temperature.mean(axis=1),
+            'Temp. Max (°C)': temperature.max(axis=1),
+        })
+
+    def format_long(self, nb_jours=None):
+        """Une ligne par (jour, heure) : pratique pour les heatmaps et l'export"""
+        jours = self.jours[:nb_jours]
+        return pd.DataFrame({
+            'date': pd.to_datetime(np.repeat(jours, 24)),
+            'heure': np.tile(np.arange(24), len(jours)),
+            'temperature': self.temperature[:nb_jours].ravel(),
+            'humidity': self.humidity[:nb_jours].ravel(),
+        })
+
+
+def dates_grille(premier_jour, nb_jours):
+    """Dates horaires (datetime64[s]) de la grille, jour par jour puis heure par heure"""
+    jours = np.datetime64(premier_jour, 'D') + np.arange(nb_jours)
+    heures = np.arange(24) * np.timedelta64(3600, 's')
+    return jours, (jours[:, None] + heures).ravel()
+
+
+def prevoir_grille(model_temp, model_humidity, features, contexte, premier_jour, nb_jours=HORIZON_MAX_JOURS,
+                   ensemble=None):
+    """Prévoit toutes les heures de `nb_jours` jours en un seul predict par modèle"""
+    jours, dates = dates_grille(premier_jour, nb_jours)
+    X = construire_features(dates, features, contexte)
+    temperature, humidity = predire_temperature_humidite(model_temp, model_humidity, X, ensemble)
+    return GrilleHoraire(jours, temperature.reshape(nb_jours, 24), humidity.reshape(nb_jours, 24))
@@ -0,0 +1,133 @@
+# prevision_recursive.py - Prévision heure par heure : les moyennes mobiles suivent les prédictions
+#
+# Avec prevoir_grille, temp_rolling_24h, temp_rolling_7d et humidity_rolling_24h
+# restent figées sur la fin de l'historique pour tout l'horizon. Ici le modèle
+# avance d'une heure à la fois : chaque prédiction entre dans des tampons
+# circulaires (168 h de température, 24 h d'humidité) dont les sommes sont mises
+# à jour en O(1), et les moyennes obtenues servent de features à l'heure suivante.
+#
+# Plusieurs trajectoires (chemins : scénarios, conditions initiales perturbées...)
+# avancent ensemble : un pas = un predict de `nb_chemins` lignes, assez petit pour
+# l'ensemble compilé (arbres_compiles.py). Les features de date sont calculées
+# une seule fois pour tout l'horizon.
+import numpy as np
+
+from construction_features import CONTEXTE_DEFAUT, construire_features
+from prevision import HORIZON_MAX_JOURS, GrilleHoraire, dates_grille, predire_temperature_humidite
+
+FENETRE_24H = 24
+FENETRE_7J = 168
+ECART_MAX_JOURS = 7  # fin d'historique plus ancienne : départ sur les moyennes, 7 jours avant la grille
+FEATURES_RECURSIVES = ('temp_rolling_24h', 'temp_rolling_7d', 'humidity_rolling_24h')
+
+
+class FenetresGlissantes:
+    """Moyennes glissantes 24 h / 7 j de plusieurs trajectoires, mises à jour en O(1) par heure"""
+
+    def __init__(self, temperature, humidity):
+        # Dernières heures connues, de la plus ancienne à la plus récente : (nb_chemins, >= 168) et (nb_chemins, >= 24)
+        self.temperature = _remplir(np.atleast_2d(np.asarray(temperature, dtype=np.float64))[:, -FENETRE_7J:])
+        self.humidity = _remplir(np.atleast_2d(np.asarray(humidity, dtype=np.float64))[:, -FENETRE_24H:])
+        if self.temperature.shape[1] != FENETRE_7J or self.humidity.shape[1] != FENETRE_24H:
+            raise ValueError(f"Il faut au moins {FENETRE_7J} h de température et {FENETRE_24H} h d'humidité")
+        self.position_7j = 0  # case de la valeur la plus ancienne (qui sortira au prochain ajout)
+        self.position_24h = 0
+        self.somme_temperature_7j = self.temperature.sum(axis=1)
+        self.somme_temperature_24h = self.temperature[:, -FENETRE_24H:].sum(axis=1)
+        self.somme_humidity_24h = self.humidity.sum(axis=1)
+
+    @classmethod
+    def constantes(cls, temperature, humidity, nb_chemins=1):
+        """Fenêtres remplies d'une valeur constante (pas d'historique exploitable)"""
+        return cls(np.full((nb_chemins, FENETRE_7J), temperature), np.full((nb_chemins, FENETRE_24H), humidity))
+
+    def __len__(self):
+        return len(self.temperature)
+
+    def ajouter(self, temperature, humidity):
+        """Fait entrer une heure (une valeur par chemin) et sortir la plus ancienne"""
+        p = self.position_7j
+        self.somme_temperature_7j += temperature - self.temperature[:, p]
+        self.somme_temperature_24h += temperature - self.temperature[:, (p - FENETRE_24H) % FENETRE_7J]
+        self.temperature[:, p] = temperature
+        self.position_7j = (p + 1) % FENETRE_7J
+
+        q = self.position_24h
+        self.somme_humidity_24h += humidity - self.humidity[:, q]
+        self.humidity[:, q] = humidity
+        self.position_24h = (q + 1) % FENETRE_24H
+
+    def moyennes(self):
+        """{feature: moyenne par chemin} pour les features glissantes"""
+        return {
+            'temp_rolling_24h': self.somme_temperature_24h / FENETRE_24H,
+            'temp_rolling_7d': self.somme_temperature_7j / FENETRE_7J,
+            'humidity_rolling_24h': self.somme_humidity_24h / FENETRE_24H,
+        }
+
+
+def _remplir(valeurs):
+    """Remplace les NaN de chaque chemin par sa moyenne (comme les fenêtres de l'entraînement, qui les ignorent)"""
+    manquants = np.isnan(valeurs)
+    if manquants.any():
+        moyennes = np.nanmean(np.where(manquants.all(axis=1, keepdims=True), 0.0, valeurs), axis=1)
+        valeurs = np.where(manquants, moyennes[:, None], valeurs)
+    return valeurs
+
+
+def prevoir_recursif(model_temp, model_humidity, features, dates, fenetres, contexte=None, ensemble=None):
+    """(température, humidité) de forme (nb_chemins, len(dates)) ; `fenetres` avance jusqu'à la dernière date"""
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    X_dates = construire_features(dates, features, contexte)
+    colonnes = {nom: features.index(nom) for nom in FEATURES_RECURSIVES if nom in features}
+    temperature = np.empty((len(fenetres), len(dates)))
+    humidity = np.empty((len(fenetres), len(dates)))
+    if not colonnes:
+        # Modèle sans moyennes mobiles : rien à réinjecter, un seul predict
+        t, h = predire_temperature_humidite(model_temp, model_humidity, X_dates, ensemble)
+        temperature[:], humidity[:] = t, h
+        return temperature, humidity
+
+    X = np.empty((len(fenetres), len(features)), dtype=np.float32)
+    for k in range(len(dates)):
+        X[:] = X_dates[k]
+        moyennes = fenetres.moyennes()
+        for nom, i in colonnes.items():
+            X[:, i] = moyennes[nom]
+        t, h = predire_temperature_humidite(model_temp, model_humidity, X, ensemble)
+        temperature[:, k], humidity[:, k] = t, h
+        fenetres.ajouter(t, h)
+    return temperature, humidity
+
+
+def fenetres_depuis_historique(historique, premier_jour, contexte):
+    """(fenêtres initiales, première heure à prévoir) à partir de la fin de l'historique"""
+    premier_jour = np.datetime64(premier_jour, 'D').astype('datetime64[s]')
+    depart_max = premier_jour - np.timedelta64(ECART_MAX_JOURS, 'D')
+    if historique is not None and len(historique):
+        derniere = historique.derniere_date_complete()
+        if derniere is not None:
+            fin = min(derniere, premier_jour - np.timedelta64(1, 'h'))
+            n = int(np.searchsorted(historique.dates, fin, side='right'))
+            if n >= FENETRE_7J and fin >= depart_max:
+                fenetres = FenetresGlissantes(historique['temperature'][n - FENETRE_7J:n],
+                                              historique['humidity'][n - FENETRE_24H:n])
+                return fenetres, historique.dates[n - 1] + np.timedelta64(1, 'h')
+    # Historique absent, trop court ou trop ancien : fenêtres constantes, une semaine de mise en route
+    contexte = contexte or CONTEXTE_DEFAUT
+    fenetres = FenetresGlissantes.constantes(contexte['temp_rolling_7d'], contexte['humidity_rolling_24h'])
+    return fenetres, depart_max
+
+
+def prevoir_grille_recursive(model_temp, model_humidity, features, historique, contexte, premier_jour,
+                             nb_jours=HORIZON_MAX_JOURS, ensemble=None):
+    """GrilleHoraire comme prevoir_grille, mais moyennes mobiles nourries par les prédictions"""
+    jours, dates = dates_grille(premier_jour, nb_jours)
+    fenetres, depart = fenetres_depuis_historique(historique, premier_jour, contexte)
+    # Les heures entre la fin de l'historique et la grille sont prévues aussi (mise en route)
+    mise_en_route = np.arange(depart, dates[0], np.timedelta64(1, 'h'))
+    temperature, humidity = prevoir_recursif(model_temp, model_humidity, features,
+                                             np.concatenate([mise_en_route, dates]), fenetres, contexte, ensemble)
+    debut = len(mise_en_route)
+    return GrilleHoraire(jours, temperature[0, debut:].reshape(nb_jours, 24),
+                         humidity[0, debut:].reshape(nb_jours, 24))
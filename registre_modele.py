@@ -0,0 +1,242 @@
+# registre_modele.py - Cache du modèle météo partagé par tout le processus
+#
+# Le contenu d'un artefact (pickle scikit-learn : ~2 s d'import de scikit-learn au
+# démarrage) n'est chargé qu'au premier accès à `donnees` : servir une grille
+# précalculée (version = empreinte du fichier) n'en a pas besoin.
+# Un artefact compact (artefact_compact.py, <modèle>.arbres) se charge sans
+# scikit-learn : seuls l'ensemble compilé et les métadonnées y sont ; le .pkl
+# voisin n'est dépicklé qu'au premier gros lot à prédire.
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+
+from arbres_compiles import compiler_ensemble
+from artefact_compact import chemin_compact, charger_donnees, ecrire_compact, est_artefact_compact
+from construction_features import contexte_recent
+from historique import historique_du_modele
+from instrumentation import compter, memoire_processus, mesure
+
+CHEMIN_MODELE = 'cerveau_meteo_long_terme.pkl'
+
+# Plafond mémoire des modèles gardés par le registre (plusieurs villes)
+MEMOIRE_MAX_MODELES = int(os.environ.get('METEO_MEMOIRE_MODELES_MO', '512')) * 1_000_000
+
+
+def _empreinte_fichier(chemin, taille_bloc=1 << 20):
+    """Calcule le SHA-256 du fichier par blocs (sans le charger en entier)"""
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def sauvegarder_modele(donnees, chemin=CHEMIN_MODELE, compact=True):
+    """Écrit l'artefact (remplacement atomique) et, s'il a un ensemble compilé, sa version compacte.
+
+    Retourne le chemin de l'artefact servi : le compact s'il a été écrit.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    temporaire = f"{chemin}.tmp-{os.getpid()}"
+    import joblib
+
+    joblib.dump(donnees, temporaire)
+    os.replace(temporaire, chemin)
+    if compact and donnees.get('ensemble_compile') is not None:
+        return ecrire_compact(donnees, chemin_compact(chemin),
+                              source={'fichier': os.path.basename(chemin), 'empreinte': _empreinte_fichier(chemin)[:12]})
+    return chemin
+
+
+def _charger_donnees(chemin):
+    """(contenu de l'artefact, durée en s, octets ajoutés au RSS ou None)"""
+    memoire_avant = memoire_processus()
+    debut = time.perf_counter()
+    with mesure('chargement_modele'):
+        if est_artefact_compact(chemin):
+            donnees = charger_donnees(chemin)
+        else:
+            import joblib  # importe scikit-learn au dépickling : seulement quand un modèle sert
+
+            donnees = joblib.load(chemin)
+    temps = time.perf_counter() - debut
+    memoire_apres = memoire_processus()
+    memoire = None
+    if memoire_avant is not None and memoire_apres is not None:
+        memoire = max(memoire_apres - memoire_avant, 0)
+    return donnees, temps, memoire
+
+
+class ModeleCharge:
+    """Artefact du registre ; son contenu est chargé au premier accès à `donnees`"""
+
+    def __init__(self, chemin, mtime, taille_fichier, empreinte,
+                 donnees=None, temps_chargement=None, memoire=None):
+        self.chemin = chemin
+        self.mtime = mtime
+        self.taille_fichier = taille_fichier
+        self.empreinte = empreinte
+        self._donnees = donnees
+        self.temps_chargement = temps_chargement  # secondes (None tant que non chargé)
+        self.memoire = memoire  # octets ajoutés au RSS (None si inconnu)
+        self.charge_le = time.time()
+        self.grilles = {}  # grilles de prévision par premier jour (precalcul_previsions.py)
+        self.verrou_grilles = threading.Lock()  # calcul d'une grille de ce modèle
+        self._verrou = threading.Lock()
+
+    @property
+    def donnees(self):
+        """Contenu de l'artefact (modèles, features, lien d'historique), chargé une fois"""
+        if self._donnees is None:
+            with self._verrou:
+                if self._donnees is None:
+                    donnees, self.temps_chargement, self.memoire = _charger_donnees(self.chemin)
+                    self._donnees = donnees
+        return self._donnees
+
+    def est_charge(self):
+        """True si le contenu de l'artefact est déjà en mémoire"""
+        return self._donnees is not None
+
+    @cached_property
+    def ensemble(self):
+        """Ensemble compilé des deux modèles (exporté à l'entraînement, sinon compilé ici)"""
+        ensemble = self.donnees.get('ensemble_compile')
+        if ensemble is None:
+            ensemble = compiler_ensemble({
+                'temperature': self.donnees['model_temp'],
+                'humidity': self.donnees['model_humidity'],
+            })
+        return ensemble
+
+    @cached_property
+    def historique(self):
+        """Historique lié au modèle, ouvert au premier accès et libéré avec le modèle"""
+        with mesure('ouverture_historique'):
+            return historique_du_modele(self)
+
+    @cached_property
+    def contexte(self):
+        """Contexte météo récent (moyennes de fin d'historique) pour construire les features"""
+        try:
+            historique = self.historique
+        except (OSError, ValueError):
+            historique = None  # historique indisponible : valeurs par défaut
+        return contexte_recent(historique)
+
+    def octets_memoire(self):
+        """Estimation de la RAM occupée : modèle + partie non mappée de l'historique s'il est ouvert"""
+        octets = max(self.memoire or 0, self.taille_fichier)
+        historique = self.__dict__.get('historique')
+        if historique is not None:
+            octets += historique.octets_ram()
+        return octets
+
+    @property
+    def version(self):
+        """Identifiant court de la version du modèle"""
+        return self.empreinte[:12]
+
+    def resume(self):
+        """Dictionnaire lisible pour l'affichage (sidebar, logs)"""
+        return {
+            'version': self.version,
+            'taille_fichier_mo': self.taille_fichier / 1e6,
+            'temps_chargement_ms': None if self.temps_chargement is None else self.temps_chargement * 1000,
+            'memoire_mo': None if self.memoire is None else self.memoire / 1e6,
+        }
+
+
+class RegistreModele:
+    """Charge chaque artefact une seule fois par processus et le recharge à chaud.
+
+    À chaque accès, seul un os.stat() est fait. Si la date de modification ou
+    la taille change, l'empreinte SHA-256 est recalculée et, si le contenu a
+    réellement changé, le nouveau modèle est chargé puis échangé d'un bloc :
+    les sessions en cours gardent l'ancien objet jusqu'à leur prochain accès.
+    Un premier accès ne charge rien : le contenu est lu quand il sert.
+
+    Les modèles (un par ville) sont chargés à la demande et gardés dans l'ordre
+    d'utilisation : au-delà de `memoire_max` octets, les moins récemment
+    utilisés sont oubliés, avec leur historique.
+    """
+
+    def __init__(self, memoire_max=MEMOIRE_MAX_MODELES):
+        self.memoire_max = memoire_max
+        self._verrou = threading.Lock()
+        self._modeles = OrderedDict()
+
+    def obtenir(self, chemin=CHEMIN_MODELE):
+        """Retourne le ModeleCharge à jour pour ce chemin"""
+        stat = os.stat(chemin)
+        actuel = self._modeles.get(chemin)
+        if actuel is not None and (actuel.mtime, actuel.taille_fichier) == (stat.st_mtime, stat.st_size):
+            compter('registre_modele_hit')
+            with self._verrou:
+                if chemin in self._modeles:
+                    self._modeles.move_to_end(chemin)
+                self._evincer(garder=chemin)
+            return actuel
+
+        compter('registre_modele_miss')
+        with self._verrou:
+            # Un autre thread a peut-être déjà rechargé pendant l'attente
+            actuel = self._modeles.get(chemin)
+            stat = os.stat(chemin)
+            if actuel is not None and (actuel.mtime, actuel.taille_fichier) == (stat.st_mtime, stat.st_size):
+                return actuel
+
+            empreinte = _empreinte_fichier(chemin)
+            if actuel is not None and actuel.empreinte == empreinte:
+                # Fichier simplement "touché" : contenu identique
+                actuel.mtime = stat.st_mtime
+                return actuel
+
+            if actuel is None:
+                nouveau = ModeleCharge(chemin, stat.st_mtime, stat.st_size, empreinte)
+            else:
+                try:
+                    # Remplacement : chargé tout de suite, pour garder l'ancien si le nouveau est illisible
+                    nouveau = ModeleCharge(chemin, stat.st_mtime, stat.st_size, empreinte,
+                                           *_charger_donnees(chemin))
+                except Exception:
+                    # Fichier en cours d'écriture ou corrompu : on garde l'ancien modèle
+                    return actuel
+            self._modeles[chemin] = nouveau
+            self._modeles.move_to_end(chemin)
+            self._evincer(garder=chemin)
+            return nouveau
+
+    def _evincer(self, garder):
+        """Oublie les modèles les moins récemment utilisés tant que le plafond est dépassé"""
+        total = self.occupation()
+        for chemin in list(self._modeles):
+            if total <= self.memoire_max:
+                break
+            if chemin != garder:
+                total -= self._modeles.pop(chemin).octets_memoire()
+
+    def occupation(self):
+        """Mémoire estimée (octets) de tous les modèles gardés"""
+        return sum(modele.octets_memoire() for modele in list(self._modeles.values()))
+
+    def __len__(self):
+        return len(self._modeles)
+
+    def vider(self):
+        """Oublie tous les modèles chargés (le prochain accès recharge)"""
+        with self._verrou:
+            self._modeles.clear()
+
+
+# Instance unique : les modules Python restent en mémoire entre les reruns
+# Streamlit, ce registre est donc partagé par toutes les sessions du processus.
+registre = RegistreModele()
+
+
+def charger_modele(chemin=CHEMIN_MODELE):
+    """Raccourci : modèle à jour depuis le registre du processus"""
+    return registre.obtenir(chemin)
@@ -0,0 +1,52 @@
+# saisons.py - Saisons (nom, icône, couleur) pour une date ou un tableau de dates
+import numpy as np
+import pandas as pd
+
+from calendrier import NB_JOURS_CALENDRIER, composantes_dates, jour_calendrier
+
+SAISONS = ['Hiver', 'Printemps', 'Été', 'Automne']
+ICONES = ['🔵', '🌸', '☀️', '🍂']
+COULEURS = ['#ADD8E6', '#FFB6C1', '#FFD700', '#FF8C00']  # Bleu clair, rose, jaune doré, orange
+AFFICHAGES = [f"{icone} {saison}" for icone, saison in zip(ICONES, SAISONS)]
+
+
+# --- FONCTION POUR DÉTERMINER LA SAISON ---
+def get_season(month, day):
+    """Retourne la saison et sa couleur selon le mois et le jour"""
+    if (month == 12 and day >= 21) or month in [1, 2] or (month == 3 and day < 20):
+        return "Hiver", "🔵", "#ADD8E6"  # Bleu clair
+    elif (month == 3 and day >= 20) or month in [4, 5] or (month == 6 and day < 21):
+        return "Printemps", "🌸", "#FFB6C1"  # Rose
+    elif (month == 6 and day >= 21) or month in [7, 8] or (month == 9 and day < 23):
+        return "Été", "☀️", "#FFD700"  # Jaune doré
+    else:
+        return "Automne", "🍂", "#FF8C00"  # Orange
+
+
+def _table_saisons():
+    """Code de saison pour chacun des 366 jours calendaires (construit via get_season)"""
+    jours = np.arange('2000-01-01', '2001-01-01', dtype='datetime64[D]')  # année bissextile
+    _, mois, jour, _ = composantes_dates(jours)
+    table = np.empty(NB_JOURS_CALENDRIER, dtype=np.int8)
+    table[jour_calendrier(mois, jour)] = [SAISONS.index(get_season(m, j)[0]) for m, j in zip(mois, jour)]
+    return table
+
+
+_TABLE_SAISONS = _table_saisons()
+
+
+def codes_saisons(dates):
+    """Codes de saison (indices dans SAISONS) d'un tableau de dates, sans boucle Python"""
+    _, mois, jour, _ = composantes_dates(dates)
+    return _TABLE_SAISONS[jour_calendrier(mois, jour)]
+
+
+def colonnes_saisons(dates):
+    """Colonnes catégorielles Saison / Icone_Saison / Couleur_Saison / Saison_Display"""
+    codes = codes_saisons(dates)
+    return {
+        'Saison': pd.Categorical.from_codes(codes, categories=SAISONS),
+        'Icone_Saison': pd.Categorical.from_codes(codes, categories=ICONES),
+        'Couleur_Saison': pd.Categorical.from_codes(codes, categories=COULEURS),
+        'Saison_Display': pd.Categorical.from_codes(codes, categories=AFFICHAGES),
+    }
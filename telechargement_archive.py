@@ -0,0 +1,153 @@
+# telechargement_archive.py - Téléchargement de l'historique horaire par blocs, en parallèle
+#
+# Une longue période (5 à 20 ans) est découpée en blocs d'un an ou d'un mois,
+# téléchargés en parallèle par un pool de threads borné (session HTTP partagée
+# de client_open_meteo). Chaque bloc est réessayé indépendamment, lu en flux
+# directement dans des tableaux NumPy typés (dates int64, variables float32,
+# voir ingestion_json.py) et enregistré en .npz : une exécution interrompue
+# reprend là où elle s'était arrêtée.
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+from client_open_meteo import URL_ARCHIVE, DonneesIndisponibles, client
+from ingestion_json import TAILLE_MORCEAU, lire_flux_horaire
+
+DOSSIER_BLOCS = '.telechargements_archive'
+
+# Variable Open-Meteo -> nom de colonne utilisé par le projet
+VARIABLES = {
+    'temperature_2m': 'temperature',
+    'precipitation': 'precipitation',
+    'relative_humidity_2m': 'humidity',
+    'cloud_cover': 'cloud_cover',
+}
+
+TAILLES_BLOC = {'annee': 'Y', 'mois': 'M'}
+NB_THREADS = 4
+TENTATIVES_BLOC = 3
+DELAI_ARCHIVE_JOURS = 7  # l'archive complète encore les derniers jours : pas de point de reprise
+
+
+class EchecTelechargement(RuntimeError):
+    """Un ou plusieurs blocs n'ont pas pu être téléchargés (les autres sont sauvegardés)"""
+
+
+def decouper_periode(debut, fin, taille_bloc='annee'):
+    """Liste de (début, fin) inclusifs alignés sur les années ou les mois calendaires"""
+    unite = TAILLES_BLOC[taille_bloc]
+    debut, fin = np.datetime64(debut, 'D'), np.datetime64(fin, 'D')
+    blocs = []
+    while debut <= fin:
+        suivant = (debut.astype(f'datetime64[{unite}]') + 1).astype('datetime64[D]')
+        blocs.append((str(debut), str(min(suivant - 1, fin))))
+        debut = suivant
+    return blocs
+
+
+def nb_heures(debut, fin):
+    """Nombre d'heures entre deux jours inclus (taille des tableaux préalloués)"""
+    return int((np.datetime64(fin, 'D') - np.datetime64(debut, 'D')).astype(int) + 1) * 24
+
+
+class TelechargeurArchive:
+    """Télécharge une période de l'archive horaire par blocs, avec reprise sur disque"""
+
+    def __init__(self, latitude, longitude, variables=VARIABLES, dossier=DOSSIER_BLOCS,
+                 taille_bloc='annee', nb_threads=NB_THREADS, tentatives=TENTATIVES_BLOC):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.variables = dict(variables)
+        self.taille_bloc = taille_bloc
+        self.nb_threads = nb_threads
+        self.tentatives = tentatives
+        signature = json.dumps([latitude, longitude, sorted(self.variables)])
+        self.dossier = os.path.join(dossier, hashlib.sha256(signature.encode()).hexdigest()[:12])
+
+    def _chemin_bloc(self, debut, fin):
+        return os.path.join(self.dossier, f"{debut}_{fin}.npz")
+
+    def _lire_bloc(self, debut, fin):
+        try:
+            with np.load(self._chemin_bloc(debut, fin)) as npz:
+                return {nom: npz[nom] for nom in npz.files}
+        except (OSError, ValueError):
+            return None
+
+    def _ecrire_bloc(self, debut, fin, colonnes):
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self._chemin_bloc(debut, fin)
+        temporaire = f"{chemin}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temporaire, 'wb') as f:
+            np.savez(f, **colonnes)
+        os.replace(temporaire, chemin)
+
+    def _telecharger_bloc(self, debut, fin):
+        """Un bloc : point de reprise s'il existe, sinon requête avec nouvelles tentatives"""
+        colonnes = self._lire_bloc(debut, fin)
+        if colonnes is not None:
+            return colonnes
+        if client.hors_ligne:
+            raise DonneesIndisponibles(f"Hors ligne : bloc {debut} → {fin} absent du disque")
+
+        params = {
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'start_date': debut,
+            'end_date': fin,
+            'hourly': ','.join(self.variables),
+            'timezone': 'GMT',
+            'timeformat': 'unixtime',
+        }
+        for tentative in range(self.tentatives):
+            try:
+                with client.session.get(URL_ARCHIVE, params=params, timeout=client.delais, stream=True) as reponse:
+                    reponse.raise_for_status()
+                    brut = lire_flux_horaire(reponse.iter_content(TAILLE_MORCEAU), self.variables,
+                                             nb_heures(debut, fin))
+                colonnes = {'date': brut.pop('time'), **{self.variables[v]: brut[v] for v in self.variables}}
+                break
+            except (requests.RequestException, ValueError):
+                if tentative == self.tentatives - 1:
+                    raise
+                time.sleep(2 ** tentative)
+
+        if date.fromisoformat(fin) < date.today() - timedelta(days=DELAI_ARCHIVE_JOURS):
+            self._ecrire_bloc(debut, fin, colonnes)
+        return colonnes
+
+    def telecharger(self, debut, fin):
+        """Colonnes {'date': int64, nom: float32} de toute la période, dans l'ordre chronologique"""
+        blocs = decouper_periode(debut, fin, self.taille_bloc)
+        resultats, echecs = {}, {}
+        with ThreadPoolExecutor(max_workers=self.nb_threads) as pool:
+            futures = {pool.submit(self._telecharger_bloc, *bloc): bloc for bloc in blocs}
+            for future in as_completed(futures):
+                bloc = futures[future]
+                try:
+                    resultats[bloc] = future.result()
+                except Exception as e:
+                    echecs[bloc] = e
+                    print(f"❌ Bloc {bloc[0]} → {bloc[1]} : {e}")
+
+        if echecs:
+            raise EchecTelechargement(
+                f"{len(echecs)} bloc(s) sur {len(blocs)} en échec ; relancez pour reprendre "
+                f"(les {len(resultats)} autres sont sauvegardés)"
+            )
+        return {
+            nom: np.concatenate([resultats[bloc][nom] for bloc in blocs])
+            for nom in ['date', *self.variables.values()]
+        }
+
+
+def telecharger_archive(debut, fin, latitude, longitude, **options):
+    """Raccourci : TelechargeurArchive(latitude, longitude, **options).telecharger(debut, fin)"""
+    return TelechargeurArchive(latitude, longitude, **options).telecharger(debut, fin)
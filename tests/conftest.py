@@ -0,0 +1,6 @@
+# tests/conftest.py - Modules de la racine et des benchmarks importables depuis les tests
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RACINE, os.path.join(RACINE, 'benchmarks')]
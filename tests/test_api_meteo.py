@@ -0,0 +1,101 @@
+# tests/test_api_meteo.py - Validation des requêtes de l'API (400, jamais de connexion coupée), requêtes hors grille
+import http.client
+import json
+import threading
+
+import numpy as np
+import pytest
+from bench_entrainement import historique_synthetique
+
+import api_meteo
+from api_meteo import MAX_DEBUTS_HORS_GRILLE, _calculer, _normaliser, creer_serveur, prevoir_lot
+from arbres_compiles import compiler_ensemble
+from construction_features import FEATURES_AVANCEES
+from entrainer_modele import entrainer, preparer_donnees
+from historique import lier_historique
+from precalcul_previsions import grille_prevision
+from prevision import HORIZON_MAX_JOURS
+from registre_modele import charger_modele, sauvegarder_modele
+
+PREMIER_JOUR = '2016-01-01'  # lendemain de la fin de l'historique synthétique
+
+
+@pytest.mark.parametrize('requete', [1, None, 'rabat', [], {'heures': [1.7]}, {'heures': [True]},
+                                     {'heures': '8,x'}, {'heures': [24]}, {'jours': 2.5}, {'jours': 0},
+                                     {'debut': 20260701}, {'debut': 5}, {'debut': '2026-13-01'}, {'debut': True}])
+def test_requete_invalide(requete):
+    with pytest.raises(ValueError):
+        _normaliser(requete)
+
+
+def test_requete_valide():
+    requete = _normaliser({'ville': 'rabat', 'debut': '2026-07-01', 'jours': '3', 'heures': '8,14,20'})
+    assert requete['jours'] == 3
+    np.testing.assert_array_equal(requete['heures'], [8, 14, 20])
+    np.testing.assert_array_equal(_normaliser({'heures': 14})['heures'], [14])
+
+
+@pytest.fixture(scope='module')
+def serveur():
+    serveur = creer_serveur(port=0)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield serveur.server_address
+    serveur.shutdown()
+
+
+@pytest.mark.parametrize('requetes', [[1], [None], ['rabat'], [{'heures': [1.7]}]])
+def test_lot_invalide_repond_400(serveur, requetes):
+    connexion = http.client.HTTPConnection(*serveur, timeout=10)
+    connexion.request('POST', '/previsions', json.dumps({'requetes': requetes}))
+    reponse = connexion.getresponse()
+    assert reponse.status == 400
+    assert 'erreur' in json.loads(reponse.read())
+
+
+@pytest.fixture(scope='module')
+def modele_charge(tmp_path_factory):
+    brut = historique_synthetique(365 / 365.25)  # 2015 complet, dernière heure 2015-12-31 23 h
+    model_temp, model_humidity = entrainer(preparer_donnees(brut, 'hgb'), FEATURES_AVANCEES, 'hgb')
+    chemin = str(tmp_path_factory.mktemp('modele') / 'cerveau_meteo_long_terme.pkl')
+    servi = sauvegarder_modele({
+        'model_temp': model_temp,
+        'model_humidity': model_humidity,
+        'features': FEATURES_AVANCEES,
+        'ensemble_compile': compiler_ensemble({'temperature': model_temp, 'humidity': model_humidity}),
+        'historique': lier_historique(brut, chemin),
+    }, chemin)
+    return charger_modele(servi)
+
+
+def _calculer_une(modele_charge, debut, jours):
+    requete = _normaliser({'debut': debut, 'jours': jours})
+    resultats = [None]
+    _calculer([requete], [0], modele_charge, resultats)
+    return resultats[0]
+
+
+def test_hors_grille_coherent_avec_la_grille(modele_charge):
+    grille = grille_prevision(modele_charge, PREMIER_JOUR)
+    # Même premier jour : calcul identique à la grille
+    resultat = _calculer_une(modele_charge, PREMIER_JOUR, 3)
+    np.testing.assert_allclose(resultat['temperature'], grille.temperature[:3])
+    np.testing.assert_allclose(resultat['humidity'], grille.humidity[:3])
+    # Requête qui dépasse la fin de la grille : mêmes valeurs sur les jours communs
+    decalage = 5
+    debut = str(np.datetime64(PREMIER_JOUR) + decalage)
+    resultat = _calculer_une(modele_charge, debut, HORIZON_MAX_JOURS)
+    np.testing.assert_allclose(resultat['temperature'][:-decalage], grille.temperature[decalage:])
+    np.testing.assert_allclose(resultat['humidity'][:-decalage], grille.humidity[decalage:])
+
+
+def test_trop_de_debuts_hors_grille_refuse(modele_charge, monkeypatch):
+    monkeypatch.setattr(api_meteo, 'trouver_modele', lambda code: modele_charge.chemin)
+    monkeypatch.setattr(api_meteo, 'charger_modele', lambda chemin: modele_charge)
+    monkeypatch.setattr(api_meteo, 'grille_prevision', lambda m: grille_prevision(m, PREMIER_JOUR))
+    calculs = []
+    monkeypatch.setattr(api_meteo, 'calculer_grille', lambda *args: calculs.append(args))
+    passe = np.datetime64(PREMIER_JOUR) - 60
+    requetes = [{'debut': str(passe + k), 'jours': 1} for k in range(MAX_DEBUTS_HORS_GRILLE + 1)]
+    with pytest.raises(ValueError, match='hors de la grille'):
+        prevoir_lot(requetes)
+    assert not calculs  # refusé avant tout calcul
@@ -0,0 +1,71 @@
+# tests/test_arbres_compiles.py - Parité des arbres compilés avec scikit-learn
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+from arbres_compiles import TAILLE_BLOC, _profondeurs_arbres, compiler_ensemble
+
+NB_LIGNES = 3000
+NB_FEATURES = 6
+
+
+def _donnees(nan):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(NB_LIGNES, NB_FEATURES)).astype(np.float32)
+    temperature = 18 + 4 * X[:, 0] + np.sin(3 * X[:, 1]) + rng.normal(0, 0.3, NB_LIGNES)
+    humidity = 70 - 10 * X[:, 2] * X[:, 3] + rng.normal(0, 2, NB_LIGNES)
+    if nan:
+        X[rng.random(X.shape) < 0.1] = np.nan
+        humidity[np.isnan(X[:, 2])] += 15  # valeur manquante informative : la branche apprise compte
+    return X, {'temperature': temperature, 'humidity': humidity}
+
+
+MOTEURS = {
+    'gbm': (GradientBoostingRegressor, {'n_estimators': 40, 'max_depth': 5, 'learning_rate': 0.1, 'random_state': 0}),
+    'hgb': (HistGradientBoostingRegressor, {'max_iter': 40, 'max_leaf_nodes': 31, 'random_state': 0}),
+}
+
+
+def _modeles(moteur, X, cibles):
+    classe, params = MOTEURS[moteur]
+    return {cible: classe(**params).fit(X, y) for cible, y in cibles.items()}
+
+
+# GradientBoostingRegressor refuse les NaN : les valeurs manquantes ne concernent que 'hgb'
+@pytest.mark.parametrize('moteur, nan', [('gbm', False), ('hgb', False), ('hgb', True)])
+def test_parite_scikit_learn(moteur, nan):
+    X, cibles = _donnees(nan)
+    modeles = _modeles(moteur, X, cibles)
+    ensemble = compiler_ensemble(modeles)
+    # Plusieurs blocs de TAILLE_BLOC lignes, dont un incomplet, et une ligne seule
+    for lignes in (X[:1], X[:5 * TAILLE_BLOC + 7]):
+        Y = ensemble.predire(lignes)
+        assert Y.shape == (len(lignes), 2)
+        for j, (cible, modele) in enumerate(modeles.items()):
+            np.testing.assert_allclose(Y[:, j], modele.predict(lignes), rtol=0, atol=1e-9)
+            np.testing.assert_allclose(ensemble.predire_cible(lignes, cible), modele.predict(lignes), rtol=0, atol=1e-9)
+
+
+def test_seuils_float32_au_bord():
+    """Une entrée exactement égale au seuil float32 arrondi suit la même branche que scikit-learn"""
+    X, cibles = _donnees(False)
+    modeles = _modeles('gbm', X, cibles)
+    ensemble = compiler_ensemble(modeles)
+    internes = ensemble.noeuds['gauche'] != np.arange(len(ensemble.noeuds))
+    seuils = ensemble.noeuds['seuil'][internes][:200]
+    features = ensemble.noeuds['feature'][internes][:200]
+    bord = np.tile(X[:1], (len(seuils), 1))
+    bord[np.arange(len(seuils)), features] = seuils
+    reference = np.column_stack([m.predict(bord) for m in modeles.values()])
+    np.testing.assert_allclose(ensemble.predire(bord), reference, rtol=0, atol=1e-9)
+
+
+def test_ordre_par_profondeur():
+    """Arbres de profondeurs inégales : chaque niveau n'évalue que les arbres encore assez profonds"""
+    X, cibles = _donnees(True)
+    ensemble = compiler_ensemble(_modeles('hgb', X, cibles))
+    profondeurs = _profondeurs_arbres(ensemble.noeuds, ensemble.racines)
+    assert profondeurs.max() == ensemble.profondeur and profondeurs.min() < ensemble.profondeur
+    racines, rang, actifs = ensemble._ordre_profondeur
+    np.testing.assert_array_equal(racines[rang], ensemble.racines)
+    assert actifs == sorted(actifs, reverse=True) and actifs[0] == ensemble.nb_arbres
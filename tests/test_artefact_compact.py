@@ -0,0 +1,77 @@
+# tests/test_artefact_compact.py - Artefact compact servi : scikit-learn pour les gros lots quand le .pkl est là
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from arbres_compiles import compiler_ensemble
+from artefact_compact import TAILLE_GROS_LOT, charger_donnees, charger_ensemble
+from prevision import SEUIL_LIGNES_COMPILE, predire_temperature_humidite
+from registre_modele import sauvegarder_modele
+
+FEATURES = ['f0', 'f1', 'f2', 'f3']
+
+
+@pytest.fixture
+def modele(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, len(FEATURES))).astype(np.float32)
+    modeles = {
+        'temperature': HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(X, 15 + 5 * X[:, 0]),
+        'humidity': HistGradientBoostingRegressor(max_iter=30, random_state=0).fit(X, 70 - 8 * X[:, 1] * X[:, 2]),
+    }
+    donnees = {
+        'model_temp': modeles['temperature'],
+        'model_humidity': modeles['humidity'],
+        'features': FEATURES,
+        'ensemble_compile': compiler_ensemble(modeles),
+    }
+    chemin = str(tmp_path / 'modele.pkl')
+    servi = sauvegarder_modele(donnees, chemin)
+    return chemin, servi, modeles, rng.normal(size=(TAILLE_GROS_LOT, len(FEATURES))).astype(np.float32)
+
+
+def _predire(compact, X):
+    return predire_temperature_humidite(compact['model_temp'], compact['model_humidity'], X,
+                                        compact['ensemble_compile'])
+
+
+def test_gros_lot_par_scikit_learn(modele):
+    _, servi, modeles, X = modele
+    compact = charger_donnees(servi)
+    temperature, humidity = _predire(compact, X)
+    np.testing.assert_array_equal(temperature, modeles['temperature'].predict(X))
+    np.testing.assert_array_equal(humidity, modeles['humidity'].predict(X))
+    # Les petits lots restent sur l'ensemble compilé
+    petit = X[:SEUIL_LIGNES_COMPILE]
+    np.testing.assert_array_equal(_predire(compact, petit)[0],
+                                  compact['ensemble_compile'].predire_cible(petit, 'temperature'))
+
+
+def test_sans_pkl_ensemble_compile(modele):
+    chemin, servi, modeles, X = modele
+    os.remove(chemin)
+    compact = charger_donnees(servi)
+    assert compact['model_temp'] is None and compact['model_humidity'] is None
+    temperature, _ = _predire(compact, X)
+    np.testing.assert_allclose(temperature, modeles['temperature'].predict(X), atol=0.01)
+
+
+def test_pkl_modifie_ignore(modele):
+    chemin, servi, modeles, X = modele
+    compact = charger_donnees(servi)
+    joblib.dump({'model_temp': modeles['humidity'], 'model_humidity': modeles['humidity']}, chemin)
+    temperature, _ = _predire(compact, X)
+    np.testing.assert_array_equal(temperature, compact['ensemble_compile'].predire_cible(X, 'temperature'))
+
+
+def test_chargement_partiel(modele):
+    _, servi, modeles, X = modele
+    # Servir demande les deux cibles : pas de contenu partiel qui échouerait au premier predict
+    with pytest.raises(ValueError, match='humidity'):
+        charger_donnees(servi, cibles=['temperature'])
+    ensemble, _ = charger_ensemble(servi, ['temperature'])
+    assert ensemble.cibles == ['temperature']
+    np.testing.assert_allclose(ensemble.predire_cible(X, 'temperature'), modeles['temperature'].predict(X), atol=0.01)
@@ -0,0 +1,52 @@
+# tests/test_client_open_meteo.py - Cache mémoire du client (LRU, accès concurrents)
+import threading
+
+import client_open_meteo
+from client_open_meteo import MAX_ENTREES_MEMOIRE, ClientOpenMeteo, cle_requete
+
+
+def _entree(i):
+    return {'recu_le': 0.0, 'donnees': {'i': i}}
+
+
+def test_eviction_lru(tmp_path):
+    client = ClientOpenMeteo(dossier_cache=str(tmp_path), hors_ligne=True)
+    cles = [cle_requete('u', {'i': i}) for i in range(MAX_ENTREES_MEMOIRE + 1)]
+    for i, cle in enumerate(cles[:-1]):
+        client._memoriser(cle, _entree(i))
+    client._lire_cache(cles[0])  # la plus ancienne redevient la plus récente
+    client._memoriser(cles[-1], _entree(-1))
+
+    assert len(client._memoire) == MAX_ENTREES_MEMOIRE
+    assert cles[0] in client._memoire and cles[1] not in client._memoire
+
+
+def test_acces_concurrents(tmp_path, monkeypatch):
+    monkeypatch.setattr(client_open_meteo, 'MAX_ENTREES_MEMOIRE', 8)
+    client = ClientOpenMeteo(dossier_cache=str(tmp_path), hors_ligne=True)
+    erreurs = []
+
+    def travail(graine):
+        try:
+            for i in range(2000):
+                cle = cle_requete('u', {'i': (graine * 7 + i) % 50})
+                client._memoriser(cle, _entree(i))
+                client._lire_cache(cle)
+        except Exception as e:
+            erreurs.append(e)
+
+    threads = [threading.Thread(target=travail, args=(g,)) for g in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not erreurs
+    assert len(client._memoire) <= 8
+
+
+def test_verrous_par_cle_en_nombre_fixe(tmp_path):
+    client = ClientOpenMeteo(dossier_cache=str(tmp_path))
+    cles = [cle_requete('u', {'i': i}) for i in range(1000)]
+    verrous = {id(client._verrou_cle(cle)) for cle in cles}
+    assert client._verrou_cle(cles[0]) is client._verrou_cle(cles[0])
+    assert len(verrous) == len(client._verrous_cles)
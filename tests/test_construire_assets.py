@@ -0,0 +1,40 @@
+# tests/test_construire_assets.py - Police Poppins : Google Fonts tant qu'aucune police n'est auto-hébergée
+import os
+
+import pytest
+
+import construire_assets
+from construire_assets import construire
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _css(dossier, index):
+    with open(os.path.join(dossier, index['css']), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def racine(monkeypatch):
+    monkeypatch.chdir(RACINE)
+
+
+def test_sans_polices_garde_google_fonts(tmp_path):
+    sortie = tmp_path / 'static'
+    index = construire(str(sortie), str(tmp_path / 'polices'))
+    assert index['polices'] == []
+    assert _css(sortie, index).startswith("@import url('https://fonts.googleapis.com/")
+
+
+def test_polices_auto_hebergees_remplacent_google_fonts(tmp_path):
+    polices = tmp_path / 'polices'
+    polices.mkdir()
+    for graisse in construire_assets.GRAISSES_POLICE:
+        (polices / f"Poppins-{graisse}.woff2").write_bytes(b'wOF2' + bytes([graisse % 256]))
+    sortie = tmp_path / 'static'
+    index = construire(str(sortie), str(polices))
+    css = _css(sortie, index)
+    assert len(index['polices']) == len(construire_assets.GRAISSES_POLICE)
+    assert 'googleapis' not in css
+    assert css.count('@font-face') == len(construire_assets.GRAISSES_POLICE)
+    assert all(fichier in css for fichier in index['polices'])
@@ -0,0 +1,71 @@
+# tests/test_entrainement_incremental.py - Étapes ajoutées au modèle et contrôle de la mise à jour
+import copy
+
+import numpy as np
+import pytest
+from bench_entrainement import historique_synthetique
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+import entrainement_incremental
+from construction_features import FEATURES_AVANCEES, construire_features
+from entrainement_incremental import ETAPES_PAR_MISE_A_JOUR, TOLERANCE_CONTROLE, ajouter_etapes, verifier_etapes
+from entrainer_modele import PARAMS_GBM, PARAMS_HGB, entrainer_cible, preparer_donnees
+
+PARAMS = {'hgb': dict(PARAMS_HGB, max_iter=300), 'gbm': dict(PARAMS_GBM, n_estimators=60, max_depth=5)}
+JOURS_MISE_A_JOUR = 60
+JOURS_SUIVANTS = 30
+
+
+def _mae(modele, X, y):
+    return float(np.mean(np.abs(modele.predict(X) - y)))
+
+
+def _preparer(moteur):
+    """(modèle, X, y, fenêtre de mise à jour) : modèle entraîné avant la fenêtre, 2 ans synthétiques"""
+    df = preparer_donnees(historique_synthetique(2.2), moteur)
+    X = construire_features(df['date'], FEATURES_AVANCEES, df)
+    y = df['temperature'].to_numpy(dtype=np.float64)
+    fin = len(X) - JOURS_SUIVANTS * 24
+    debut = fin - JOURS_MISE_A_JOUR * 24
+    modele, _ = entrainer_cible(X[:debut], y[:debut], moteur, PARAMS[moteur])
+    return modele, X, y, slice(debut, fin)
+
+
+@pytest.fixture(scope='module')
+def hgb():
+    return _preparer('hgb')
+
+
+@pytest.fixture(scope='module', params=['hgb', 'gbm'])
+def donnees(request, hgb):
+    return hgb if request.param == 'hgb' else _preparer('gbm')
+
+
+def test_etapes_reduisent_erreur_fenetre(donnees):
+    modele, X, y, fenetre = donnees
+    mis_a_jour = ajouter_etapes(copy.deepcopy(modele), X[fenetre], y[fenetre])
+    assert _mae(mis_a_jour, X[fenetre], y[fenetre]) < 0.9 * _mae(modele, X[fenetre], y[fenetre])
+
+
+def test_etapes_hgb_apprises_sur_les_residus(hgb):
+    modele, X, y, fenetre = hgb
+    mis_a_jour = ajouter_etapes(copy.deepcopy(modele), X[fenetre], y[fenetre])
+    residus = y[fenetre] - modele.predict(X[fenetre])
+    params = dict(modele.get_params(), early_stopping=False, max_iter=ETAPES_PAR_MISE_A_JOUR)
+    reference = HistGradientBoostingRegressor(**params).fit(X[fenetre], residus)
+
+    assert mis_a_jour.n_iter_ == modele.n_iter_ + ETAPES_PAR_MISE_A_JOUR
+    np.testing.assert_allclose(mis_a_jour.predict(X), modele.predict(X) + reference.predict(X), atol=1e-9)
+
+
+def test_controle_refuse_une_mise_a_jour_degradee(hgb, monkeypatch):
+    """Warm start de scikit-learn (bins recalculés, faux résidus) : le contrôle doit le refuser"""
+    modele, X, y, fenetre = hgb
+
+    def warm_start(modele, X, y, nb_etapes):
+        modele.set_params(warm_start=True, early_stopping=False, max_iter=modele.n_iter_ + nb_etapes)
+        return modele.fit(X, y)
+
+    monkeypatch.setattr(entrainement_incremental, 'ajouter_etapes', warm_start)
+    avant, apres = verifier_etapes(modele, X[fenetre], y[fenetre])
+    assert apres > avant * (1 + TOLERANCE_CONTROLE)
@@ -0,0 +1,27 @@
+# tests/test_entrainer_modele.py - RMSE de validation mesuré sur des heures jamais vues
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+import entrainer_modele
+from entrainer_modele import FRACTION_VALIDATION, PARAMS_GBM, PARAMS_HGB, entrainer_cible
+
+
+def test_validation_jamais_vue_par_aucun_moteur(monkeypatch):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 4))
+    y = X[:, 0] + rng.normal(0, 0.1, 2000)
+    coupe = int(len(X) * (1 - FRACTION_VALIDATION))
+    vus = []
+
+    class Espion(HistGradientBoostingRegressor):
+        def fit(self, X, y, sample_weight=None, *, X_val=None, y_val=None, **kwargs):
+            vus.append(len(X) + (0 if X_val is None else len(X_val)))
+            return super().fit(X, y, sample_weight, X_val=X_val, y_val=y_val)
+
+    monkeypatch.setattr(entrainer_modele, 'HistGradientBoostingRegressor', Espion)
+    _, rmse_hgb = entrainer_cible(X, y, 'hgb', dict(PARAMS_HGB, max_iter=50))
+    _, rmse_gbm = entrainer_cible(X, y, 'gbm', dict(PARAMS_GBM, n_estimators=20), evaluer=True)
+
+    assert vus[0] <= coupe  # arrêt anticipé : validation exclue
+    assert vus[-1] == len(X)  # modèle final : tout l'historique
+    assert 0 < rmse_hgb < 0.5 and 0 < rmse_gbm < 0.5
@@ -0,0 +1,31 @@
+# tests/test_journal_verification.py - Grilles journalisées plusieurs fois : vérifiées une seule fois
+from types import SimpleNamespace
+
+import numpy as np
+
+import journal_verification
+from journal_verification import journaliser, verifier
+from prevision import GrilleHoraire
+
+
+def _secondes(texte):
+    return int(np.datetime64(texte, 's').astype(np.int64))
+
+
+def test_doublons_verifies_une_fois(tmp_path, monkeypatch):
+    modele_charge = SimpleNamespace(chemin=str(tmp_path / 'modele.pkl'), version='abc123def456')
+    jours = np.datetime64('2026-07-02') + np.arange(3)
+    grille = GrilleHoraire(jours, np.ones((3, 24)), np.full((3, 24), 50.0))
+    # Même grille journalisée par l'application, l'API et le précalcul le même jour, puis le lendemain
+    for emission in ('2026-07-01T06', '2026-07-01T07', '2026-07-01T18', '2026-07-02T06'):
+        journaliser(modele_charge, grille, _secondes(emission))
+
+    def observations(code_ville, debut, fin):
+        t0 = _secondes(str(np.datetime64(debut, 's').astype('datetime64[D]')))
+        nb_heures = (fin - t0) // 3600 + 24
+        return t0, {'temperature': np.zeros(nb_heures), 'humidity': np.full(nb_heures, 50.0)}
+
+    monkeypatch.setattr(journal_verification, '_observations', observations)
+    etat = verifier('rabat', modele_charge.chemin, fin=_secondes('2026-07-04T23'))
+    assert sum(e['n'] for e in etat['echeances']) == 2 * grille.temperature.size
+    assert all(e['temperature']['MAE'] == 1.0 for e in etat['echeances'])
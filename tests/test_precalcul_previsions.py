@@ -0,0 +1,50 @@
+# tests/test_precalcul_previsions.py - Calcul d'une grille : seul le modèle concerné attend
+import threading
+
+import numpy as np
+
+import precalcul_previsions
+from precalcul_previsions import chemin_grille, ecrire_grille, grille_prevision
+from prevision import GrilleHoraire
+from registre_modele import ModeleCharge
+
+PREMIER_JOUR = '2026-07-01'
+
+
+def _modele(tmp_path, nom):
+    return ModeleCharge(str(tmp_path / nom / 'modele.pkl'), 0, 0, nom * 12)
+
+
+def _grille():
+    jours = np.datetime64(PREMIER_JOUR) + np.arange(2)
+    return GrilleHoraire(jours, np.zeros((2, 24)), np.zeros((2, 24)))
+
+
+def test_calcul_ne_bloque_pas_les_autres_modeles(tmp_path, monkeypatch):
+    lent, memoire, disque = _modele(tmp_path, 'a'), _modele(tmp_path, 'b'), _modele(tmp_path, 'c')
+    commence, liberer = threading.Event(), threading.Event()
+    calculs = []
+
+    def produire(modele_charge, premier_jour, chemin):
+        calculs.append(modele_charge)
+        commence.set()
+        assert liberer.wait(10)
+        return _grille()
+
+    monkeypatch.setattr(precalcul_previsions, 'produire_grille', produire)
+    fils = [threading.Thread(target=grille_prevision, args=(lent, PREMIER_JOUR)) for _ in range(2)]
+    for f in fils:
+        f.start()
+    assert commence.wait(10)
+
+    # Pendant le calcul du modèle `lent` : mémoire et fichier des autres modèles sans attente
+    memoire.grilles[PREMIER_JOUR] = _grille()
+    assert grille_prevision(memoire, PREMIER_JOUR) is memoire.grilles[PREMIER_JOUR]
+    ecrire_grille(_grille(), chemin_grille(disque, PREMIER_JOUR))
+    assert len(grille_prevision(disque, PREMIER_JOUR)) == 2
+
+    liberer.set()
+    for f in fils:
+        f.join(10)
+    assert calculs == [lent]  # le second appel a trouvé la grille calculée par le premier
+    assert PREMIER_JOUR in lent.grilles
@@ -0,0 +1,20 @@
+# tests/test_prevision.py - Avertissement « feature names » ignoré pendant le predict seulement
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from prevision import predire
+
+
+def test_avertissement_feature_names_limite_au_predict():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+    modele = HistGradientBoostingRegressor(max_iter=5).fit(X, X['a'])
+    with warnings.catch_warnings(record=True) as recus:
+        warnings.simplefilter('always')
+        predire(modele, X.to_numpy(dtype=np.float32))
+        assert not recus
+        modele.predict(X.to_numpy(dtype=np.float32))  # hors de predire : le filtre ne s'applique plus
+    assert any('valid feature names' in str(w.message) for w in recus)
@@ -0,0 +1,73 @@
+# villes.py - Villes servies par l'application et emplacement de leurs modèles
+#
+# Chaque ville a son dossier modeles/<code>/ contenant l'artefact (et sa version
+# compacte .arbres) et son historique colonnaire (historique_meteo/, lié par chemin relatif).
+import os
+
+from artefact_compact import chemin_compact
+from registre_modele import CHEMIN_MODELE
+
+DOSSIER_MODELES = 'modeles'
+VILLE_DEFAUT = 'rabat'
+
+VILLES = {
+    'rabat': {'nom': 'Rabat', 'latitude': 34.0209, 'longitude': -6.8416},
+    'casablanca': {'nom': 'Casablanca', 'latitude': 33.5731, 'longitude': -7.5898},
+    'marrakech': {'nom': 'Marrakech', 'latitude': 31.6295, 'longitude': -7.9811},
+    'fes': {'nom': 'Fès', 'latitude': 34.0181, 'longitude': -5.0078},
+    'tanger': {'nom': 'Tanger', 'latitude': 35.7595, 'longitude': -5.8340},
+    'agadir': {'nom': 'Agadir', 'latitude': 30.4278, 'longitude': -9.5981},
+    'meknes': {'nom': 'Meknès', 'latitude': 33.8935, 'longitude': -5.5473},
+    'oujda': {'nom': 'Oujda', 'latitude': 34.6814, 'longitude': -1.9086},
+    'kenitra': {'nom': 'Kénitra', 'latitude': 34.2610, 'longitude': -6.5802},
+    'tetouan': {'nom': 'Tétouan', 'latitude': 35.5785, 'longitude': -5.3684},
+    'essaouira': {'nom': 'Essaouira', 'latitude': 31.5085, 'longitude': -9.7595},
+}
+
+
+def ville(code):
+    """Description {nom, latitude, longitude} d'une ville ; ValueError si inconnue"""
+    try:
+        return VILLES[code]
+    except KeyError:
+        raise ValueError(f"Ville inconnue : '{code}'. Villes disponibles : {', '.join(VILLES)}") from None
+
+
+def coordonnees_lisibles(code):
+    """Ex. '34.02°N, 6.84°W'"""
+    v = ville(code)
+    return (f"{abs(v['latitude']):.2f}°{'N' if v['latitude'] >= 0 else 'S'}, "
+            f"{abs(v['longitude']):.2f}°{'E' if v['longitude'] >= 0 else 'W'}")
+
+
+def chemin_modele(code):
+    """Emplacement de l'artefact d'une ville (là où l'entraînement l'écrit)"""
+    ville(code)
+    return os.path.join(DOSSIER_MODELES, code, os.path.basename(CHEMIN_MODELE))
+
+
+def _compact_a_jour(chemin):
+    """Artefact compact de `chemin` s'il existe et n'est pas plus ancien que le .pkl, sinon None"""
+    compact = chemin_compact(chemin)
+    if not os.path.exists(compact):
+        return None
+    if os.path.exists(chemin) and os.path.getmtime(chemin) > os.path.getmtime(compact):
+        return None  # .pkl réentraîné sans reconversion
+    return compact
+
+
+def trouver_modele(code, compact=True):
+    """Artefact à charger pour une ville, y compris l'ancien modèle unique de Rabat à la racine.
+
+    Avec `compact`, la version compacte (<modèle>.arbres) est préférée quand elle est à jour ;
+    sans, seul l'artefact joblib convient (mise à jour des modèles scikit-learn).
+    """
+    candidats = [chemin_modele(code)]
+    if code == VILLE_DEFAUT:
+        candidats.append(CHEMIN_MODELE)
+    for chemin in candidats:
+        if compact and _compact_a_jour(chemin):
+            return chemin_compact(chemin)
+        if os.path.exists(chemin):
+            return chemin
+    return candidats[0]